@@ -0,0 +1,71 @@
+'''Mede linhas/s de `query_brasilapi_concurrent` contra um stub local da BrasilAPI.
+
+Uso (a partir da pasta ProjetoFinalCompass):
+
+    python Benchmarks/benchmark_api_brasil.py --rows 500 --workers 1 2 4 8 16
+
+Com --server-rate/--error-ratio o stub passa a responder 429/503; o benchmark então compara
+quantas linhas são perdidas sem o limitador de taxa e com ele.
+
+    python Benchmarks/benchmark_api_brasil.py --rows 300 --workers 16 --server-rate 40 --error-ratio 0.05
+'''
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import vars_map
+from Utils.api_brasil import create_brasilapi_limiter, create_brasilapi_session, query_brasilapi, query_brasilapi_concurrent
+from tests.stub_servers import BrasilApiStubHandler, StubServer
+from Benchmarks.helpers import NullLogger
+
+
+def run(rows: int, workers_list: list, latency: float, server_rate: float, error_ratio: float):
+    logger = NullLogger()
+    cnpjs = [f"{n:014d}" for n in range(rows)]
+    BrasilApiStubHandler.latency = latency
+    BrasilApiStubHandler.max_rate = server_rate
+    BrasilApiStubHandler.error_ratio = error_ratio
+    with StubServer(BrasilApiStubHandler) as server:
+        vars_map['DEFAULT_BRASILAPI_URL'] = f"{server.url}/api/cnpj/v1/"
+
+        if server_rate is None and not error_ratio:
+            start = time.perf_counter()
+            for cnpj in cnpjs:
+                query_brasilapi(cnpj, logger)
+            elapsed = time.perf_counter() - start
+            print(f"sequencial (sem sessão)   {rows / elapsed:8.1f} linhas/s")
+
+        for workers in workers_list:
+            # Sem limitador: todas as consultas de uma vez e nenhuma nova tentativa, como antes
+            start = time.perf_counter()
+            with create_brasilapi_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(lambda cnpj: query_brasilapi(cnpj, logger, session), cnpjs))
+            elapsed = time.perf_counter() - start
+            lost = sum(status == 'falha' for _, status in results)
+            print(f"{workers:>3} workers sem limitador  {rows / elapsed:8.1f} linhas/s  {lost:>5} perdidas")
+
+            limiter = create_brasilapi_limiter(rows, workers)
+            start = time.perf_counter()
+            results = query_brasilapi_concurrent(cnpjs, logger, workers, limiter=limiter)
+            elapsed = time.perf_counter() - start
+            assert [item['data']['cnpj'] for item in results if item['data']] == [
+                cnpj for cnpj, item in zip(cnpjs, results) if item['data']], 'Ordem de saída diferente da entrada'
+            lost = sum(item['status'] == 'falha' for item in results)
+            stats = limiter.stats()
+            print(f"{workers:>3} workers com limitador  {rows / elapsed:8.1f} linhas/s  {lost:>5} perdidas  "
+                  f"{stats['throttled']:>5} x 429/503  {stats['retries']:>5} novas tentativas")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--latency', type=float, default=0.05, help='Latência simulada por requisição, em segundos')
+    parser.add_argument('--server-rate', type=float, default=None, help='Taxa máxima aceita pelo stub, em requisições/s')
+    parser.add_argument('--error-ratio', type=float, default=0.0, help='Fração de respostas 503 do stub')
+    args = parser.parse_args()
+    run(args.rows, args.workers, args.latency, args.server_rate, args.error_ratio)
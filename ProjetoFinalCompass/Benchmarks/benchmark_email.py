@@ -0,0 +1,96 @@
+'''Compara o envio do e-mail de resultado como era feito (planilha de destinatários relida, uma mensagem
+e uma codificação do anexo por destinatário) com o MailDispatcher (destinatários em cache, anexo
+codificado uma vez, uma conexão e, com EMAIL_SINGLE_MESSAGE, um único envio em cópia oculta),
+contra um servidor SMTP local.
+
+Uso (a partir da pasta ProjetoFinalCompass):
+
+    python Benchmarks/benchmark_email.py --recipients 50 --attachment-mb 5 --compress
+'''
+import argparse
+import contextlib
+import io
+import os
+import smtplib
+import sys
+import tempfile
+import time
+from email.message import EmailMessage
+
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import vars_map
+import Utils.email_functions as email_functions
+from tests.stub_servers import SmtpStubHandler, SmtpStubServer
+
+
+def make_recipients_workbook(path: str, recipients: int):
+    workbook = Workbook()
+    for n in range(recipients):
+        workbook.active.append([f"destinatario{n}@empresa.com.br"])
+    workbook.save(path)
+
+
+def legacy_send(output_file: str, host: str, port: int):
+    '''Mesmo fluxo do send_emails anterior, com SMTP sem TLS para usar o servidor local.'''
+    with open(output_file, "rb") as content_file:
+        content = content_file.read()
+    email_functions._load_recipients.cache_clear()
+    emails = email_functions.read_emails_from_excel()
+    with smtplib.SMTP(host, port) as smtp:
+        smtp.ehlo('localhost')
+        smtp.login('rpa@empresa.com.br', 'senha')
+        for email in emails:
+            msg = EmailMessage()
+            msg['Subject'] = "RPA resultado"
+            msg['From'] = 'rpa@empresa.com.br'
+            msg['To'] = email
+            msg.set_content("O processo RPA foi executado com sucesso")
+            msg.add_attachment(content, maintype='application', subtype='xlsx', filename='resultado.xlsx')
+            smtp.send_message(msg)
+
+
+def measure(label: str, function):
+    SmtpStubHandler.messages, SmtpStubHandler.connections, SmtpStubHandler.logins = [], 0, 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        function()
+    elapsed = time.perf_counter() - start
+    messages = SmtpStubHandler.messages
+    delivered = sum(len(message['to']) for message in messages)
+    sent_mb = sum(len(message['data']) for message in messages) / 2**20
+    print(f"{label:<28} {elapsed:7.2f}s  {len(messages):>4} mensagens  {delivered:>4} destinatários  "
+          f"{sent_mb:8.1f} MB enviados  {SmtpStubHandler.connections} conexão(ões)")
+    return delivered
+
+
+def run(recipients: int, attachment_mb: float, compress: bool):
+    with tempfile.TemporaryDirectory() as folder, SmtpStubServer() as server:
+        recipients_file = os.path.join(folder, 'emails.xlsx')
+        make_recipients_workbook(recipients_file, recipients)
+        output_file = os.path.join(folder, 'resultado.xlsx')
+        with open(output_file, 'wb') as file:
+            # Conteúdo repetitivo, parecido com uma planilha grande, para que a compactação tenha efeito
+            file.write(b'CNPJ;VALOR COTACAO;STATUS\n' * int(attachment_mb * 2**20 / 26))
+
+        vars_map.update({'DEFAULT_EMAILS_FILE': recipients_file, 'EMAIL_USERNAME': 'rpa@empresa.com.br', 'SMTP_HOST': server.host, 'SMTP_PORT': server.port, 'SMTP_USE_SSL': False,
+                         'EMAIL_PASSWORD': 'senha', 'EMAIL_COMPRESS_ATTACHMENTS': compress, 'EMAIL_COMPRESS_MIN_MB': 1})
+
+        legacy = measure('anterior', lambda: legacy_send(output_file, server.host, server.port))
+        for single_message in (False, True):
+            vars_map['EMAIL_SINGLE_MESSAGE'] = single_message
+            email_functions._load_recipients.cache_clear()
+            label = f"dispatcher {'cópia oculta' if single_message else 'por destinatário'}"
+            delivered = measure(label, lambda: email_functions.send_emails(output_file))
+            assert delivered == legacy == recipients, 'Destinatários diferentes entre os envios'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipients', type=int, default=50)
+    parser.add_argument('--attachment-mb', type=float, default=5)
+    parser.add_argument('--compress', action='store_true', help='Ativa EMAIL_COMPRESS_ATTACHMENTS')
+    args = parser.parse_args()
+    run(args.recipients, args.attachment_mb, args.compress)
@@ -0,0 +1,180 @@
+'''Executa o processo completo (bot.main) sem acesso à internet, contra stand-ins locais da BrasilAPI,
+do calculador dos correios, do simulador do Jadlog e do RPA Challenge, e mede cada etapa:
+duração, linhas, linhas/s, latência por linha (p50/p95) e pico de memória residente.
+
+Os resultados são gravados em JSON, junto com o commit, o tamanho da planilha e a configuração,
+para comparar execuções entre versões. As etapas com navegador precisam do Chrome e do chromedriver.
+
+Uso (a partir da pasta ProjetoFinalCompass):
+
+    python Benchmarks/benchmark_end_to_end.py --rows 200 --latency 0.05 --output Benchmarks/resultados/e2e.json
+'''
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import vars_map
+import bot
+import Utils.api_brasil
+import Utils.interact_correios
+import Utils.interactions_dataframe_correios
+import Utils.jadlog_http
+import Utils.scriptProcessos
+from Utils.stage_scheduler import StageScheduler
+from Benchmarks.helpers import LatencyRecorder, RssSampler, make_input_workbook
+from tests.stub_servers import (BrasilApiStubHandler, CorreiosStubHandler, JadlogStubHandler,
+                                     RpaChallengeStubHandler, StubServer)
+
+
+class RecordingScheduler(StageScheduler):
+    '''StageScheduler que guarda a última instância e o retorno das etapas, para o relatório.'''
+
+    last = None
+
+    def run(self) -> dict:
+        RecordingScheduler.last = self
+        self.results = {}
+        self.results = super().run()
+        return self.results
+
+
+def stage_rows(results: dict) -> dict:
+    '''Número de linhas processadas por etapa, a partir do retorno de cada uma.'''
+    rows = {}
+    if 'leitura' in results:
+        rows['leitura'] = len(results['leitura'])
+    if 'api' in results:
+        rows['api'] = rows['endereco'] = rows['rpa_challenge'] = len(results['api'][0])
+        rows['divisao'] = len(results['api'][1])
+    if 'divisao' in results:
+        _, df_correios, df_jadlog = results['divisao']
+        rows['correios'], rows['jadlog'] = len(df_correios), len(df_jadlog)
+    if 'escrita' in results:
+        rows['escrita'] = len(results['escrita'][0])
+        rows['email'] = 1
+    return rows
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def configure(folder: str, urls: dict, headless: bool):
+    '''Aponta URLs e pastas do vars_map para os stand-ins e para a pasta temporária.'''
+    for name in ('Processar', 'Processados', 'Logs', 'Cache', 'Checkpoints'):
+        os.makedirs(os.path.join(folder, name), exist_ok=True)
+    vars_map['DEFAULT_PROCESSAR_PATH'] = os.path.join(folder, 'Processar')
+    vars_map['DEFAULT_PROCESSADOS_PATH'] = os.path.join(folder, 'Processados')
+    vars_map['BASE_LOG_PATH'] = os.path.join(folder, 'Logs')
+    vars_map['DEFAULT_CACHE_PATH'] = os.path.join(folder, 'Cache')
+    vars_map['DEFAULT_CHECKPOINT_PATH'] = os.path.join(folder, 'Checkpoints')
+    vars_map['RESUME_FROM_CHECKPOINT'] = False
+    # Sem cache, para que toda linha passe pelos sites, e sem envio de e-mails
+    vars_map['QUOTE_CACHE_ENABLED'] = False
+    vars_map['EMAIL_PASSWORD'] = ''
+    vars_map['DEFAULT_BRASILAPI_URL'] = f"{urls['brasilapi']}/api/cnpj/v1/"
+    vars_map['DEFAULT_URL_JADLOG'] = f"{urls['jadlog']}/jadlog/simulacao"
+    vars_map['DEFAUT_RPACHALLENGE_URL'] = f"{urls['rpa']}/"
+    Utils.interact_correios.URL_CORREIOS = f"{urls['correios']}/"
+    vars_map['BROWSER_HEADLESS'] = headless
+    vars_map['DEFAULT_BOT'].headless = headless
+
+
+def instrument(recorder: LatencyRecorder):
+    recorder.instrument('api', Utils.api_brasil, 'query_brasilapi')
+    recorder.instrument('correios', Utils.interactions_dataframe_correios, 'interact_correios_session')
+    recorder.instrument('correios', Utils.interactions_dataframe_correios, 'interact_correios')
+    recorder.instrument('jadlog', Utils.scriptProcessos, 'fillJadlogForm')
+    recorder.instrument('jadlog', Utils.jadlog_http.JadlogHttpClient, 'quote')
+
+
+def run(rows: int, latency: float, null_ratio: float, headless: bool, output: str):
+    BrasilApiStubHandler.latency = CorreiosStubHandler.latency = JadlogStubHandler.latency = latency
+    RpaChallengeStubHandler.submissions = []
+    folder = tempfile.mkdtemp(prefix='e2e_')
+    recorder = LatencyRecorder()
+    scheduler_class = bot.StageScheduler
+    bot.StageScheduler = RecordingScheduler
+    try:
+        with StubServer(BrasilApiStubHandler) as brasilapi, StubServer(CorreiosStubHandler) as correios, \
+                StubServer(JadlogStubHandler) as jadlog, StubServer(RpaChallengeStubHandler) as rpa:
+            configure(folder, {'brasilapi': brasilapi.url, 'correios': correios.url, 'jadlog': jadlog.url, 'rpa': rpa.url}, headless)
+            make_input_workbook(os.path.join(folder, 'Processar', 'Planilha de Entrada Grupos.xlsx'), rows, null_ratio=null_ratio)
+            instrument(recorder)
+
+            with RssSampler() as sampler:
+                start = time.perf_counter()
+                bot.main()
+                total = time.perf_counter() - start
+
+        # A latência por linha do RPA Challenge é o intervalo entre dois envios recebidos pelo stand-in
+        submissions = RpaChallengeStubHandler.submissions
+        recorder.add('rpa_challenge', [later - earlier for earlier, later in zip(submissions, submissions[1:])])
+    finally:
+        recorder.restore()
+        bot.StageScheduler = scheduler_class
+        shutil.rmtree(folder, ignore_errors=True)
+
+    scheduler = RecordingScheduler.last
+    if scheduler is None:
+        raise RuntimeError('O processo terminou antes de executar as etapas, veja os logs')
+    rows_per_stage = stage_rows(scheduler.results)
+    stages = {}
+    for name, timing in scheduler.timings.items():
+        stage_rows_count = rows_per_stage.get(name)
+        stages[name] = {
+            'seconds': round(timing.seconds, 3),
+            'rows': stage_rows_count,
+            'rows_per_second': round(stage_rows_count / timing.seconds, 1) if stage_rows_count and timing.seconds else None,
+            **recorder.summary(name),
+            'peak_rss_mb': sampler.peak_mb(timing.start.timestamp(), timing.end.timestamp()),
+        }
+
+    report = {
+        'commit': git_commit(),
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'rows': rows,
+        'latency_seconds': latency,
+        'null_ratio': null_ratio,
+        'total_seconds': round(total, 3),
+        'peak_rss_mb': sampler.peak_mb(),
+        'config': {name: vars_map.get(name) for name in (
+            'PIPELINE_MAX_WORKERS', 'BROWSER_WORKERS', 'BRASILAPI_MAX_WORKERS', 'JADLOG_BACKEND',
+            'CORREIOS_REUSE_SESSION', 'CORREIOS_RESTART_EVERY', 'INPUT_CHUNK_SIZE', 'JOURNAL_FSYNC_EVERY')},
+        'stages': stages,
+    }
+
+    print(f"{'etapa':<15}{'s':>9}{'linhas':>8}{'linhas/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'RSS MB':>9}")
+    for name, stage in stages.items():
+        print(f"{name:<15}{stage['seconds']:>9.2f}{stage['rows'] or '-':>8}{stage['rows_per_second'] or '-':>10}"
+              f"{stage['p50_ms'] or '-':>9}{stage['p95_ms'] or '-':>9}{stage['peak_rss_mb'] or '-':>9}")
+    print(f"Total: {total:.2f}s")
+
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2, default=str)
+        print(f"Resultados gravados em {output}")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help='Latência simulada por requisição, em segundos')
+    parser.add_argument('--null-ratio', type=float, default=0.0, help='Fração de células vazias nas colunas de cotação')
+    parser.add_argument('--show-browser', action='store_true', help='Abre os navegadores com interface')
+    parser.add_argument('--output', default=None, help='Arquivo JSON para gravar os resultados')
+    args = parser.parse_args()
+    run(args.rows, args.latency, args.null_ratio, not args.show_browser, args.output)
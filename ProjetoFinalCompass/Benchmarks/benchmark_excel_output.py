@@ -0,0 +1,73 @@
+'''Compara a escrita da planilha de saída: save_df_output_to_excel + compare_quotation
+(escreve, recarrega e salva de novo) contra save_styled_output_to_excel (uma única passada).
+
+Uso (a partir da pasta ProjetoFinalCompass):
+
+    python Benchmarks/benchmark_excel_output.py --rows 10000 100000
+'''
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Utils.functions_excel import save_df_output_to_excel, compare_quotation, save_styled_output_to_excel
+from Benchmarks.helpers import NullLogger
+
+
+OUTPUT_COLUMNS = [
+    "CNPJ", "RAZÃO SOCIAL", "NOME FANTASIA",
+    "ENDEREÇO", "CEP", "DESCRIÇÃO MATRIZ FILIAL",
+    "TELEFONE + DDD", "E-MAIL", "VALOR DO PEDIDO",
+    "DIMENSÕES CAIXA (altura x largura x comprimento cm)", "PESO DO PRODUTO", "TIPO DE SERVIÇO JADLOG",
+    "TIPO DE SERVIÇO CORREIOS", "VALOR COTAÇÃO JADLOG", "VALOR COTAÇÃO CORREIOS",
+    "PRAZO DE ENTREGA CORREIOS", "STATUS"
+]
+
+
+def make_output_dataframe(rows: int, seed: int = 42) -> pd.DataFrame:
+    '''Gera um df_output sintético, com cotações em "R$ 12,34" como as do processo real.'''
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({column: [f"{column[:6]} {n}" for n in range(rows)] for column in OUTPUT_COLUMNS}, dtype=object)
+    df["CNPJ"] = [f"{n:014d}" for n in range(rows)]
+    for column in ["VALOR COTAÇÃO JADLOG", "VALOR COTAÇÃO CORREIOS"]:
+        values = rng.uniform(10, 300, rows)
+        df[column] = [f"R$ {value:.2f}".replace('.', ',') for value in values]
+    df["STATUS"] = None
+    return df
+
+
+def measure(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def run(rows_list: list):
+    logger = NullLogger()
+    with tempfile.TemporaryDirectory() as output_path:
+        for rows in rows_list:
+            df_output = make_output_dataframe(rows)
+
+            def current_path():
+                output_file = save_df_output_to_excel(output_path, df_output, logger)
+                compare_quotation(df_output, output_file, logger)
+
+            current = measure(current_path)
+            # o nome do arquivo tem resolução de segundos
+            time.sleep(1)
+            single_pass = measure(lambda: save_styled_output_to_excel(output_path, df_output, logger))
+            print(f"{rows:>7} linhas | atual {current:7.2f}s | passada única {single_pass:7.2f}s | {current / single_pass:4.1f}x")
+            time.sleep(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    run(args.rows)
@@ -0,0 +1,56 @@
+'''Verifica que importar `config` e `Utils` é rápido e sem efeitos colaterais: mede o tempo de import
+em interpretadores novos e falha (código de saída 1) se a mediana passar do orçamento ou se algum
+módulo pesado (botcity, selenium, webdriver_manager, pandas, openpyxl, PIL) for carregado.
+
+Uso (a partir da pasta ProjetoFinalCompass):
+
+    python Benchmarks/benchmark_import_time.py --runs 5 --budget-ms 300
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['botcity', 'selenium', 'webdriver_manager', 'pandas', 'openpyxl', 'PIL']
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import config, Utils
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "loaded": [name for name in %r if name in sys.modules]}))
+''' % HEAVY_MODULES
+
+
+def probe() -> dict:
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=PROJECT_PATH, capture_output=True, text=True,
+                            env={**os.environ, 'IS_MAESTRO_CONNECTED': 'False'})
+    if result.returncode != 0:
+        raise RuntimeError(f'Falha ao importar config/Utils:\n{result.stderr}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int, budget_ms: float) -> bool:
+    results = [probe() for _ in range(runs)]
+    median = statistics.median(result['ms'] for result in results)
+    loaded = sorted({name for result in results for name in result['loaded']})
+    print(f"import config, Utils: mediana {median:.1f} ms em {runs} execuções (orçamento {budget_ms:.0f} ms)")
+    ok = True
+    if median > budget_ms:
+        print(f"FALHA: tempo de import acima do orçamento")
+        ok = False
+    if loaded:
+        print(f"FALHA: módulos pesados carregados no import: {', '.join(loaded)}")
+        ok = False
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=300)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.runs, args.budget_ms) else 1)
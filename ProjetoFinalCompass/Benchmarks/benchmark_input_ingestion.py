@@ -0,0 +1,72 @@
+'''Compara a leitura da planilha de entrada: duas leituras completas com pandas (df de entrada +
+CNPJs da BrasilAPI, como antes) contra a leitura única em blocos de read_output_dataframe.
+Mede tempo e, com --memory, o pico de memória alocada (tracemalloc, que deixa a execução
+bem mais lenta).
+
+Uso (a partir da pasta ProjetoFinalCompass):
+
+    python Benchmarks/benchmark_input_ingestion.py --rows 10000 50000 --chunk-size 5000 --memory
+'''
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Utils.functions_excel import INPUT_SHEET_NAME, create_output_dataframe, read_output_dataframe
+from Benchmarks.helpers import NullLogger, make_input_workbook
+
+
+def legacy_read(path: str, logger):
+    df_input = pd.read_excel(path, INPUT_SHEET_NAME, na_values=["NA"], dtype=object)
+    df_output = create_output_dataframe(df_input, logger)
+    cnpj_list = [str(cnpj).strip().zfill(14) for cnpj in pd.read_excel(path, INPUT_SHEET_NAME)["CNPJ"]]
+    return df_output, cnpj_list
+
+
+def streaming_read(path: str, logger, chunk_size: int):
+    df_output = read_output_dataframe(path, logger, chunk_size)
+    return df_output, list(df_output["CNPJ"].dropna().unique())
+
+
+def measure(track_memory: bool, function, *args):
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if track_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def run(rows_list: list, chunk_size: int, track_memory: bool):
+    logger = NullLogger()
+    with tempfile.TemporaryDirectory() as folder:
+        for rows in rows_list:
+            path = os.path.join(folder, f"entrada_{rows}.xlsx")
+            make_input_workbook(path, rows, extra_columns=10)
+
+            (legacy_df, legacy_cnpjs), elapsed, peak = measure(track_memory, legacy_read, path, logger)
+            print(f"{rows:>7} linhas  pandas x2     {elapsed:7.2f}s" + (f"  pico {peak:8.1f} MB" if track_memory else ""))
+            (stream_df, stream_cnpjs), elapsed, peak = measure(track_memory, streaming_read, path, logger, chunk_size)
+            print(f"{rows:>7} linhas  blocos        {elapsed:7.2f}s" + (f"  pico {peak:8.1f} MB" if track_memory else ""))
+
+            assert stream_cnpjs == legacy_cnpjs, 'CNPJs diferentes entre as leituras'
+            assert len(stream_df) == len(legacy_df), 'Número de linhas diferente entre as leituras'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--memory', action='store_true', help='Mede o pico de memória com tracemalloc')
+    args = parser.parse_args()
+    run(args.rows, args.chunk_size, args.memory)
@@ -0,0 +1,58 @@
+'''Valida e mede o cliente HTTP do Jadlog contra o stand-in local do simulador.
+
+Uso (a partir da pasta ProjetoFinalCompass):
+
+    python Benchmarks/benchmark_jadlog_http.py --rows 200
+'''
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import vars_map
+from Utils.check_correios_variables import parse_package_columns
+from Utils.jadlog_http import JadlogHttpClient
+from tests.stub_servers import JadlogStubHandler, StubServer, fake_jadlog_price
+
+
+def make_rows(rows: int) -> pd.DataFrame:
+    # Como em make_jadlog_correios_dataframes, as dimensões chegam já convertidas
+    return parse_package_columns(pd.DataFrame({
+        'CNPJ': [f"{n:014d}" for n in range(rows)],
+        'TIPO DE SERVIÇO JADLOG': ['JADLOG Package'] * rows,
+        'DIMENSÕES CAIXA (altura x largura x comprimento cm)': ['10 x 20 x 30'] * rows,
+        'PESO DO PRODUTO': [str(1 + n % 30) for n in range(rows)],
+        'CEP': ['01310100'] * rows,
+        'VALOR DO PEDIDO': ['150,00'] * rows,
+    }))
+
+
+def run(rows: int, latency: float):
+    JadlogStubHandler.latency = latency
+    df = make_rows(rows)
+    with StubServer(JadlogStubHandler) as server:
+        vars_map['DEFAULT_URL_JADLOG'] = f"{server.url}/jadlog/simulacao"
+        with JadlogHttpClient() as client:
+            start = time.perf_counter()
+            for _, serie in df.iterrows():
+                quotation = client.quote(serie)
+                expected = fake_jadlog_price({
+                    'peso': serie['PESO DO PRODUTO'],
+                    'valor_mercadoria': serie['VALOR DO PEDIDO'],
+                    'modalidade': '3',
+                })
+                assert quotation == expected, f'{quotation} != {expected}'
+            elapsed = time.perf_counter() - start
+    print(f"Jadlog HTTP: {rows} cotações em {elapsed:.2f}s ({rows / elapsed:.1f} linhas/s)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help='Latência simulada por requisição, em segundos')
+    args = parser.parse_args()
+    run(args.rows, args.latency)
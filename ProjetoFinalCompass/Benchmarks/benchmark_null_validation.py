@@ -0,0 +1,83 @@
+'''Compara a validação de células vazias por `iterrows` (implementação anterior de
+clean_df_if_null + write_if_null_output) com a validação vetorizada atual.
+
+Uso (a partir da pasta ProjetoFinalCompass):
+
+    python Benchmarks/benchmark_null_validation.py --rows 10000 100000
+'''
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Utils.functions_excel import clean_df_if_null, write_if_null_output
+from Benchmarks.helpers import NullLogger
+
+
+JADLOG_COLUMNS = ['CNPJ', 'TIPO DE SERVIÇO JADLOG',
+                  'DIMENSÕES CAIXA (altura x largura x comprimento cm)', 'PESO DO PRODUTO',
+                  'CEP', 'VALOR DO PEDIDO']
+
+
+def make_dataframe(rows: int, null_ratio: float, seed: int = 42) -> pd.DataFrame:
+    '''Gera um df_output sintético com `null_ratio` das células (exceto CNPJ) vazias.'''
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({column: [f"{column[:4]} {n}" for n in range(rows)] for column in JADLOG_COLUMNS}, dtype=object)
+    df['CNPJ'] = [f"{n:014d}" for n in range(rows)]
+    for column in JADLOG_COLUMNS[1:]:
+        df.loc[rng.random(rows) < null_ratio, column] = None
+    df['STATUS'] = None
+    return df
+
+
+def legacy_clean_and_write(df_output: pd.DataFrame, columns: list) -> pd.DataFrame:
+    '''Implementação anterior: percorre as linhas com iterrows e escreve o STATUS com uma máscara por CNPJ.'''
+    empty_cells = []
+    for _, row in df_output[columns].iterrows():
+        empty_rows = row[row.isnull()].index.tolist()
+        if empty_rows:
+            empty_cells.append({"CNPJ": row["CNPJ"], "NA": empty_rows})
+    df_output[columns].dropna()
+    for empty in empty_cells:
+        df_output.loc[df_output['CNPJ'] == empty['CNPJ'], 'STATUS'] = f"Campos vazios: {empty['NA']}"
+    return df_output
+
+
+def vectorized_clean_and_write(df_output: pd.DataFrame, columns: list) -> pd.DataFrame:
+    logger = NullLogger()
+    _, empty_cells = clean_df_if_null(df_output[columns], columns, logger)
+    return write_if_null_output(df_output, empty_cells, logger)
+
+
+def run(rows_list: list, null_ratio: float, legacy_max_rows: int):
+    for rows in rows_list:
+        df = make_dataframe(rows, null_ratio)
+
+        start = time.perf_counter()
+        vectorized = vectorized_clean_and_write(df.copy(), JADLOG_COLUMNS)
+        elapsed = time.perf_counter() - start
+        print(f"{rows:>7} linhas  vetorizado  {elapsed:8.3f}s")
+
+        if rows > legacy_max_rows:
+            print(f"{rows:>7} linhas  iterrows    (pulado, acima de --legacy-max-rows)")
+            continue
+        start = time.perf_counter()
+        legacy = legacy_clean_and_write(df.copy(), JADLOG_COLUMNS)
+        elapsed = time.perf_counter() - start
+        assert legacy['STATUS'].equals(vectorized['STATUS']), 'STATUS diferente entre as implementações'
+        print(f"{rows:>7} linhas  iterrows    {elapsed:8.3f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--null-ratio', type=float, default=0.05, help='Fração de células vazias por coluna')
+    parser.add_argument('--legacy-max-rows', type=int, default=20000,
+                        help='Maior número de linhas medido com a implementação anterior (ela é quadrática)')
+    args = parser.parse_args()
+    run(args.rows, args.null_ratio, args.legacy_max_rows)
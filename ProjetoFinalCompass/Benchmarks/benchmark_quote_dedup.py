@@ -0,0 +1,81 @@
+'''Compara cotar todas as linhas (como era feito) com o QuotePlan, que cota uma vez cada envio idêntico
+e copia o resultado para as demais linhas do grupo. As cotações são simuladas por uma função com espera
+fixa, que conta as chamadas; o resultado final por CNPJ precisa ser o mesmo nos dois casos.
+
+Uso (a partir da pasta ProjetoFinalCompass):
+
+    python Benchmarks/benchmark_quote_dedup.py --rows 600 --group-size 3 --quote-ms 5
+'''
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Utils.quote_cache import DIMENSIONS_COLUMN, correios_cache_key, jadlog_cache_key
+from Utils.quote_plan import QuotePlan
+from Utils.result_store import ResultStore
+from Benchmarks.helpers import CORREIOS_SERVICES, JADLOG_SERVICES, NullLogger
+
+
+def make_rows(rows: int, group_size: int, seed: int = 42) -> pd.DataFrame:
+    '''Linhas com CNPJs distintos, em que em média `group_size` empresas compartilham o mesmo envio.'''
+    rng = np.random.default_rng(seed)
+    shipments = max(1, rows // group_size)
+    shipment = rng.integers(0, shipments, rows)
+    return pd.DataFrame({
+        'CNPJ': [f"{10000000000000 + n:014d}" for n in range(rows)],
+        'CEP': [f"{1000000 + 37 * s:08d}" for s in shipment],
+        DIMENSIONS_COLUMN: [f"{2 + s % 30} x {10 + s % 40} x {15 + s % 45}" for s in shipment],
+        'PESO DO PRODUTO': [str(1 + s % 19) for s in shipment],
+        'TIPO DE SERVIÇO CORREIOS': [CORREIOS_SERVICES[s % len(CORREIOS_SERVICES)] for s in shipment],
+        'TIPO DE SERVIÇO JADLOG': [JADLOG_SERVICES[s % len(JADLOG_SERVICES)] for s in shipment],
+        'VALOR DO PEDIDO': [f"{50 + s % 800},{s % 100:02d}" for s in shipment],
+    }, dtype=object)
+
+
+def quote_all(df: pd.DataFrame, key_function, quote_ms: float, results: ResultStore) -> int:
+    '''Cota cada linha; o valor depende só da chave, como no site. Retorna o número de cotações feitas.'''
+    for _, row in df.iterrows():
+        time.sleep(quote_ms / 1000)
+        key = key_function(row)
+        if hash(key) % 11 == 0:
+            results.set(row['CNPJ'], 'STATUS', 'Falha cotação')
+        else:
+            results.set(row['CNPJ'], 'VALOR', f"R$ {abs(hash(key)) % 10000 / 100:.2f}")
+    return len(df)
+
+
+def measure(label: str, df: pd.DataFrame, key_function, quote_ms: float, planned: bool) -> pd.DataFrame:
+    results = ResultStore()
+    start = time.perf_counter()
+    if planned:
+        plan = QuotePlan(df, key_function, label, NullLogger())
+        quotes = quote_all(plan.unique_rows, key_function, quote_ms, results)
+        plan.fan_out(results)
+    else:
+        quotes = quote_all(df, key_function, quote_ms, results)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {'plano' if planned else 'todas':<6} {quotes:>6} cotações  {elapsed:7.2f}s")
+    return results.to_frame().sort_index()
+
+
+def run(rows: int, group_size: int, quote_ms: float):
+    df = make_rows(rows, group_size)
+    for label, key_function in (('Correios', correios_cache_key), ('Jadlog', jadlog_cache_key)):
+        every_row = measure(label, df, key_function, quote_ms, planned=False)
+        planned = measure(label, df, key_function, quote_ms, planned=True)
+        pd.testing.assert_frame_equal(planned, every_row)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=600)
+    parser.add_argument('--group-size', type=int, default=3, help='Média de empresas por envio idêntico')
+    parser.add_argument('--quote-ms', type=float, default=5, help='Tempo simulado de uma cotação no site, em ms')
+    args = parser.parse_args()
+    run(args.rows, args.group_size, args.quote_ms)
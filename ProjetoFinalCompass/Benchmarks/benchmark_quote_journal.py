@@ -0,0 +1,45 @@
+'''Mede o custo por registro do QuoteJournal para diferentes tamanhos de lote de fsync e confere
+que o journal é lido de volta inteiro, inclusive com uma última linha incompleta.
+
+Uso (a partir da pasta ProjetoFinalCompass):
+
+    python Benchmarks/benchmark_quote_journal.py --records 5000 --fsync-every 1 10 50 200
+'''
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Utils.quote_journal import QuoteJournal
+
+
+def run(records: int, fsync_every_list: list):
+    with tempfile.TemporaryDirectory() as folder:
+        for fsync_every in fsync_every_list:
+            path = os.path.join(folder, f'quotes_{fsync_every}.jsonl')
+            start = time.perf_counter()
+            with QuoteJournal(path, fsync_every=fsync_every, fsync_interval=60) as journal:
+                for n in range(records):
+                    journal.record('jadlog', f'{n:014d}', f'jadlog|38182428|{n:08d}|10x20x30|1|.package', f'{n % 300},00')
+            elapsed = time.perf_counter() - start
+            print(f'fsync a cada {fsync_every:>4} registros  {elapsed / records * 1e6:8.1f} µs/registro')
+
+            # Simula uma queda no meio da escrita de uma linha
+            with open(path, 'a', encoding='utf-8') as file:
+                file.write('{"carrier": "jadlog", "cnpj": "0')
+            with QuoteJournal(path) as journal:
+                assert len(journal) == records, 'Journal não foi lido de volta inteiro'
+                journal.record('jadlog', 'novo', 'chave', '1,00')
+            with QuoteJournal(path) as journal:
+                assert journal.get('jadlog', 'novo', 'chave') == (True, '1,00'), 'Registro após a linha incompleta foi perdido'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=5000)
+    parser.add_argument('--fsync-every', type=int, nargs='+', default=[1, 10, 50, 200])
+    args = parser.parse_args()
+    run(args.records, args.fsync_every)
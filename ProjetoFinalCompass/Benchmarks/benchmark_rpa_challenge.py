@@ -0,0 +1,69 @@
+'''Compara o preenchimento do RPA Challenge campo a campo (fill_form_data, um find_element por campo)
+com o preenchimento em lotes por script (fill_form_data_batched), contra o stand-in local do site.
+Confere pelo stand-in que todas as linhas foram enviadas. Precisa do Chrome instalado.
+
+Uso (a partir da pasta ProjetoFinalCompass):
+
+    python Benchmarks/benchmark_rpa_challenge.py --rows 200 --batch-size 1 10 50
+'''
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+from selenium import webdriver
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Utils.rpa_challenge_form import FORM_FIELDS, access_website, fill_form_data, fill_form_data_batched
+from Benchmarks.helpers import NullLogger
+from tests.stub_servers import RpaChallengeStubHandler, StubServer
+
+
+def make_rows(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({column: [f"{column.lower()} {n}" for n in range(rows)] for column in FORM_FIELDS.values()})
+
+
+def create_driver(headless: bool):
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless=new')
+    return webdriver.Chrome(options=options)
+
+
+def measure(driver, url: str, label: str, fill, rows: int):
+    access_website(driver, url, NullLogger())
+    RpaChallengeStubHandler.submissions = []
+    start = time.perf_counter()
+    fill()
+    elapsed = time.perf_counter() - start
+    # sendBeacon é assíncrono, espera os últimos envios chegarem ao stand-in
+    deadline = time.monotonic() + 5
+    while len(RpaChallengeStubHandler.submissions) < rows and time.monotonic() < deadline:
+        time.sleep(0.05)
+    sent = len(RpaChallengeStubHandler.submissions)
+    print(f"{label:<22} {rows / elapsed:8.1f} linhas/s  {sent}/{rows} enviadas")
+
+
+def run(rows: int, batch_sizes: list, headless: bool):
+    logger = NullLogger()
+    df = make_rows(rows)
+    with StubServer(RpaChallengeStubHandler) as server:
+        driver = create_driver(headless)
+        try:
+            measure(driver, server.url, 'campo a campo', lambda: fill_form_data(driver, df, logger), rows)
+            for batch_size in batch_sizes:
+                measure(driver, server.url, f'script, lote de {batch_size}',
+                        lambda: fill_form_data_batched(driver, df, logger, batch_size), rows)
+        finally:
+            driver.quit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--show-browser', action='store_true', help='Abre o navegador com interface')
+    args = parser.parse_args()
+    run(args.rows, args.batch_size, not args.show_browser)
@@ -0,0 +1,108 @@
+'''Executa a divisão em shards e o merge localmente, com um processo por shard, e confere que a planilha
+final é igual à de uma execução única: mesmas linhas na mesma ordem, mesmas células destacadas e mesmos
+totais de calc_finish_task. As cotações são simuladas (valor derivado do CNPJ e uma espera por linha),
+então o teste não precisa de navegador nem de rede.
+
+Uso (a partir da pasta ProjetoFinalCompass):
+
+    python Benchmarks/benchmark_sharding.py --rows 2000 --shards 4 --row-ms 2
+'''
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Utils.functions_excel import iter_excel_chunks, read_output_dataframe, save_styled_output_to_excel
+from Utils.helper_functions import calc_finish_task
+from Utils.sharding import claim_shard_merge, clear_shard_outputs, merge_shard_outputs, save_shard_output, select_shard
+from Benchmarks.helpers import NullLogger, make_input_workbook
+
+
+def fake_quotes(df_output: pd.DataFrame, row_ms: float) -> pd.DataFrame:
+    '''Cotações determinísticas por CNPJ, com parte das linhas sem cotação, no lugar das etapas de navegador.'''
+    for index, cnpj in df_output['CNPJ'].items():
+        time.sleep(row_ms / 1000)
+        digest = int(hashlib.sha1(str(cnpj).encode('utf-8')).hexdigest(), 16)
+        if digest % 10 == 0:
+            df_output.at[index, 'STATUS'] = 'Falha cotação jadlog'
+        else:
+            df_output.at[index, 'VALOR COTAÇÃO JADLOG'] = f"R$ {digest % 9000 / 100 + 10:.2f}".replace('.', ',')
+        if digest % 7 == 0:
+            df_output.at[index, 'STATUS'] = 'Sem retorno dos correios'
+        else:
+            df_output.at[index, 'VALOR COTAÇÃO CORREIOS'] = f"R$ {digest % 8000 / 100 + 12:.2f}".replace('.', ',')
+            df_output.at[index, 'PRAZO DE ENTREGA CORREIOS'] = f"{digest % 9 + 1} dias úteis"
+    return df_output
+
+
+def run_shard(shard_index: int, shard_count: int, input_path: str, shard_path: str, output_path: str, row_ms: float):
+    '''O que cada runner faz no bot.py com SHARD_INDEX/SHARD_COUNT: processa o shard e, se for o último, faz o merge.'''
+    logger = NullLogger()
+    start = time.perf_counter()
+    df_output = select_shard(read_output_dataframe(input_path, logger), shard_index, shard_count, logger)
+    save_shard_output(shard_path, input_path, fake_quotes(df_output, row_ms), shard_index, shard_count, logger)
+    merged_file = None
+    if claim_shard_merge(shard_path, input_path, shard_count):
+        df_merged = merge_shard_outputs(shard_path, input_path, shard_count, logger)
+        merged_file = save_styled_output_to_excel(output_path, df_merged, logger, 'merge')
+        clear_shard_outputs(shard_path, input_path, shard_count)
+    return time.perf_counter() - start, merged_file
+
+
+def read_workbook(path: str):
+    '''Valores e coordenadas das células destacadas da planilha final.'''
+    df = pd.concat(iter_excel_chunks(path, 'Sheet1', na_values=()), ignore_index=True)
+    sheet = load_workbook(path)['Sheet1']
+    painted = sorted(cell.coordinate for row in sheet.iter_rows(min_row=2) for cell in row if cell.fill.fgColor.rgb not in (None, '00000000'))
+    return df, painted
+
+
+def run(rows: int, shards: int, row_ms: float):
+    logger = NullLogger()
+    with tempfile.TemporaryDirectory() as folder:
+        input_path = os.path.join(folder, 'Planilha de Entrada Grupos.xlsx')
+        make_input_workbook(input_path, rows, null_ratio=0.02)
+        shard_path = os.path.join(folder, 'Shards')
+
+        start = time.perf_counter()
+        df_single = fake_quotes(read_output_dataframe(input_path, logger), row_ms)
+        single_file = save_styled_output_to_excel(folder, df_single, logger, 'unica')
+        single_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=shards) as executor:
+            results = list(executor.map(run_shard, range(shards), [shards] * shards, [input_path] * shards,
+                                        [shard_path] * shards, [folder] * shards, [row_ms] * shards))
+        sharded_seconds = time.perf_counter() - start
+        merged_files = [merged_file for _, merged_file in results if merged_file]
+
+        print(f"execução única   {single_seconds:7.2f}s")
+        print(f"{shards} shards         {sharded_seconds:7.2f}s  (shard mais lento {max(seconds for seconds, _ in results):.2f}s)")
+        assert len(merged_files) == 1, f'Esperado um único merge, houve {len(merged_files)}'
+        assert not os.listdir(shard_path), 'Saídas dos shards não foram removidas após o merge'
+
+        df_expected, painted_expected = read_workbook(single_file)
+        df_merged, painted_merged = read_workbook(merged_files[0])
+        pd.testing.assert_frame_equal(df_merged, df_expected)
+        assert painted_merged == painted_expected, 'Células destacadas diferentes'
+        totals = calc_finish_task(df_merged)
+        assert totals == calc_finish_task(df_expected) == calc_finish_task(df_single), 'Totais diferentes'
+        print(f"planilha do merge igual à da execução única: {len(df_merged)} linhas, {len(painted_merged)} células destacadas, "
+              f"totais (linhas, cotadas, sem cotação) = {totals}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--row-ms', type=float, default=2, help='Espera simulada por linha cotada, em ms')
+    args = parser.parse_args()
+    run(args.rows, args.shards, args.row_ms)
@@ -0,0 +1,154 @@
+'''Utilitários compartilhados pelos scripts de benchmark.'''
+import functools
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from openpyxl import Workbook
+
+
+class NullLogger:
+    '''Logger mudo com a mesma interface do IntegratedLogger, para que o benchmark meça só o processamento.'''
+
+    def info(self, msg): pass
+    def debug(self, msg): pass
+    def warning(self, process_name): pass
+    def error(self, process_name): pass
+
+
+INPUT_SHEET_NAME = "Grupo 1 "
+INPUT_COLUMNS = [
+    "CNPJ", "VALOR DO PEDIDO", "DIMENSÕES CAIXA (altura x largura x comprimento cm)", "PESO DO PRODUTO",
+    "TIPO DE SERVIÇO JADLOG", "TIPO DE SERVIÇO CORREIOS",
+]
+JADLOG_SERVICES = ['JADLOG Package', 'JADLOG .Com', 'JADLOG Expresso', 'JADLOG Econômico']
+CORREIOS_SERVICES = ['PAC', 'SEDEX']
+
+
+def make_input_workbook(path: str, rows: int, extra_columns: int = 0, null_ratio: float = 0.0, seed: int = 42):
+    '''Gera uma "Planilha de Entrada Grupos.xlsx" sintética, na aba e com as colunas usadas pelo processo.
+
+    # Parâmetros
+
+        * extra_columns: `int`
+            Colunas de texto livre que não vão para a saída, para simular planilhas de clientes mais largas.
+
+        * null_ratio: `float`
+            Fração de células vazias nas colunas usadas pelas cotações.
+
+    '''
+    rng = np.random.default_rng(seed)
+    extra = [f"OBSERVAÇÃO {n}" for n in range(extra_columns)]
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(INPUT_SHEET_NAME)
+    sheet.append(INPUT_COLUMNS + extra)
+    for n in range(rows):
+        height, width, length = rng.integers(2, 40), rng.integers(10, 50), rng.integers(15, 60)
+        row = [
+            1000000000000 + n,
+            round(float(rng.uniform(50, 900)), 2),
+            f"{height} x {width} x {length}",
+            str(int(rng.integers(1, 20))),
+            JADLOG_SERVICES[n % len(JADLOG_SERVICES)],
+            CORREIOS_SERVICES[n % len(CORREIOS_SERVICES)],
+        ]
+        for column in range(1, len(row)):
+            if rng.random() < null_ratio:
+                row[column] = None
+        sheet.append(row + [f"texto livre da linha {n}" for _ in extra])
+    workbook.save(path)
+
+
+def current_rss_bytes():
+    '''Memória residente atual do processo (e dos filhos, como os navegadores, quando o psutil está instalado).'''
+    try:
+        import psutil
+        process = psutil.Process()
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+    except ImportError:
+        pass
+    if sys.platform.startswith('linux'):
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    return None
+
+
+class RssSampler:
+    '''Amostra a memória residente em uma thread de fundo, para calcular o pico em qualquer janela de tempo.'''
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = current_rss_bytes()
+            if rss is not None:
+                self.samples.append((time.time(), rss))
+            self._stop.wait(self.interval)
+
+    def peak_mb(self, start: float = float('-inf'), end: float = float('inf')):
+        values = [rss for moment, rss in self.samples if start <= moment <= end]
+        return round(max(values) / 2**20, 1) if values else None
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+class LatencyRecorder:
+    '''Mede a duração de cada chamada de funções por linha (consulta de CNPJ, cotação) por etapa.
+
+    `instrument` troca o atributo do módulo/classe por uma versão cronometrada e `restore` desfaz a troca.
+    '''
+
+    def __init__(self):
+        self.durations = {}
+        self._lock = threading.Lock()
+        self._patched = []
+
+    def instrument(self, stage: str, owner, name: str):
+        original = getattr(owner, name)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.durations.setdefault(stage, []).append(elapsed)
+
+        setattr(owner, name, timed)
+        self._patched.append((owner, name, original))
+
+    def add(self, stage: str, durations: list):
+        with self._lock:
+            self.durations.setdefault(stage, []).extend(durations)
+
+    def restore(self):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+    def summary(self, stage: str) -> dict:
+        durations = self.durations.get(stage)
+        if not durations:
+            return {'calls': 0, 'p50_ms': None, 'p95_ms': None}
+        p50, p95 = np.percentile(durations, [50, 95])
+        return {'calls': len(durations), 'p50_ms': round(p50 * 1000, 1), 'p95_ms': round(p95 * 1000, 1)}
@@ -1,12 +1,128 @@
-from botcity import maestro
+from __future__ import annotations
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
+import atexit
 from datetime import datetime
-from botcity.web import WebBot
 import traceback
 import sys
-from PIL import ImageGrab
-from .email_functions import send_error_email
+from typing import TYPE_CHECKING
+from .error_notifier import ErrorNotifier
+
+if TYPE_CHECKING:
+    # Só para as anotações de tipo; o botcity é importado por quem cria o bot e o maestro
+    from botcity import maestro
+    from botcity.web import WebBot
+
+
+class MaestroLogShipper:
+    '''Envia as entradas de log para o Maestro em uma thread de fundo, em lotes.
+    
+    As entradas ficam em uma fila limitada. A thread de envio espera a primeira entrada e junta
+    as seguintes até `batch_size` entradas ou `batch_interval` segundos, enviando o lote em seguida.
+    Com a fila cheia, entradas DEBUG/INFO são descartadas conforme `drop_policy` e entradas
+    WARNING/ERROR esperam até `block_timeout` segundos por espaço (backpressure) antes de descartar.
+    
+    # Atributos
+    
+        * maestro: `BotMaestroSDK`
+            Objeto maestro usado para enviar os logs.
+        
+        * activity_label: `str`
+            Label usado pelo Maestro para identificar qual a automação que está operando.
+        
+        * batch_size: `int`
+            Número máximo de entradas enviadas por lote.
+        
+        * batch_interval: `float`
+            Tempo máximo, em segundos, que uma entrada espera para completar o lote.
+        
+        * drop_policy: `str`
+            "oldest" descarta a entrada mais antiga da fila, "newest" descarta a entrada nova.
+        
+        * block_timeout: `float`
+            Tempo máximo, em segundos, que um WARNING/ERROR espera por espaço na fila.
+        
+        * dropped: `int`
+            Número de entradas descartadas.
+    
+    '''
+    _STOP = object()
+    BLOCKING_LEVELS = ('WARNING', 'ERROR')
+
+    def __init__(self, maestro:maestro.BotMaestroSDK, activity_label:str, batch_size:int=50, batch_interval:float=2.0,
+                 max_queue_size:int=10000, drop_policy:str='oldest', block_timeout:float=1.0):
+        self.maestro = maestro
+        self.activity_label = activity_label
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.send_errors = 0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(target=self._run, name='maestro-log-shipper', daemon=True)
+        self._thread.start()
+
+    def submit(self, values:dict):
+        '''Coloca uma entrada na fila de envio sem bloquear (exceto WARNING/ERROR com a fila cheia).'''
+        try:
+            if values.get('Level') in self.BLOCKING_LEVELS:
+                self._queue.put(values, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(values)
+            return
+        except queue.Full:
+            pass
+        if self.drop_policy == 'oldest':
+            try:
+                self._queue.get_nowait()
+                self._queue.put_nowait(values)
+            except (queue.Empty, queue.Full):
+                pass
+        self.dropped += 1
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is self._STOP:
+                return
+            batch = [entry]
+            deadline = time.monotonic() + self.batch_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is self._STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+            self._send(batch)
+            if stop:
+                return
+
+    def _send(self, batch:list):
+        for values in batch:
+            try:
+                self.maestro.new_log_entry(activity_label=self.activity_label, values=values)
+            except Exception:
+                self.send_errors += 1
+
+    def close(self, timeout:float=30):
+        '''Envia o que estiver na fila e finaliza a thread de envio.'''
+        if not self._thread.is_alive():
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
 
 class IntegratedLogger:
     '''Classe que integra logs locais e logs do botcity.
@@ -37,10 +153,22 @@ class IntegratedLogger:
         * datetime_file_format: `str`
             Formato de data e hora usado no nome de arquivos, já que alguns caracteres não são permitidos na hora de criar arquivos.
         
+        * log_shipper: `MaestroLogShipper`
+            Envia os logs ao Maestro em segundo plano, None quando não há Maestro.
+        
+        * error_notifier: `ErrorNotifier`
+            Captura de tela, registro no Maestro e e-mail de resumo dos erros, em segundo plano e sem repetir erros iguais.
+        
+    Os handlers de arquivo e de console também recebem as mensagens por fila (`QueueHandler`/`QueueListener`),
+    de forma que quem chama o logger nunca espera por I/O. Chame `close` (ou deixe o `atexit` chamar) para
+    garantir que tudo foi gravado e enviado.
+        
 
     
     '''
-    def __init__(self,maestro:maestro.BotMaestroSDK, filepath:os.PathLike, activity_label:str):
+    def __init__(self,maestro:maestro.BotMaestroSDK, filepath:os.PathLike, activity_label:str,
+                 log_batch_size:int=50, log_batch_interval:float=2.0, log_queue_size:int=10000,
+                 error_digest_interval:float=300, error_digest_max_attachments:int=5):
         self.maestro = maestro
         self.filepath = filepath
         self.image_filepath = filepath
@@ -49,7 +177,16 @@ class IntegratedLogger:
         self.client_logger = logging.getLogger('client_logger')
         self.datetime_format = '(%d-%m-%Y_%H:%M:%S)'
         self.datetime_file_format = '%d-%m-%Y_%H-%M-%S'
+        self.log_shipper = None
+        if maestro is not None:
+            self.log_shipper = MaestroLogShipper(maestro, activity_label, batch_size=log_batch_size,
+                                                 batch_interval=log_batch_interval, max_queue_size=log_queue_size)
+        self._listeners = []
         self.__inital_configs()
+        self.error_notifier = ErrorNotifier(maestro, self.image_filepath, digest_interval=error_digest_interval,
+                                            max_attachments=error_digest_max_attachments,
+                                            datetime_file_format=self.datetime_file_format)
+        atexit.register(self.close)
         
     
     def __inital_configs(self):
@@ -69,13 +206,44 @@ class IntegratedLogger:
         dev_logger_file_handler = logging.FileHandler(filename=os.path.join(self.filepath,f'devlog_{datetime.now().strftime(self.datetime_file_format)}.log'),mode='a',encoding='utf-8')
         dev_logger_file_handler.setLevel(logging.DEBUG)
         dev_logger_file_handler.setFormatter(logging.Formatter(fmt='%(asctime)s - %(levelname)s - %(message)s',datefmt=self.datetime_format))
-        self.dev_logger.handlers = [dev_logger_stream_handler,dev_logger_file_handler]
+        self.dev_logger.handlers = [self.__queue_handler(dev_logger_stream_handler,dev_logger_file_handler)]
         
         self.client_logger.setLevel(logging.INFO)
         client_logger_file_handler = logging.FileHandler(filename=os.path.join(self.filepath,f'log_{datetime.now().strftime(self.datetime_file_format)}.log'),mode='a',encoding='utf-8')
         client_logger_file_handler.setLevel(logging.INFO)
         client_logger_file_handler.setFormatter(logging.Formatter(fmt='%(asctime)s - %(levelname)s - %(message)s',datefmt=self.datetime_format))
-        self.client_logger.addHandler(client_logger_file_handler)
+        self.client_logger.handlers = [self.__queue_handler(client_logger_file_handler)]
+    
+    def __queue_handler(self, *handlers):
+        '''Cria um QueueHandler cujas mensagens são gravadas nos `handlers` por uma thread de fundo'''
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        self._listeners.append(listener)
+        return logging.handlers.QueueHandler(log_queue)
+    
+    def _ship(self, level:str, message):
+        '''Coloca uma entrada na fila de envio ao Maestro'''
+        if self.log_shipper is not None:
+            self.log_shipper.submit({
+                'Datetime':datetime.now().strftime(self.datetime_format),
+                'Level':level,
+                'Message':message
+            })
+    
+    def close(self):
+        '''Envia o resumo de erros e as entradas pendentes ao Maestro e grava as mensagens pendentes nos arquivos'''
+        self.error_notifier.close()
+        if self.log_shipper is not None:
+            self.log_shipper.close()
+            if self.log_shipper.dropped:
+                self.dev_logger.warning(f'{self.log_shipper.dropped} entradas de log não foram enviadas ao Maestro (fila cheia)')
+        for listener in self._listeners:
+            # stop() processa o que ainda está na fila antes de encerrar a thread
+            listener.stop()
+            for handler in listener.handlers:
+                handler.flush()
+        self._listeners = []
         
         
 
@@ -91,15 +259,7 @@ class IntegratedLogger:
         msg_list = msg.splitlines()
         list(map(lambda message:self.dev_logger.info(message),msg_list))
         list(map(lambda message:self.client_logger.info(message),msg_list))
-        if self.maestro is not None:
-            self.maestro.new_log_entry(
-                activity_label=self.activity_label,
-                values={
-                    'Datetime':datetime.now().strftime(self.datetime_format),
-                    'Level':'INFO',
-                    'Message':msg_list[-1]
-                }
-            )
+        self._ship('INFO',msg_list[-1])
 
     def debug(self,msg:str):
         '''Insere uma mensagem de level DEBUG no log.
@@ -112,18 +272,10 @@ class IntegratedLogger:
         '''
         msg_list = msg.splitlines()
         list(map(lambda message:self.dev_logger.debug(message),msg_list))
-        if self.maestro is not None:
-            self.maestro.new_log_entry(
-                activity_label=self.activity_label,
-                values={
-                    'Datetime':datetime.now().strftime(self.datetime_format),
-                    'Level':'DEBUG',
-                    'Message':msg_list[-1]
-                }
-            )
+        self._ship('DEBUG',msg_list[-1])
 
     def warning(self,process_name:str):
-        '''Insere uma mensagem de level WARNING no log e captura a tela, a mensagen é capturada automaticamente.
+        '''Insere uma mensagem de level WARNING no log e notifica o erro em segundo plano, a mensagem é capturada automaticamente.
         
         # Parâmetros
             
@@ -137,27 +289,12 @@ class IntegratedLogger:
         msg_reduced = traceback.format_exception_only(etype,value)
         list(map(lambda message:self.dev_logger.warning(message),msg_list))
         self.client_logger.warning(msg_reduced)
-        image_filepath = os.path.join(self.image_filepath,f'{datetime.now().strftime(self.datetime_file_format)}_RPA_{process_name}.jpg')
-        ImageGrab.grab().save(image_filepath)
-        send_error_email(process_name,msg_reduced,image_filepath)
-        if self.maestro is not None:
-            self.maestro.new_log_entry(
-                activity_label=self.activity_label,
-                values={
-                    'Datetime':datetime.now().strftime(self.datetime_format),
-                    'Level':'WARNING',
-                    'Message':msg_reduced
-                }
-            )
-            self.maestro.error(
-                task_id=self.maestro.get_execution().task_id,
-                exception=Exception(msg_reduced),
-                screenshot=image_filepath
-            )
+        self._ship('WARNING',msg_reduced)
+        self.error_notifier.report(process_name,msg_reduced)
         
 
     def error(self,process_name:str):
-        '''Insere uma mensagem de level ERROR no log e captura a tela, a mensagem é capturada automaticamente.
+        '''Insere uma mensagem de level ERROR no log e notifica o erro em segundo plano, a mensagem é capturada automaticamente.
         
         # Parâmetros
             
@@ -170,20 +307,5 @@ class IntegratedLogger:
         msg_reduced = traceback.format_exception_only(etype,value)
         list(map(lambda message:self.dev_logger.error(message),msg_list))
         self.client_logger.error(msg_reduced)
-        image_filepath = os.path.join(self.image_filepath,f'{datetime.now().strftime(self.datetime_file_format)}_RPA_{process_name}.jpg')
-        ImageGrab.grab().save(image_filepath)
-        send_error_email(process_name,msg_reduced,image_filepath)
-        if self.maestro is not None:
-            self.maestro.new_log_entry(
-                activity_label=self.activity_label,
-                values={
-                    'Datetime':datetime.now().strftime(self.datetime_format),
-                    'Level':'INFO',
-                    'Message':msg_reduced
-                }
-            )
-            self.maestro.error(
-                task_id=self.maestro.get_execution().task_id,
-                exception=Exception(msg_reduced),
-                screenshot=image_filepath
-            )
\ No newline at end of file
+        self._ship('ERROR',msg_reduced)
+        self.error_notifier.report(process_name,msg_reduced)
\ No newline at end of file
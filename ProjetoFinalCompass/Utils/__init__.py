@@ -1,8 +1,69 @@
-from .scriptProcessos import catchJadlogPrice
-from .helper_functions import *
+'''Funções e classes do processo, carregadas sob demanda (PEP 562).
+
+Importar o pacote não importa selenium, botcity, pandas nem openpyxl: cada submódulo só é
+carregado no primeiro acesso a um dos nomes que ele exporta (`from Utils import ResultStore`,
+`Utils.catchJadlogPrice`, `from Utils import *`).
+
+Nenhum nome exportado é também o nome de um submódulo: importar um submódulo grava o módulo como
+atributo do pacote e esconderia a função ou a classe. Por isso o IntegratedLogger, leve, é
+reexportado aqui diretamente, e a função rpa_challenge fica no submódulo rpa_challenge_form.
+'''
+import importlib
+
 from .IntegratedLogger import IntegratedLogger
-from .functions_excel import *
-from .rpa_challenge import *
-from .interactions_dataframe_correios import *
-from .api_brasil import *
-from .email_functions import send_emails, send_error_email
\ No newline at end of file
+
+# Submódulo de cada nome exportado pelo pacote
+_EXPORTS = {
+    'scriptProcessos': ['catchJadlogPrice'],
+    'helper_functions': ['get_jadlog_value', 'calc_finish_task'],
+    'functions_excel': [
+        'GREEN_FILL', 'OUTPUT_COLUMNS', 'INPUT_SHEET_NAME', 'DEFAULT_NA_VALUES', 'open_excel_file_to_dataframe', 'create_output_dataframe',
+        'normalize_cnpj_column', 'iter_excel_chunks', 'read_output_dataframe', 'save_df_output_to_excel',
+        'build_output_file_path', 'parse_brl_values', 'cheaper_quotation_masks', 'save_styled_output_to_excel',
+        'null_fields_messages', 'clean_df_if_null', 'write_if_null_output', 'compare_quotation', 'make_endereco',
+        'make_jadlog_correios_dataframes',
+    ],
+    'rpa_challenge_form': [
+        'access_website', 'start_challenge', 'capture_form_xpaths', 'fill_form_data', 'FORM_FIELDS', 'FILL_ROWS_JS',
+        'form_rows', 'fill_form_data_batched', 'failed_rows_results', 'capture_execution_time', 'take_success_screenshot',
+        'initialize_browser', 'close_browser', 'rpa_challenge',
+    ],
+    'interactions_dataframe_correios': ['interaction_df_correios', 'quote_correios_row'],
+    'api_brasil': [
+        'BRASILAPI_HEADERS', 'read_excel_data', 'normalize_cnpj', 'open_cnpj_cache', 'create_brasilapi_session',
+        'query_brasilapi', 'create_brasilapi_limiter', 'query_brasilapi_concurrent', 'create_companies_dataframe',
+        'save_dataframe_to_csv', 'join_and_transform', 'api_data_lookup',
+    ],
+    'email_functions': ['send_emails', 'send_error_email'],
+    'browser_pool': ['BrowserWorkerPool', 'create_web_bot', 'stop_browser_quietly'],
+    'result_store': ['ResultStore'],
+    'quote_cache': ['open_quote_cache', 'correios_cache_key', 'jadlog_cache_key'],
+    'quote_plan': ['QuotePlan'],
+    'stage_scheduler': ['StageScheduler'],
+    'checkpoint': ['CheckpointStore'],
+    'quote_journal': ['QuoteJournal'],
+    'rate_limiter': ['AdaptiveRateLimiter'],
+    'batch_runner': ['SharedResources', 'WatchFolderRunner', 'FileStatus'],
+    'sharding': [
+        'shard_of_cnpj', 'shard_assignments', 'select_shard', 'shard_file_path', 'save_shard_output', 'missing_shards',
+        'claim_shard_merge', 'release_shard_merge', 'merge_shard_outputs', 'clear_shard_outputs',
+    ],
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = ['IntegratedLogger'] + list(_MODULE_OF)
+
+
+def __getattr__(name):
+    module_name = _MODULE_OF.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f'.{module_name}', __name__)
+    # Publica todos os nomes do submódulo de uma vez
+    for exported in _EXPORTS[module_name]:
+        globals()[exported] = getattr(module, exported)
+    return globals()[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,13 +1,22 @@
 import pandas as pd
 import requests
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from requests.adapters import HTTPAdapter
 from Utils.IntegratedLogger import IntegratedLogger
+from Utils.persistent_cache import PersistentCache
+from Utils.rate_limiter import AdaptiveRateLimiter, RETRYABLE_STATUS
 from config import vars_map
 from time import sleep
 
 # Define o diretório para o arquivo de log
 log_directory = vars_map['BASE_LOG_PATH']
 
+BRASILAPI_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
 # Cria o diretório se ele não existir
 #os.makedirs(log_directory, exist_ok=True)
 
@@ -41,20 +50,130 @@ def read_excel_data(excel_file_path: str, logger:IntegratedLogger) -> list:
         return
 
 
-def query_brasilapi(cnpj: str,logger:IntegratedLogger) -> tuple:  # Retorna uma tupla com dados e status
-    """Consulta a API BrasilAPI para obter informações de CNPJ."""
+def normalize_cnpj(cnpj) -> str:
+    """Normaliza um CNPJ para 14 dígitos, sem pontuação."""
+    digits = ''.join(char for char in str(cnpj).strip() if char.isdigit())
+    return digits.zfill(14)
+
+
+def open_cnpj_cache() -> PersistentCache:
+    """Abre o cache em disco das respostas da BrasilAPI com as configurações do `vars_map`."""
+    return PersistentCache(
+        filepath=os.path.join(vars_map['DEFAULT_CACHE_PATH'], 'cnpj_cache.sqlite'),
+        table='brasilapi_cnpj',
+        ttl=vars_map['CNPJ_CACHE_TTL_HOURS'] * 3600,
+        negative_ttl=vars_map['CNPJ_CACHE_NEGATIVE_TTL_HOURS'] * 3600,
+        max_entries=vars_map['CNPJ_CACHE_MAX_ENTRIES']
+    )
+
+
+def create_brasilapi_session(pool_size: int) -> requests.Session:
+    """Cria uma sessão HTTP keep-alive, com pool de conexões, para ser compartilhada entre as consultas."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(BRASILAPI_HEADERS)
+    return session
+
+
+def query_brasilapi(cnpj: str,logger:IntegratedLogger,session:requests.Session=None,cache:PersistentCache=None,
+                    limiter:AdaptiveRateLimiter=None) -> tuple:  # Retorna uma tupla com dados e status
+    """Consulta a API BrasilAPI para obter informações de CNPJ.
+
+    Quando `session` é informada a conexão TCP/TLS é reaproveitada entre as chamadas.
+    Quando `cache` é informado a rede só é consultada para CNPJs ausentes ou vencidos no cache,
+    e respostas 404 são guardadas como entradas negativas.
+    Quando `limiter` é informado as requisições respeitam a taxa e a concorrência dele, e respostas
+    429/5xx e erros de rede são repetidos enquanto houver tentativas no orçamento do limitador.
+    """
+    cache_key = normalize_cnpj(cnpj)
+    if cache is not None:
+        found, company_data = cache.get(cache_key)
+        if found:
+            logger.debug(f"CNPJ {cnpj} obtido do cache")
+            return (company_data, "Sucesso") if company_data is not None else (None, "falha")
+
     url = f"{vars_map['DEFAULT_BRASILAPI_URL']}{cnpj}"
-    try:
-        logger.info(f"Consultando API BrasilAPI para CNPJ: {cnpj}")
-        headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            }
-        response = requests.get(url=url,headers=headers,timeout=10)
-        response.raise_for_status()
-        return response.json(), "Sucesso"  # Retorna dados e status "sucesso"
-    except requests.exceptions.RequestException as e:
-        logger.info(f"Erro ao consultar CNPJ {cnpj}")
-        return None, "falha"  # Retorna None e status "falha"
+    http = session if session is not None else requests
+    attempt = 0
+    while True:
+        try:
+            logger.info(f"Consultando API BrasilAPI para CNPJ: {cnpj}")
+            if limiter is None:
+                response = http.get(url=url,headers=BRASILAPI_HEADERS,timeout=10)
+            else:
+                with limiter.slot():
+                    response = http.get(url=url,headers=BRASILAPI_HEADERS,timeout=10)
+                limiter.record(response.status_code, response.headers.get('Retry-After'))
+            response.raise_for_status()
+            company_data = response.json()
+            if cache is not None:
+                cache.set(cache_key, company_data)
+            return company_data, "Sucesso"  # Retorna dados e status "sucesso"
+        except requests.exceptions.RequestException as e:
+            status_code = getattr(e.response, 'status_code', None)
+            transient = status_code in RETRYABLE_STATUS or isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+            if limiter is not None and transient:
+                if e.response is None:
+                    limiter.record(None)
+                attempt += 1
+                delay = limiter.retry_delay(attempt, getattr(e.response, 'headers', {}).get('Retry-After'))
+                if delay is not None:
+                    logger.debug(f"Nova tentativa {attempt} do CNPJ {cnpj} em {delay:.1f}s ({status_code or type(e).__name__})")
+                    sleep(delay)
+                    continue
+            logger.info(f"Erro ao consultar CNPJ {cnpj}")
+            if cache is not None and status_code == 404:
+                cache.set_negative(cache_key)
+            return None, "falha"  # Retorna None e status "falha"
+
+
+def create_brasilapi_limiter(request_count: int, max_workers: int) -> AdaptiveRateLimiter:
+    """Cria o limitador de taxa da BrasilAPI com as configurações do `vars_map`.
+
+    BRASILAPI_RATE_PER_SECOND é a taxa inicial; sem 429/503 ela sobe até BRASILAPI_MAX_RATE_PER_SECOND
+    (0 para sem teto). O orçamento de novas tentativas é proporcional ao número de consultas da etapa.
+    """
+    return AdaptiveRateLimiter(
+        rate=vars_map['BRASILAPI_RATE_PER_SECOND'],
+        max_rate=vars_map['BRASILAPI_MAX_RATE_PER_SECOND'],
+        burst=vars_map['BRASILAPI_BURST'],
+        max_concurrency=max_workers,
+        max_retries=vars_map['BRASILAPI_MAX_RETRIES'],
+        retry_budget=max(10, int(request_count * vars_map['BRASILAPI_RETRY_BUDGET_RATIO'])),
+        backoff_base=vars_map['BRASILAPI_BACKOFF_BASE_SECONDS'],
+        backoff_max=vars_map['BRASILAPI_BACKOFF_MAX_SECONDS']
+    )
+
+
+def query_brasilapi_concurrent(cnpj_list: list, logger:IntegratedLogger, max_workers: int, cache:PersistentCache=None,
+                               limiter:AdaptiveRateLimiter=None, session:requests.Session=None) -> list:
+    """Consulta uma lista de CNPJs em paralelo, com número limitado de workers e uma única sessão HTTP.
+
+    Args:
+        cnpj_list (list): CNPJs a serem consultados.
+        logger (IntegratedLogger): Logger usado para gerar arquivos de log.
+        max_workers (int): Número máximo de consultas simultâneas.
+        cache (PersistentCache): Cache opcional das respostas da API.
+        limiter (AdaptiveRateLimiter): Limitador de taxa, por padrão criado com as configurações do `vars_map`.
+        session (requests.Session): Sessão HTTP compartilhada opcional, que não é fechada ao final;
+            por padrão uma sessão é criada e fechada nesta chamada.
+
+    Returns:
+        list: Registros `{'data': ..., 'status': ...}` na mesma ordem de `cnpj_list`.
+    """
+    max_workers = max(1, int(max_workers))
+    if limiter is None:
+        limiter = create_brasilapi_limiter(len(cnpj_list), max_workers)
+    logger.info(f"Consultando {len(cnpj_list)} CNPJs com {max_workers} workers.")
+    with (nullcontext(session) if session is not None else create_brasilapi_session(max_workers)) as session, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # executor.map devolve os resultados na ordem de entrada
+        results = executor.map(lambda cnpj: query_brasilapi(cnpj, logger, session, cache, limiter), cnpj_list)
+        results = [{'data': company_data, 'status': status} for company_data, status in results]
+    limiter.log_stats(logger, 'BrasilAPI')
+    return results
 
 def create_companies_dataframe(companies_data: list,logger:IntegratedLogger) -> pd.DataFrame:
     """Cria um DataFrame Pandas com os dados das empresas."""
@@ -176,31 +295,33 @@ def join_and_transform(excel_df, api_df):
         print(f"Erro ao processar os dados: {e}")
 
 
-def api_data_lookup(df_output:pd.DataFrame,logger:IntegratedLogger):
-    """Função principal do programa."""
-    logger.info("Iniciando busca de dados no site Brasil API.")
-    
-    excel_file_path = os.path.join(vars_map['DEFAULT_PROCESSAR_PATH'],'Planilha de Entrada Grupos.xlsx')
-    # excel_final_file_path = r"C:\RPA\RPA_Valor_de_Cotacao\ProjetoFinalCompass\Processar\cnpj_2025-02-24_12h16m30s.xlsx"
-    # csv_file_path = r"C:\RPA\RPA_Valor_de_Cotacao\ProjetoFinalCompass\Processados\dados_processados.csv"
-    # output_excel = "C:/RPA/RPA_Valor_de_Cotacao/ProjetoFinalCompass/Processar/dados_completos.xlsx"
+def api_data_lookup(df_output:pd.DataFrame,logger:IntegratedLogger,session:requests.Session=None,cache:PersistentCache=None,
+                    limiter:AdaptiveRateLimiter=None):
+    """Consulta na BrasilAPI os CNPJs do df_output e marca no STATUS os que não tiveram retorno.
 
+    No modo em lote `session`, `cache` e `limiter` são compartilhados entre as planilhas processadas ao
+    mesmo tempo e não são fechados aqui; por padrão são criados para esta chamada.
+    """
+    logger.info("Iniciando busca de dados no site Brasil API.")
     
-    cnpj_list = read_excel_data(excel_file_path,logger)
+    # Os CNPJs vêm do df_output, já normalizados na leitura da planilha de entrada
+    cnpj_list = [normalize_cnpj(cnpj) for cnpj in df_output['CNPJ'].dropna().unique()]
+    logger.info(f"{len(cnpj_list)} CNPJs distintos para consulta")
+    companies_df = None
     if cnpj_list:
-        companies_data = []
-        missing_cnpjs = []
-        for cnpj in cnpj_list:
-            company_data, status = query_brasilapi(cnpj,logger)  # Recebe dados e status
-            companies_data.append({'data': company_data, 'status': status})
-            if status == 'falha':
-                missing_cnpjs.append(cnpj)
+        if limiter is not None:
+            limiter.add_retry_budget(len(cnpj_list) * vars_map['BRASILAPI_RETRY_BUDGET_RATIO'])
+        with (nullcontext(cache) if cache is not None else open_cnpj_cache()) as cnpj_cache:
+            companies_data = query_brasilapi_concurrent(cnpj_list, logger, vars_map['BRASILAPI_MAX_WORKERS'], cnpj_cache,
+                                                        limiter, session)
+            cnpj_cache.log_stats(logger, 'BrasilAPI')
+        missing_cnpjs = [cnpj for cnpj, item in zip(cnpj_list, companies_data) if item['status'] == 'falha']
         companies_df = create_companies_dataframe(companies_data,logger)
         if companies_df is not None:
             logger.info("Identificando CNPJs ausentes na API.")
-            missing_cnpjs_api = [cnpj for cnpj in cnpj_list if cnpj not in companies_df["CNPJ"].tolist()]
-            for cnpj in missing_cnpjs:
-                df_output.loc[df_output['CNPJ'] == cnpj, 'STATUS'] = 'Sem retorno da API'
+            found_cnpjs = set(companies_df["CNPJ"])
+            missing_cnpjs_api = [cnpj for cnpj in cnpj_list if cnpj not in found_cnpjs]
+            df_output.loc[df_output['CNPJ'].isin(missing_cnpjs), 'STATUS'] = 'Sem retorno da API'
             logger.info(f"CNPJs não encontrados na API: {missing_cnpjs_api}")
             #save_dataframe_to_csv(companies_df, csv_file_path)
 
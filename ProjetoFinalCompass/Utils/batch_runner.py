@@ -0,0 +1,248 @@
+import csv
+import glob
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from config import vars_map
+from Utils.IntegratedLogger import IntegratedLogger
+from Utils.api_brasil import create_brasilapi_limiter, create_brasilapi_session, open_cnpj_cache
+from Utils.browser_pool import BrowserWorkerPool
+from Utils.helper_functions import calc_finish_task
+from Utils.quote_cache import open_quote_cache
+
+
+FileStatus = namedtuple('FileStatus', ['file', 'status', 'total', 'finished', 'errors', 'output_file', 'started_at', 'seconds', 'message'])
+
+# Cabeçalho do resumo por arquivo gravado em Processados
+SUMMARY_COLUMNS = ['ARQUIVO', 'STATUS', 'LINHAS', 'COTADAS', 'SEM COTAÇÃO', 'ARQUIVO DE SAÍDA', 'INÍCIO', 'DURAÇÃO (s)', 'MENSAGEM']
+SUMMARY_FILE_NAME = 'resumo_lote.csv'
+FAILED_FOLDER_NAME = 'Falhas'
+
+
+class SharedResources:
+    '''Recursos compartilhados entre as planilhas processadas ao mesmo tempo no modo em lote.
+
+    Os navegadores dos pools só são abertos no primeiro item de cada worker, a sessão HTTP e o
+    limitador da BrasilAPI valem para todas as consultas (o limite de taxa é da API, não da planilha)
+    e os caches em disco ficam abertos durante todo o lote.
+
+    # Atributos
+
+        * correios_pool, jadlog_pool: `BrowserWorkerPool`
+            Pools de navegadores, com BROWSER_WORKERS workers cada.
+
+        * brasilapi_session: `requests.Session`
+            Sessão keep-alive da BrasilAPI.
+
+        * brasilapi_limiter: `AdaptiveRateLimiter`
+            Limitador de taxa da BrasilAPI; o orçamento de novas tentativas cresce a cada planilha.
+
+        * cnpj_cache, quote_cache: `PersistentCache`
+            Caches de CNPJs e de cotações; `quote_cache` é None sem QUOTE_CACHE_ENABLED.
+
+    # Exemplo
+
+        with SharedResources(logger) as shared:
+            process_workbook(input_path, logger, shared)
+
+    '''
+
+    def __init__(self, logger:IntegratedLogger):
+        self.logger = logger
+        workers = max(1, vars_map['BROWSER_WORKERS'])
+        max_workers = vars_map['BRASILAPI_MAX_WORKERS']
+        self.correios_pool = BrowserWorkerPool(workers, logger)
+        self.jadlog_pool = BrowserWorkerPool(workers, logger)
+        # Várias planilhas consultam a API ao mesmo tempo, o pool de conexões acompanha o número de arquivos
+        self.brasilapi_session = create_brasilapi_session(max_workers * max(1, vars_map['BATCH_MAX_FILES']))
+        self.brasilapi_limiter = create_brasilapi_limiter(0, max_workers)
+        self.cnpj_cache = open_cnpj_cache()
+        self.quote_cache = open_quote_cache() if vars_map['QUOTE_CACHE_ENABLED'] else None
+
+    def start(self):
+        self.correios_pool.start()
+        self.jadlog_pool.start()
+        return self
+
+    def close(self):
+        '''Fecha os navegadores, a sessão HTTP e os caches, registrando as métricas acumuladas do lote.'''
+        self.correios_pool.shutdown()
+        self.jadlog_pool.shutdown()
+        self.brasilapi_session.close()
+        self.brasilapi_limiter.log_stats(self.logger, 'BrasilAPI (lote)')
+        self.cnpj_cache.log_stats(self.logger, 'BrasilAPI (lote)')
+        self.cnpj_cache.close()
+        if self.quote_cache is not None:
+            self.quote_cache.log_stats(self.logger, 'cotações (lote)')
+            self.quote_cache.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _unique_destination(folder:str, file_name:str) -> str:
+    '''Caminho em `folder` para `file_name`, com data e hora no nome caso o arquivo já exista.'''
+    destination = os.path.join(folder, file_name)
+    if os.path.exists(destination):
+        stem, extension = os.path.splitext(file_name)
+        destination = os.path.join(folder, f"{stem}_{time.strftime('%Y-%m-%d_%Hh%Mm%Ss')}{extension}")
+    return destination
+
+
+class WatchFolderRunner:
+    '''Observa a pasta de entrada e processa as planilhas que chegarem, várias ao mesmo tempo.
+
+    Cada planilha é processada por `process_file(input_path)`, que devolve `(df_output, output_file)`.
+    Ao terminar a planilha de entrada é movida para a pasta de processados (para `Falhas` dentro dela,
+    caso o processamento falhe) e uma linha é acrescentada ao resumo `resumo_lote.csv` da mesma pasta.
+
+    Um arquivo só é processado depois de estar com tamanho e data de modificação estáveis por um ciclo
+    de verificação, para não ler planilhas que ainda estão sendo copiadas. Arquivos temporários do
+    Excel (`~$...`) são ignorados.
+
+    # Atributos
+
+        * process_file: `Callable[[str], tuple]`
+            Função que processa uma planilha.
+
+        * input_path, processed_path: `str`
+            Pastas Processar e Processados.
+
+        * logger: `IntegratedLogger`
+            Logger do processo.
+
+        * max_files: `int`
+            Número máximo de planilhas processadas ao mesmo tempo.
+
+        * poll_interval: `float`
+            Intervalo, em segundos, entre as verificações da pasta de entrada.
+
+        * stop_when_idle: `bool`
+            Encerra quando não houver planilhas em processamento nem na pasta de entrada.
+
+    '''
+
+    def __init__(self, process_file, input_path:str, processed_path:str, logger:IntegratedLogger, max_files:int=2,
+                 poll_interval:float=10, stop_when_idle:bool=False, pattern:str='*.xlsx'):
+        self.process_file = process_file
+        self.input_path = input_path
+        self.processed_path = processed_path
+        self.logger = logger
+        self.max_files = max(1, int(max_files))
+        self.poll_interval = poll_interval
+        self.stop_when_idle = stop_when_idle
+        self.pattern = pattern
+        self.summary_path = os.path.join(processed_path, SUMMARY_FILE_NAME)
+        self.statuses = []
+        self._seen = {}
+        self._running = {}
+        self._summary_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def stop(self):
+        '''Pede o encerramento: nenhuma planilha nova é iniciada e as em andamento são concluídas.'''
+        self._stop.set()
+
+    def pending_files(self) -> list:
+        '''Planilhas prontas na pasta de entrada que ainda não estão em processamento, das mais antigas às mais novas.'''
+        ready = []
+        now = time.time()
+        observed = {}
+        for path in glob.glob(os.path.join(self.input_path, self.pattern)):
+            if os.path.basename(path).startswith('~$') or path in self._running:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature = (stat.st_size, stat.st_mtime)
+            observed[path] = signature
+            if self._seen.get(path) == signature or now - stat.st_mtime >= self.poll_interval:
+                ready.append((stat.st_mtime, path))
+        self._seen = observed
+        return [path for _, path in sorted(ready)]
+
+    def run(self) -> list:
+        '''Executa até `stop()`, uma interrupção (Ctrl+C) ou, com `stop_when_idle`, até a pasta ficar vazia.
+
+        # Retorno
+
+            Lista de `FileStatus` das planilhas processadas.
+        '''
+        os.makedirs(self.processed_path, exist_ok=True)
+        self.logger.info(f"Modo em lote observando {self.input_path}, até {self.max_files} planilhas ao mesmo tempo.")
+        with ThreadPoolExecutor(max_workers=self.max_files, thread_name_prefix='batch-file') as executor:
+            try:
+                while not self._stop.is_set():
+                    free_slots = self.max_files - len(self._running)
+                    pending = self.pending_files()
+                    for path in pending[:free_slots]:
+                        self.logger.info(f"Planilha {os.path.basename(path)} adicionada ao lote.")
+                        self._running[path] = executor.submit(self._process, path)
+                    # _seen também tem os arquivos ainda sendo copiados, que não entram em pending
+                    if self.stop_when_idle and not self._running and not self._seen:
+                        break
+                    if self._running:
+                        done, _ = wait(self._running.values(), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                        self._running = {path: future for path, future in self._running.items() if future not in done}
+                    else:
+                        self._stop.wait(self.poll_interval)
+            except KeyboardInterrupt:
+                self.logger.info("Interrupção recebida, aguardando as planilhas em processamento.")
+            wait(self._running.values())
+            self._running = {}
+        self.log_summary()
+        return self.statuses
+
+    def _process(self, input_path:str) -> FileStatus:
+        file_name = os.path.basename(input_path)
+        started_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        start = time.perf_counter()
+        self.logger.info(f"Iniciando a planilha {file_name}")
+        try:
+            df_output, output_file = self.process_file(input_path)
+            total, finished, errors = calc_finish_task(df_output)
+            destination = self.processed_path
+            status = FileStatus(file_name, 'Sucesso', total, finished, errors, output_file, started_at, 0, '')
+        except Exception as err:
+            self.logger.error(f'Processamento em lote da planilha {file_name}')
+            destination = os.path.join(self.processed_path, FAILED_FOLDER_NAME)
+            status = FileStatus(file_name, 'Falha', 0, 0, 0, None, started_at, 0, str(err))
+        try:
+            os.makedirs(destination, exist_ok=True)
+            shutil.move(input_path, _unique_destination(destination, file_name))
+        except OSError as err:
+            # Sem mover, a planilha seria processada de novo no próximo ciclo
+            self.logger.error(f'Movendo a planilha {file_name} para {destination}')
+            self.stop()
+            status = status._replace(message=f"{status.message} Não foi possível mover a entrada: {err}".strip())
+        status = status._replace(seconds=round(time.perf_counter() - start, 1))
+        self._record(status)
+        self.logger.info(f"Planilha {file_name} finalizada: {status.status}, {status.finished}/{status.total} linhas cotadas em {status.seconds}s.")
+        return status
+
+    def _record(self, status:FileStatus):
+        '''Acrescenta a linha da planilha ao resumo em CSV.'''
+        with self._summary_lock:
+            self.statuses.append(status)
+            new_file = not os.path.exists(self.summary_path)
+            with open(self.summary_path, 'a', newline='', encoding='utf-8-sig') as summary_file:
+                writer = csv.writer(summary_file, delimiter=';')
+                if new_file:
+                    writer.writerow(SUMMARY_COLUMNS)
+                writer.writerow(status)
+
+    def log_summary(self):
+        '''Registra no log o total do lote.'''
+        succeeded = sum(status.status == 'Sucesso' for status in self.statuses)
+        self.logger.info(
+            f"Lote finalizado: {len(self.statuses)} planilhas, {succeeded} com sucesso, {len(self.statuses) - succeeded} com falha, "
+            f"{sum(status.finished for status in self.statuses)} linhas cotadas. Resumo em {self.summary_path}"
+        )
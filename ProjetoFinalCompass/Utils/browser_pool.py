@@ -0,0 +1,210 @@
+from __future__ import annotations
+import queue
+import threading
+import time
+from collections import namedtuple
+from typing import TYPE_CHECKING
+
+from config import vars_map
+from Utils.IntegratedLogger import IntegratedLogger
+
+if TYPE_CHECKING:
+    # Só para as anotações de tipo; o botcity é importado por quem cria o navegador
+    from botcity.web import WebBot, By
+
+
+WorkerResult = namedtuple('WorkerResult', ['key', 'value', 'error'])
+
+
+def create_web_bot(headless:bool=None) -> WebBot:
+    '''Cria um WebBot independente, com a mesma configuração do bot padrão.
+
+    # Parâmetros
+
+        * headless: `bool`
+            Executa o navegador sem interface, por padrão usa BROWSER_HEADLESS.
+
+    '''
+    from botcity.web import WebBot, Browser
+    bot = WebBot()
+    bot.headless = vars_map['BROWSER_HEADLESS'] if headless is None else headless
+    bot.browser = Browser.CHROME
+    bot.driver_path = vars_map['DEFAULT_DRIVER_PATH']
+    return bot
+
+
+def ensure_page(bot:WebBot, url:str, selector:str, by:By=None):
+    '''Abre `url` caso o navegador esteja fechado ou a página atual não tenha o elemento `selector`.'''
+    if by is None:
+        from botcity.web import By
+        by = By.CSS_SELECTOR
+    if bot.driver is None or bot.find_element(selector, by, waiting_time=0) is None:
+        bot.browse(url)
+
+
+def is_browser_alive(bot:WebBot) -> bool:
+    '''Verifica se o navegador do bot ainda responde. Um bot que ainda não abriu o navegador é considerado vivo.'''
+    if bot.driver is None:
+        return True
+    try:
+        bot.driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def stop_browser_quietly(bot:WebBot):
+    '''Encerra o navegador do bot, ignorando erros caso ele já tenha sido fechado.'''
+    if bot is None or bot.driver is None:
+        return
+    try:
+        bot.stop_browser()
+    except Exception:
+        bot._driver = None
+
+
+class _Batch:
+    '''Agrupa os resultados de uma chamada de `BrowserWorkerPool.map`.'''
+
+    def __init__(self, size:int):
+        self.results = [None] * size
+        self._pending = size
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        if size == 0:
+            self._done.set()
+
+    def set(self, position:int, result:WorkerResult):
+        with self._lock:
+            self.results[position] = result
+            self._pending -= 1
+            if self._pending == 0:
+                self._done.set()
+
+    def wait(self, timeout:float=None, alive=None):
+        '''Aguarda todos os itens, por no máximo `timeout` segundos.
+
+        # Raises
+
+            TimeoutError: Se os itens não terminarem dentro de `timeout`.
+            RuntimeError: Se `alive()` indicar que não há mais workers para processar os itens.
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._done.wait(1 if deadline is None else max(0, min(1, deadline - time.monotonic()))):
+            if alive is not None and not alive():
+                raise RuntimeError(f"Nenhum worker ativo, {self._pending} itens não processados")
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"{self._pending} itens não processados em {timeout:g}s")
+
+
+class BrowserWorkerPool:
+    '''Pool de navegadores independentes que consomem itens de uma fila compartilhada.
+
+    Cada worker é uma thread com o seu próprio WebBot. Uma falha em um item é registrada
+    apenas no resultado daquele item; se o navegador do worker deixar de responder ele é
+    substituído por um novo, sem interromper os demais workers. Se o navegador não puder ser
+    aberto, o item recebe o erro e o worker tenta abrir outro navegador no item seguinte.
+
+    # Atributos
+
+        * size: `int`
+            Número de workers (navegadores) do pool.
+
+        * logger: `IntegratedLogger`
+            Logger usado para registrar falhas e substituições de navegador.
+
+        * bot_factory: `Callable[[], WebBot]`
+            Função que cria um novo WebBot, por padrão `create_web_bot`.
+
+        * timeout: `float`
+            Tempo máximo, em segundos, de uma chamada de `map`; por padrão BROWSER_POOL_TIMEOUT_SECONDS.
+
+    # Exemplo
+
+        with BrowserWorkerPool(4, logger) as pool:
+            results = pool.map(quote_row, rows, key=lambda row: row['CNPJ'])
+
+    '''
+
+    def __init__(self, size:int, logger:IntegratedLogger, bot_factory=create_web_bot, timeout:float=None):
+        self.size = max(1, int(size))
+        self.logger = logger
+        self.bot_factory = bot_factory
+        self.timeout = vars_map['BROWSER_POOL_TIMEOUT_SECONDS'] if timeout is None else timeout
+        self._jobs = queue.Queue()
+        self._threads = []
+
+    def start(self):
+        '''Inicia as threads dos workers. Os navegadores só são abertos no primeiro item de cada worker.'''
+        for worker_id in range(self.size):
+            thread = threading.Thread(target=self._worker_loop, args=(worker_id,), name=f'browser-worker-{worker_id}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.logger.info(f"Pool de navegadores iniciado com {self.size} workers.")
+        return self
+
+    def map(self, task, items:list, key) -> list:
+        '''Executa `task(bot, item)` para cada item e aguarda todos terminarem.
+
+        # Parâmetros
+
+            * task: `Callable[[WebBot, Any], Any]`
+                Função executada por um worker para cada item.
+
+            * items: `list`
+                Itens a serem processados.
+
+            * key: `Callable[[Any], Any]`
+                Função que extrai a chave (ex.: CNPJ) reportada junto com o resultado.
+
+        # Retorno
+
+            Lista de `WorkerResult(key, value, error)` na mesma ordem de `items`.
+
+        # Raises
+
+            TimeoutError: Se os itens não terminarem em `timeout` segundos.
+            RuntimeError: Se todos os workers tiverem parado.
+        '''
+        items = list(items)
+        batch = _Batch(len(items))
+        for position, item in enumerate(items):
+            self._jobs.put((task, item, key(item), position, batch))
+        batch.wait(self.timeout or None, alive=lambda: any(thread.is_alive() for thread in self._threads))
+        return batch.results
+
+    def shutdown(self):
+        '''Finaliza os workers e fecha os navegadores.'''
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.logger.info("Pool de navegadores finalizado.")
+
+    def _worker_loop(self, worker_id:int):
+        bot = None
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            task, item, item_key, position, batch = job
+            try:
+                if bot is None:
+                    bot = self.bot_factory()
+                result = WorkerResult(item_key, task(bot, item), None)
+            except Exception as err:
+                result = WorkerResult(item_key, None, err)
+                self.logger.error(f'Worker de navegador {worker_id}')
+                if bot is not None and not is_browser_alive(bot):
+                    self.logger.info(f"Navegador do worker {worker_id} não responde, um novo será criado no próximo item.")
+                    stop_browser_quietly(bot)
+                    bot = None
+            batch.set(position, result)
+        stop_browser_quietly(bot)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
@@ -2,65 +2,188 @@ import pandas as pd
 from pandas import Series
 
 
-def check_variables(row: Series) -> tuple[dict, str, str, str]:
+DIMENSIONS_COLUMN = "DIMENSÕES CAIXA (altura x largura x comprimento cm)"
+HEIGHT_COLUMN = "ALTURA CM"
+WIDTH_COLUMN = "LARGURA CM"
+LENGTH_COLUMN = "COMPRIMENTO CM"
+WEIGHT_COLUMN = "PESO KG"
+CEP_DESTINY_COLUMN = "CEP DESTINO"
+PARSED_COLUMNS = [
+    HEIGHT_COLUMN,
+    WIDTH_COLUMN,
+    LENGTH_COLUMN,
+    WEIGHT_COLUMN,
+    CEP_DESTINY_COLUMN,
+]
+CORREIOS_REQUIRED_COLUMNS = [
+    DIMENSIONS_COLUMN,
+    "PESO DO PRODUTO",
+    "TIPO DE SERVIÇO CORREIOS",
+    "CEP",
+]
+
+
+_NUMBER_PATTERN = r"(\d+(?:[.,]\d+)?)"
+_DIMENSIONS_PATTERN = (
+    rf"^\s*{_NUMBER_PATTERN}\s*[xX]\s*{_NUMBER_PATTERN}\s*[xX]\s*{_NUMBER_PATTERN}\s*$"
+)
+
+
+def _to_number(values: Series) -> Series:
+    """Converte números ou textos como "10", "0.4" e "0,4" em float, NaN quando inválido."""
+    numbers = pd.to_numeric(values, errors="coerce")
+    texts = values[numbers.isna() & values.notna()]
+    if not texts.empty:
+        numbers[texts.index] = pd.to_numeric(
+            texts.astype(str).str.strip().str.replace(",", ".", regex=False),
+            errors="coerce",
+        )
+    return numbers.astype(float)
+
+
+def parse_package_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Verifica as variáveis usadas no site dos correios.
+    Converte dimensões, peso e CEP em colunas numéricas, uma única vez.
 
-    A função recebe uma série de dados e verifica se as variáveis que
-    interagirão com o site dos correios estão adequadas. São duas
-    verificações: (1) verifica se as variáveis estão vazias;
-    (2) verifica se os critérios para as dimensões da embalagem impostos
-    pelo site dos correios foram atendidos.
+    A coluna de dimensões "altura x largura x comprimento" é separada com
+    uma única expressão regular aplicada à coluna inteira. As colunas
+    criadas (PARSED_COLUMNS) ficam disponíveis para as etapas seguintes,
+    Correios ou Jadlog, sem precisar separar e converter o texto novamente a
+    cada linha.
 
     Args:
-        row (Series): uma série de dados pandas.
+        df (DataFrame): dataframe com as colunas de dimensões, peso e CEP.
 
-    Raises:
-        ValueError: se alguma das variáveis testadas estiver vazia ou se as
-            dimensões da embalagem estiverem fora dos critérios dos correios.
+    Return:
+        DataFrame: cópia do df com as colunas numéricas acrescentadas.
+    """
+    df = df.copy()
+    dimensions = df[DIMENSIONS_COLUMN].astype(object).str.extract(_DIMENSIONS_PATTERN)
+    dimensions = dimensions.apply(lambda column: column.str.replace(",", ".", regex=False)).astype(float)
+    df[HEIGHT_COLUMN] = dimensions[0].to_numpy()
+    df[WIDTH_COLUMN] = dimensions[1].to_numpy()
+    df[LENGTH_COLUMN] = dimensions[2].to_numpy()
+    df[WEIGHT_COLUMN] = _to_number(df["PESO DO PRODUTO"])
+    cep = df["CEP"].where(df["CEP"].isna(), df["CEP"].astype(str)).str.replace(r"\D", "", regex=True)
+    df[CEP_DESTINY_COLUMN] = cep.where(cep.str.len().between(1, 8)).str.zfill(8)
+    return df
+
+
+def validate_correios_inputs(
+    df: pd.DataFrame,
+) -> tuple[pd.DataFrame, Series]:
+    """
+    Valida de uma só vez todas as linhas que serão cotadas nos correios.
+
+    Aplica as regras como máscaras vetorizadas: campos obrigatórios
+    preenchidos, dimensões numéricas e dentro dos limites do site dos
+    correios, peso numérico entre 0 e 30 kg e CEP com até oito dígitos.
+    Linhas reprovadas não chegam ao navegador.
+
+    Args:
+        df (DataFrame): dataframe filtrada dos correios.
 
     Return:
-        tuple[dict, str, str, str]: uma tupla contendo:
-            - um dicionário contendo as dimensões da embalagem.
-            - uma string contendo o peso estimado.
-            - uma string contendo o tipo de serviço postal.
-            - uma string contendo o cep de destino.
+        tuple[DataFrame, Series]: uma tupla contendo:
+            - as linhas válidas, com as colunas de PARSED_COLUMNS.
+            - o motivo da reprovação de cada linha inválida, indexado pelo
+              CNPJ.
     """
+    if not set(PARSED_COLUMNS).issubset(df.columns):
+        df = parse_package_columns(df)
+
+    height = df[HEIGHT_COLUMN]
+    width = df[WIDTH_COLUMN]
+    length = df[LENGTH_COLUMN]
+    sum_dimensions = height + width + length
+    weight = df[WEIGHT_COLUMN]
 
-    PACKAGE_DIMENSIONS_KEYS = [
-        "height",
-        "width",
-        "length",
+    # A primeira regra violada define o motivo da linha
+    rules = [
+        (df[CORREIOS_REQUIRED_COLUMNS].isna().any(axis=1), "campos vazios"),
+        (
+            height.isna() | width.isna() | length.isna(),
+            "dimensões fora do formato altura x largura x comprimento",
+        ),
+        (~height.between(0.4, 100), "altura fora do limite (0,4 a 100 cm)"),
+        (~width.between(8, 100), "largura fora do limite (8 a 100 cm)"),
+        (~length.between(13, 100), "comprimento fora do limite (13 a 100 cm)"),
+        (
+            ~sum_dimensions.between(21.4, 200),
+            "soma das dimensões fora do limite (21,4 a 200 cm)",
+        ),
+        (weight.isna(), "peso fora do formato numérico"),
+        (~((weight > 0) & (weight <= 30)), "peso fora do limite (até 30 kg)"),
+        (df[CEP_DESTINY_COLUMN].isna(), "CEP de destino inválido"),
     ]
-    try:
-        package_dimensions_values = row[
-            "DIMENSÕES CAIXA (altura x largura x comprimento cm)"
-        ]
-        weight = row["PESO DO PRODUTO"]
-        postal_service = row["TIPO DE SERVIÇO CORREIOS"]
-        cep_destiny = str(row["CEP"])
-        if (
-            pd.isna(weight)
-            or pd.isna(package_dimensions_values)
-            or pd.isna(postal_service)
-            or pd.isna(cep_destiny)
-        ):
-            raise ValueError("Erro ao realizar cotação Correios.")
-        else:
-            package_dimensions_values = package_dimensions_values.split(" x ")
-            package_dimensions = dict(
-                zip(
-                    PACKAGE_DIMENSIONS_KEYS,
-                    package_dimensions_values,
-                )
-            )
-
-            if not are_package_dimensions_valid(**package_dimensions):
-                raise ValueError("Erro ao realizar cotação Correios.")
-
-            return package_dimensions, weight, postal_service, cep_destiny
-    except Exception as err:
-        raise err
+    reasons = pd.Series(None, index=df.index, dtype=object)
+    for mask, reason in rules:
+        reasons = reasons.mask(reasons.isna() & mask.to_numpy(), reason)
+
+    invalid = reasons.notna()
+    rejected = ("Erro ao realizar cotação Correios: " + reasons[invalid]).set_axis(
+        df.loc[invalid, "CNPJ"].to_numpy()
+    )
+    return df[~invalid], rejected
+
+
+def package_dimensions(row: Series) -> dict:
+    """
+    Dimensões da embalagem de uma linha com as colunas de
+    parse_package_columns, como texto para os formulários dos correios e do
+    Jadlog.
+
+    Raises:
+        ValueError: se alguma dimensão não pôde ser convertida.
+
+    Return:
+        dict: altura, largura e comprimento ("height", "width", "length").
+    """
+    values = {
+        "height": row[HEIGHT_COLUMN],
+        "width": row[WIDTH_COLUMN],
+        "length": row[LENGTH_COLUMN],
+    }
+    if any(pd.isna(value) for value in values.values()):
+        raise ValueError("dimensões fora do formato altura x largura x comprimento")
+    return {key: f"{value:g}" for key, value in values.items()}
+
+
+def correios_inputs(row: Series) -> tuple[dict, str, str, str]:
+    """
+    Monta os argumentos de interact_correios a partir de uma linha já
+    validada por validate_correios_inputs.
+
+    Return:
+        tuple[dict, str, str, str]: dimensões da embalagem, peso, tipo de
+            serviço postal e cep de destino.
+    """
+    return (
+        package_dimensions(row),
+        row["PESO DO PRODUTO"],
+        row["TIPO DE SERVIÇO CORREIOS"],
+        row[CEP_DESTINY_COLUMN],
+    )
+
+
+def check_variables(row: Series) -> tuple[dict, str, str, str]:
+    """
+    Verifica uma única linha e retorna os argumentos de interact_correios.
+
+    Mantida por compatibilidade; aplica as mesmas regras de
+    validate_correios_inputs.
+
+    Raises:
+        ValueError: se a linha for reprovada por validate_correios_inputs.
+
+    Return:
+        tuple[dict, str, str, str]: dimensões da embalagem, peso, tipo de
+            serviço postal e cep de destino.
+    """
+    valid, rejected = validate_correios_inputs(row.to_frame().T)
+    if valid.empty:
+        raise ValueError(rejected.iloc[0])
+    return correios_inputs(valid.iloc[0])
 
 
 def are_package_dimensions_valid(
@@ -71,27 +194,18 @@ def are_package_dimensions_valid(
     """
     Analisa se as dimensões da embalagem passam nos critérios dos correios.
 
-    A função aplica os critérios de dimensões de caixa exigidos pelo site dos
-    correios.
-
-    Args:
-        height (str): uma string contendo a medida de altura da caixa.
-        width (str): uma string contendo a medida de largura da caixa.
-        length (str): uma string contendo a medida de comprimento da caixa.
+    Mantida por compatibilidade; aplica as regras de dimensões de
+    validate_correios_inputs.
 
     Return:
         bool: retorna verdadeiro se todas as restrições forem atendidas
-            e retorna falso se alguma das restrições não forem atendidas.
     """
-
-    height = float(height)
-    width = float(width)
-    length = float(length)
-    sum_dimensions = height + width + length
-    constrains = [
-        0.4 <= height <= 100,
-        8 <= width <= 100,
-        13 <= length <= 100,
-        21.4 <= sum_dimensions <= 200,
-    ]
-    return all(constrains)
+    row = pd.DataFrame({
+        "CNPJ": [None],
+        DIMENSIONS_COLUMN: [f"{height} x {width} x {length}"],
+        "PESO DO PRODUTO": ["1"],
+        "TIPO DE SERVIÇO CORREIOS": ["PAC"],
+        "CEP": ["01001000"],
+    }, dtype=object)
+    valid, _ = validate_correios_inputs(row)
+    return not valid.empty
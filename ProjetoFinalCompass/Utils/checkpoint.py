@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+from Utils.IntegratedLogger import IntegratedLogger
+
+
+class CheckpointStore:
+    '''Guarda em Parquet, por etapa, os dataframes produzidos por uma execução do processo.
+
+    Cada execução usa uma pasta própria dentro de `base_path`, identificada pelo arquivo de entrada
+    (caminho, tamanho e data de modificação). Uma etapa só é considerada concluída depois que todos os
+    seus arquivos foram gravados e o manifesto `<etapa>.done.json` foi criado, então uma queda no meio
+    da gravação nunca deixa um checkpoint pela metade.
+
+    Com `resume` ativo as etapas que já têm checkpoint são recarregadas em vez de executadas; caso
+    contrário a pasta da execução é limpa no início.
+
+    O journal de cotações (`journal_path`) fica fora da pasta da execução, em `base_path/journals`,
+    com o mesmo identificador do arquivo de entrada: ele não é apagado ao recomeçar sem `resume`,
+    então as cotações de uma execução interrompida nunca são refeitas, e só é removido por `clear`.
+
+    # Exemplo
+
+        checkpoints = CheckpointStore(vars_map['DEFAULT_CHECKPOINT_PATH'], input_path, resume, logger)
+        api_stage = checkpoints.wrap('api', lambda df_output: api_data_lookup(df_output, logger),
+                                     to_frames=lambda api: {'api_data': api[0], 'df_output': api[1]},
+                                     from_frames=lambda frames: (frames['api_data'], frames['df_output']))
+
+    # Atributos
+
+        * run_dir: `PathLike`
+            Pasta onde ficam os checkpoints desta execução.
+
+        * journal_path: `PathLike`
+            Arquivo do journal de cotações desta planilha de entrada.
+
+        * resume: `bool`
+            Recarrega as etapas já concluídas em vez de executá-las.
+
+    '''
+
+    def __init__(self, base_path:os.PathLike, input_file_path:os.PathLike, resume:bool, logger:IntegratedLogger):
+        self.logger = logger
+        self.resume = resume
+        run_id = self.run_id(input_file_path)
+        self.run_dir = os.path.join(base_path, run_id)
+        self.journal_path = os.path.join(base_path, 'journals', f'{run_id}.jsonl')
+        if not resume and os.path.isdir(self.run_dir):
+            shutil.rmtree(self.run_dir)
+        os.makedirs(self.run_dir, exist_ok=True)
+        if resume:
+            self.logger.info(f"Retomando execução de {self.run_dir}, etapas concluídas: {self.completed_stages()}")
+
+    @staticmethod
+    def run_id(input_file_path:os.PathLike) -> str:
+        '''Identificador da execução: nome do arquivo de entrada e um hash de caminho, tamanho e data de modificação.'''
+        path = os.path.abspath(input_file_path)
+        stat = os.stat(path)
+        digest = hashlib.sha1(f'{path}|{stat.st_size}|{stat.st_mtime_ns}'.encode('utf-8')).hexdigest()[:12]
+        name = os.path.splitext(os.path.basename(path))[0].replace(' ', '_')
+        return f'{name}_{digest}'
+
+    def _manifest_path(self, stage:str) -> str:
+        return os.path.join(self.run_dir, f'{stage}.done.json')
+
+    def _frame_path(self, stage:str, name:str) -> str:
+        return os.path.join(self.run_dir, f'{stage}.{name}.parquet')
+
+    def completed_stages(self) -> list:
+        return sorted(file[:-len('.done.json')] for file in os.listdir(self.run_dir) if file.endswith('.done.json'))
+
+    def has(self, stage:str) -> bool:
+        return os.path.exists(self._manifest_path(stage))
+
+    @staticmethod
+    def _columnar(df:pd.DataFrame) -> pd.DataFrame:
+        '''Converte colunas object (tipos misturados vindos do Excel) em texto, mantendo os vazios.'''
+        df = df.copy()
+        df.columns = [str(column) for column in df.columns]
+        for column in df.columns[df.dtypes == object]:
+            filled = df[column].notna()
+            df.loc[filled, column] = df.loc[filled, column].astype(str)
+        return df
+
+    def save(self, stage:str, frames:dict):
+        '''Grava os dataframes da etapa e, por último, o manifesto que marca a etapa como concluída.
+
+        Dataframes None (ex.: a BrasilAPI não retornou nenhuma empresa) não geram arquivo; ficam
+        registrados no manifesto e voltam como None em `load`.
+        '''
+        for name, df in frames.items():
+            if df is None:
+                continue
+            path = self._frame_path(stage, name)
+            self._columnar(df).to_parquet(f'{path}.tmp', index=True)
+            os.replace(f'{path}.tmp', path)
+        manifest = {'stage': stage, 'frames': [name for name, df in frames.items() if df is not None],
+                    'empty_frames': [name for name, df in frames.items() if df is None], 'saved_at': datetime.now().isoformat()}
+        with open(f'{self._manifest_path(stage)}.tmp', 'w', encoding='utf-8') as file:
+            json.dump(manifest, file)
+        os.replace(f'{self._manifest_path(stage)}.tmp', self._manifest_path(stage))
+        self.logger.info(f"Checkpoint da etapa {stage} gravado ({', '.join(frames) or 'sem dados'})")
+
+    def load(self, stage:str) -> dict:
+        '''Lê os dataframes de uma etapa concluída.'''
+        with open(self._manifest_path(stage), encoding='utf-8') as file:
+            manifest = json.load(file)
+        frames = {name: pd.read_parquet(self._frame_path(stage, name)) for name in manifest['frames']}
+        frames.update({name: None for name in manifest.get('empty_frames', [])})
+        self.logger.info(f"Etapa {stage} recarregada do checkpoint de {manifest['saved_at']}")
+        return frames
+
+    def wrap(self, stage:str, func, to_frames=None, from_frames=None):
+        '''Envolve a função de uma etapa: com `resume` e checkpoint existente, recarrega; senão executa e grava.
+
+        # Parâmetros
+
+            * to_frames: `Callable`
+                Converte o retorno da etapa em um dicionário de dataframes. Sem ele só a conclusão é registrada.
+
+            * from_frames: `Callable`
+                Reconstrói o retorno da etapa a partir do dicionário de dataframes.
+
+        '''
+        def run(*args):
+            if self.resume and self.has(stage):
+                frames = self.load(stage)
+                return from_frames(frames) if from_frames is not None else None
+            result = func(*args)
+            self.save(stage, to_frames(result) if to_frames is not None else {})
+            return result
+        return run
+
+    def clear(self):
+        '''Remove os checkpoints e o journal desta execução, usado quando o processo termina com sucesso.'''
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
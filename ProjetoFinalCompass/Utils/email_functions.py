@@ -1,41 +1,68 @@
+import functools
+import io
 import smtplib
+import zipfile
 from email.message import EmailMessage
 from datetime import datetime
-import openpyxl
 import os
-from botcity.maestro import *
 from config import vars_map
 
 
 # Global settings
-EMAIL = vars_map['EMAIL_USERNAME']
 PROCESS_NAME = "E-mail de finalização da execução"
-EXCEL_FILE_PATH = vars_map['DEFAULT_EMAILS_FILE']
 
 def get_current_timestamp():
     """ Retorna a data e hora atual formatadas. """
     now = datetime.now()
     return now.strftime("%d%m%Y"), now.strftime("%H%M")
         
-def read_emails_from_excel():
-    """ Reads the emails from the spreadsheet and returns a list. """
+@functools.lru_cache(maxsize=None)
+def _load_recipients(excel_file_path):
+    import openpyxl
+    workbook = openpyxl.load_workbook(excel_file_path, read_only=True)
     try:
-        workbook = openpyxl.load_workbook(EXCEL_FILE_PATH)
-        sheet = workbook.active
         emails = []
+        for (value,) in workbook.active.iter_rows(min_row=1, min_col=1, max_col=1, values_only=True):
+            email = str(value).strip() if value else ''
+            if email and email not in emails:
+                emails.append(email)
+        return tuple(emails)
+    finally:
+        workbook.close()
 
-        for row in sheet.iter_rows(min_row=1, min_col=1, max_col=1):
-            for cell in row:
-                if cell.value:
-                    emails.append(cell.value)
+def read_emails_from_excel():
+    """ Lê os e-mails da planilha de notificações e retorna uma lista.
 
-        return emails
+    A planilha é lida uma única vez por execução; as chamadas seguintes usam a lista em memória.
+    Falhas de leitura não ficam em cache, então uma nova tentativa relê a planilha.
+    """
+    try:
+        return list(_load_recipients(vars_map['DEFAULT_EMAILS_FILE']))
     except Exception as e:
         print(f"ERROR - read_emails_from_excel")
         return []
 
-def send_emails(output_file):
-    """ Sends emails according to the list extracted from Excel """
+def attachment_from_file(filepath, maintype='application', subtype='xlsx', filename=None):
+    """ Lê um arquivo para anexar, compactando em .zip quando a compactação está ativa e o arquivo é grande.
+
+    Retorna uma tupla (conteúdo, maintype, subtype, nome do arquivo).
+    """
+    with open(filepath, "rb") as content_file:
+        content = content_file.read()
+    filename = filename or os.path.basename(filepath)
+    if vars_map['EMAIL_COMPRESS_ATTACHMENTS'] and len(content) >= vars_map['EMAIL_COMPRESS_MIN_MB'] * 2**20:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(filename, content)
+        return buffer.getvalue(), 'application', 'zip', f"{os.path.splitext(filename)[0]}.zip"
+    return content, maintype, subtype, filename
+
+def send_emails(output_file, logger=None):
+    """ Envia o arquivo de saída para os e-mails da planilha de notificações.
+
+    Falhas de envio (SMTP, conexão recusada, DNS, timeout) não interrompem o processo: a planilha de saída
+    já foi gravada, então o erro é apenas registrado pelo logger, quando informado.
+    """
     formatted_date, formatted_time = get_current_timestamp()
     email_password = vars_map['EMAIL_PASSWORD']
 
@@ -46,34 +73,25 @@ def send_emails(output_file):
                   f"na data {formatted_date} - {formatted_time}")
     
     try:
-        with open(output_file, "rb") as content_file:
-            content = content_file.read()
+        content, maintype, subtype, _ = attachment_from_file(output_file)
     except FileNotFoundError:
         print("ERROR - Anexo planilha de saída")
         return
-
-    emails = read_emails_from_excel()
+    extension = 'zip' if subtype == 'zip' else 'xlsx'
 
     try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
-            # smtp.set_debuglevel(1)
-            smtp.ehlo('localhost') # Set a compatible hostname
-            smtp.login(EMAIL, email_password)
-
-            for email in emails:
-                msg = EmailMessage()
-                msg['Subject'] = f"RPA {PROCESS_NAME} - {formatted_date} - {formatted_time}"
-                msg['From'] = EMAIL
-                msg['To'] = email
-                msg.set_content(email_body)
-                msg.add_attachment(content, maintype='application', subtype='xlsx', filename='resultado.xlsx')
-                smtp.send_message(msg)
-                print(f"E-mail enviado para: {email}")
-
+        with MailDispatcher() as dispatcher:
+            dispatcher.send(subject=f"RPA {PROCESS_NAME} - {formatted_date} - {formatted_time}",
+                            body=email_body,
+                            recipients=read_emails_from_excel(),
+                            attachments=[(content, maintype, subtype, f'resultado.{extension}')])
         print("Todos os e-mails foram enviados com sucesso!")
     
-    except smtplib.SMTPException as e:
-        print(f"Erro ao enviar e-mails")
+    except (smtplib.SMTPException, OSError) as e:
+        if logger is None:
+            print(f"ERROR - Erro ao enviar e-mails: {e}")
+        else:
+            logger.error('Envio dos e-mails de finalização')
 
 # Send error notification email
 def send_error_email(process_name, error_message, screenshot_path):
@@ -87,25 +105,162 @@ def send_error_email(process_name, error_message, screenshot_path):
     body = (f"Foi encontrado ERRO durante a execução do processo RPA [PROCESS NAME], "
             f"na data {formatted_date} às {formatted_time}, na tarefa {process_name}.\n\n"
             f"Detalhes do erro:\n{error_message}")
-    emails = read_emails_from_excel()
 
-    try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
-            smtp.login(EMAIL, email_password)
-            for email in emails:
-                msg = EmailMessage()
-                msg['Subject'] = subject
-                msg['From'] = EMAIL
-                msg['To'] = email
-                msg.set_content(body)
-
-                if screenshot_path:
-                    with open(screenshot_path, "rb") as img:
-                        msg.add_attachment(img.read(), maintype='image', subtype='png',
-                                           filename=os.path.basename(screenshot_path))
-
-                smtp.send_message(msg)
-                print(f"INFO - E-mail de erro enviado para: {email}")
+    attachments = []
+    if screenshot_path:
+        with open(screenshot_path, "rb") as img:
+            attachments.append((img.read(), 'image', 'png', os.path.basename(screenshot_path)))
 
+    try:
+        with MailDispatcher() as dispatcher:
+            dispatcher.send(subject, body, read_emails_from_excel(), attachments)
     except Exception as e:
-        raise(f"Erro ao enviar e-mail de notificação: {e}")
+        raise RuntimeError(f"Erro ao enviar e-mail de notificação: {e}") from e
+
+
+class SMTPConnection:
+    """ Mantém uma conexão SMTP aberta e autenticada para vários envios, reconectando quando o servidor derruba a conexão.
+
+    Host, porta e uso de SSL vêm do `vars_map` (SMTP_HOST, SMTP_PORT, SMTP_USE_SSL) quando não informados.
+    """
+
+    def __init__(self, host=None, port=None, username=None, password=None, use_ssl=None):
+        self.host = host or vars_map['SMTP_HOST']
+        self.port = port or vars_map['SMTP_PORT']
+        self.use_ssl = vars_map['SMTP_USE_SSL'] if use_ssl is None else use_ssl
+        self.username = username or vars_map['EMAIL_USERNAME']
+        self.password = password or vars_map['EMAIL_PASSWORD']
+        self._smtp = None
+
+    def _connect(self):
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        self._smtp = smtp_class(self.host, self.port)
+        self._smtp.ehlo('localhost')
+        self._smtp.login(self.username, self.password)
+
+    def send_message(self, msg, to_addrs=None):
+        """ Envia a mensagem, abrindo ou reabrindo a conexão se necessário (uma nova tentativa). """
+        if self._smtp is None:
+            self._connect()
+        try:
+            self._smtp.send_message(msg, to_addrs=to_addrs)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            self.close()
+            self._connect()
+            self._smtp.send_message(msg, to_addrs=to_addrs)
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class MailDispatcher:
+    """ Envia uma mesma mensagem para vários destinatários por uma única conexão SMTP autenticada.
+
+    A mensagem e os anexos são montados (e codificados em base64) uma única vez. Com EMAIL_SINGLE_MESSAGE
+    ativo é feito um único envio com todos os destinatários em cópia oculta; caso contrário a mesma
+    mensagem é reenviada trocando apenas o destinatário.
+
+    # Exemplo
+
+        with MailDispatcher() as dispatcher:
+            dispatcher.send(subject, body, read_emails_from_excel(), [(content, 'application', 'xlsx', 'resultado.xlsx')])
+
+    """
+
+    def __init__(self, connection=None, single_message=None):
+        self.connection = connection or SMTPConnection()
+        self.single_message = vars_map['EMAIL_SINGLE_MESSAGE'] if single_message is None else single_message
+
+    def send(self, subject, body, recipients, attachments=()):
+        """ Envia a mensagem para todos os destinatários.
+
+        attachments: tuplas (conteúdo, maintype, subtype, nome do arquivo).
+        """
+        if not recipients:
+            return
+        msg = EmailMessage()
+        msg['Subject'] = subject
+        msg['From'] = vars_map['EMAIL_USERNAME']
+        msg.set_content(body)
+        for content, maintype, subtype, filename in attachments:
+            msg.add_attachment(content, maintype=maintype, subtype=subtype, filename=filename)
+
+        if self.single_message:
+            # Destinatários só no envelope SMTP, sem aparecer no cabeçalho (cópia oculta)
+            msg['To'] = vars_map['EMAIL_USERNAME']
+            self.connection.send_message(msg, to_addrs=list(recipients))
+            print(f"E-mail enviado para {len(recipients)} destinatário(s) em cópia oculta")
+            return
+        for email in recipients:
+            del msg['To']
+            msg['To'] = email
+            self.connection.send_message(msg, to_addrs=[email])
+            print(f"E-mail enviado para: {email}")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_error_smtp = None
+
+def _format_digest_entry(entry):
+    message = ''.join(entry['message']) if isinstance(entry['message'], (list, tuple)) else str(entry['message'])
+    return (f"[{entry['process_name']}] {entry['count']}x - "
+            f"primeira: {entry['first'].strftime('%d/%m/%Y %H:%M:%S')}, "
+            f"última: {entry['last'].strftime('%d/%m/%Y %H:%M:%S')}\n{message.strip()}")
+
+# Send error digest email
+def send_error_digest(entries, screenshot_paths):
+    """ Envia um único resumo com os erros agrupados do período, reaproveitando a conexão SMTP entre resumos.
+
+    entries: lista de dicts com process_name, message, count, first e last.
+    screenshot_paths: capturas de tela anexadas (já limitadas por quem chama).
+    """
+    global _error_smtp
+    email_password = vars_map['EMAIL_PASSWORD']
+    if not email_password or not entries:
+        return
+
+    formatted_date, formatted_time = get_current_timestamp()
+    total = sum(entry['count'] for entry in entries)
+    subject = f"Erro - RPA {total} ocorrência(s) {formatted_date} ⏰ {formatted_time}"
+    body = (f"Foram encontrados {total} erros ({len(entries)} distintos) durante a execução do processo RPA, "
+            f"até a data {formatted_date} às {formatted_time}.\n\n"
+            + "\n\n".join(_format_digest_entry(entry) for entry in entries))
+
+    attachments = []
+    for screenshot_path in screenshot_paths:
+        try:
+            with open(screenshot_path, "rb") as img:
+                attachments.append((img.read(), 'image', 'jpeg', os.path.basename(screenshot_path)))
+        except OSError:
+            continue
+
+    if _error_smtp is None:
+        _error_smtp = SMTPConnection()
+    MailDispatcher(_error_smtp).send(subject, body, read_emails_from_excel(), attachments)
+    print(f"INFO - Resumo de erros enviado")
+
+def close_error_smtp():
+    """ Fecha a conexão SMTP usada pelos resumos de erro. """
+    global _error_smtp
+    if _error_smtp is not None:
+        _error_smtp.close()
+        _error_smtp = None
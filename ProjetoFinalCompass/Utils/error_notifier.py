@@ -0,0 +1,127 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from .email_functions import send_error_digest, close_error_smtp
+
+
+class ErrorNotifier:
+    '''Notifica os erros do processo em segundo plano, agrupados por assinatura.
+
+    A primeira ocorrência de cada assinatura (processo + mensagem do erro) tem a tela capturada e é
+    enviada ao Maestro; as repetições apenas incrementam um contador. A cada `digest_interval`
+    segundos um único e-mail de resumo é enviado com todos os erros do período e no máximo
+    `max_attachments` capturas de tela, reaproveitando a mesma conexão SMTP.
+
+    # Atributos
+
+        * maestro: `BotMaestroSDK`
+            Objeto maestro usado para registrar os erros, caso seja None os erros só vão por e-mail.
+
+        * image_filepath: `PathLike`
+            Pasta onde as capturas de tela são salvas.
+
+        * digest_interval: `float`
+            Intervalo, em segundos, entre os e-mails de resumo.
+
+        * max_attachments: `int`
+            Número máximo de capturas de tela anexadas em cada resumo.
+
+    '''
+    _STOP = object()
+
+    def __init__(self, maestro, image_filepath:os.PathLike, digest_interval:float=300, max_attachments:int=5,
+                 datetime_file_format:str='%d-%m-%Y_%H-%M-%S'):
+        self.maestro = maestro
+        self.image_filepath = image_filepath
+        self.digest_interval = digest_interval
+        self.max_attachments = max_attachments
+        self.datetime_file_format = datetime_file_format
+        self._seen = set()
+        self._seen_lock = threading.Lock()
+        self._digest = {}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='error-notifier', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def signature(process_name:str, msg_reduced) -> str:
+        '''Assinatura usada para agrupar erros iguais.'''
+        message = ''.join(msg_reduced) if isinstance(msg_reduced, (list, tuple)) else str(msg_reduced)
+        return f'{process_name}|{message.strip()}'
+
+    def report(self, process_name:str, msg_reduced):
+        '''Registra um erro. Só a primeira ocorrência de cada assinatura captura a tela; não espera rede.'''
+        signature = self.signature(process_name, msg_reduced)
+        screenshot = None
+        with self._seen_lock:
+            first = signature not in self._seen
+            self._seen.add(signature)
+        if first:
+            screenshot = os.path.join(self.image_filepath, f'{datetime.now().strftime(self.datetime_file_format)}_RPA_{process_name}.jpg')
+            try:
+                from PIL import ImageGrab
+                ImageGrab.grab().save(screenshot)
+            except Exception:
+                screenshot = None
+        self._queue.put((signature, process_name, msg_reduced, screenshot, first, datetime.now()))
+
+    def _run(self):
+        next_digest = time.monotonic() + self.digest_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0, next_digest - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is self._STOP:
+                self._send_digest()
+                close_error_smtp()
+                return
+            if item is not None:
+                self._handle(*item)
+            if time.monotonic() >= next_digest:
+                self._send_digest()
+                next_digest = time.monotonic() + self.digest_interval
+
+    def _handle(self, signature, process_name, msg_reduced, screenshot, first, when):
+        entry = self._digest.get(signature)
+        if entry is None:
+            entry = self._digest[signature] = {
+                'process_name': process_name,
+                'message': msg_reduced,
+                'count': 0,
+                'first': when,
+                'last': when,
+                'screenshot': screenshot,
+            }
+        entry['count'] += 1
+        entry['last'] = when
+        if first and self.maestro is not None:
+            try:
+                self.maestro.error(
+                    task_id=self.maestro.get_execution().task_id,
+                    exception=Exception(msg_reduced),
+                    screenshot=screenshot
+                )
+            except Exception:
+                pass
+
+    def _send_digest(self):
+        if not self._digest:
+            return
+        entries = list(self._digest.values())
+        self._digest = {}
+        attachments = [entry['screenshot'] for entry in entries if entry['screenshot']][:self.max_attachments]
+        try:
+            send_error_digest(entries, attachments)
+        except Exception as err:
+            print(f"ERROR - Envio do resumo de erros: {err}")
+
+    def close(self, timeout:float=60):
+        '''Envia o último resumo e finaliza a thread.'''
+        if not self._thread.is_alive():
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
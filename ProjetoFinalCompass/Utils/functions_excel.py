@@ -1,11 +1,18 @@
 import os
 import time
+import datetime
 
+import numpy as np
 import pandas as pd
-from openpyxl.styles import PatternFill
-from openpyxl import load_workbook
+from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
+from openpyxl import load_workbook, Workbook
+from openpyxl.cell import WriteOnlyCell
 
 from Utils.IntegratedLogger import IntegratedLogger
+from Utils.check_correios_variables import PARSED_COLUMNS, parse_package_columns
+
+# Cor usada para destacar a cotação mais barata
+GREEN_FILL = PatternFill(start_color='33CC33', end_color='33CC33', fill_type='solid')
 
 
 def open_excel_file_to_dataframe(input_file_path, logger):
@@ -32,8 +39,12 @@ def open_excel_file_to_dataframe(input_file_path, logger):
         logger.info(f"O arquivo de Excel com os dados de entrada foi encontrado.")
         logger.debug(f"O arquivo foi encontrado na pasta indicada: {input_file_path}")
         
-        # Abre o arquivo excel em DataFrame, na pasta 'Groupo 1' e preenche valores vazios como 'NA'
-        df_input = pd.read_excel(input_file_path, "Grupo 1 ", na_values=["NA"],dtype=object)
+        # Abre o arquivo excel em DataFrame, na pasta 'Groupo 1', em blocos e em modo somente leitura,
+        # e preenche 'NA', 'N/A', '#N/A', 'null' e os demais textos vazios do pandas como vazios
+        chunks = list(iter_excel_chunks(input_file_path, INPUT_SHEET_NAME, na_values=DEFAULT_NA_VALUES))
+        df_input = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(dtype=object)
+        if "CNPJ" in df_input.columns:
+            df_input["CNPJ"] = normalize_cnpj_column(df_input["CNPJ"])
         logger.info("DataFrame com base no arquivo Excel criado com sucesso")
 
         return df_input
@@ -44,9 +55,20 @@ def open_excel_file_to_dataframe(input_file_path, logger):
         raise
 
 
+OUTPUT_COLUMNS = [
+    "CNPJ", "RAZÃO SOCIAL", "NOME FANTASIA",
+    "ENDEREÇO", "CEP", "DESCRIÇÃO MATRIZ FILIAL",
+    "TELEFONE + DDD", "E-MAIL", "VALOR DO PEDIDO",
+    "DIMENSÕES CAIXA (altura x largura x comprimento cm)", "PESO DO PRODUTO", "TIPO DE SERVIÇO JADLOG",
+    "TIPO DE SERVIÇO CORREIOS", "VALOR COTAÇÃO JADLOG", "VALOR COTAÇÃO CORREIOS",
+    "PRAZO DE ENTREGA CORREIOS", "STATUS"
+]
+INPUT_SHEET_NAME = "Grupo 1 "
+
+
 def create_output_dataframe(df_input, logger):
     """
-    Cria um DataFrame vazio com colunas predefinidas.
+    Cria o DataFrame de saída, com as colunas predefinidas, a partir do DataFrame de entrada.
     
     Retorna:
         pd.DataFrame: DataFrame com as colunas predefinidas.
@@ -57,25 +79,9 @@ def create_output_dataframe(df_input, logger):
     try:
         logger.info("Iniciando a criação do DataFrame para receber os dados de saída")
         
-        # Definindo colunas
-        columns = [
-            "CNPJ", "RAZÃO SOCIAL", "NOME FANTASIA",
-            "ENDEREÇO", "CEP", "DESCRIÇÃO MATRIZ FILIAL",
-            "TELEFONE + DDD", "E-MAIL", "VALOR DO PEDIDO",
-            "DIMENSÕES CAIXA (altura x largura x comprimento cm)", "PESO DO PRODUTO", "TIPO DE SERVIÇO JADLOG",
-            "TIPO DE SERVIÇO CORREIOS", "VALOR COTAÇÃO JADLOG", "VALOR COTAÇÃO CORREIOS",
-            "PRAZO DE ENTREGA CORREIOS", "STATUS"
-        ]
-        # Criando o DataFrame com as colunas definidas
-        df_output = pd.DataFrame(columns=columns,dtype=str)
+        # Mantém só as colunas de saída; as que não existem na entrada ficam vazias
+        df_output = df_input.reindex(columns=OUTPUT_COLUMNS).astype(object).reset_index(drop=True)
         logger.info("DataFrame para receber as saídas criado com sucesso.")
-
-        # Alimenta o DataFrame de saída com a informações já existentes
-        df_output['CNPJ'] = df_input['CNPJ']
-        df_output = df_output.set_index('CNPJ')
-        df_input = df_input.set_index('CNPJ')
-        df_output.update(df_input)
-        df_output = df_output.reset_index()
         
         return df_output
     
@@ -85,6 +91,118 @@ def create_output_dataframe(df_input, logger):
         raise
 
 
+def normalize_cnpj_column(cnpjs: pd.Series) -> pd.Series:
+    """
+    Normaliza a coluna de CNPJ para texto com 14 dígitos, sem pontuação.
+
+    Células numéricas do Excel (que perdem o zero à esquerda) e textos com pontuação
+    terminam no mesmo formato usado pela BrasilAPI. Células vazias continuam vazias.
+    """
+    as_text = cnpjs.map(lambda value: str(int(value)) if isinstance(value, (int, float)) and not pd.isna(value) else value)
+    digits = as_text.astype("string").str.replace(r"\D", "", regex=True)
+    normalized = digits.str.zfill(14).where(digits.str.len() > 0)
+    return normalized.astype(object).where(normalized.notna(), None)
+
+
+# Textos que o pd.read_excel trata como vazio por padrão (keep_default_na), usados na leitura da entrada
+DEFAULT_NA_VALUES = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "n/a", "nan", "null",
+])
+
+
+def iter_excel_chunks(input_file_path, sheet_name=INPUT_SHEET_NAME, chunk_size=5000, na_values=DEFAULT_NA_VALUES):
+    """
+    Lê uma planilha em modo somente leitura e entrega as linhas em DataFrames de até `chunk_size` linhas.
+
+    O openpyxl em modo read_only não carrega a planilha inteira em memória, então o uso de memória
+    depende do tamanho do bloco e não do tamanho do arquivo. A primeira linha é o cabeçalho; linhas
+    totalmente vazias são ignoradas e textos em `na_values` viram células vazias.
+
+    Parâmetros:
+        input_file_path (str): Caminho do arquivo Excel.
+        sheet_name (str): Aba a ser lida.
+        chunk_size (int): Número máximo de linhas por bloco.
+        na_values (Iterable[str]): Textos tratados como célula vazia; por padrão os mesmos do
+            pd.read_excel (DEFAULT_NA_VALUES). Use () para manter todos os textos.
+
+    Retorna:
+        Iterator[pd.DataFrame]: Blocos com as colunas do cabeçalho e dtype object.
+    """
+    workbook = load_workbook(input_file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(column) if column is not None else f"Unnamed: {index}" for index, column in enumerate(header)]
+        width = len(header)
+        na_values = set(na_values)
+
+        chunk = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            row = [None if isinstance(value, str) and value in na_values else value for value in row[:width]]
+            row.extend([None] * (width - len(row)))
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=header, dtype=object)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header, dtype=object)
+    finally:
+        workbook.close()
+
+
+def read_output_dataframe(input_file_path, logger, chunk_size=5000):
+    """
+    Lê a planilha de entrada uma única vez, em blocos, e monta o DataFrame de saída.
+
+    Cada bloco é reduzido às colunas de saída e tem os CNPJs normalizados antes de ser acumulado,
+    então as colunas extras da entrada nunca ficam todas em memória. O DataFrame retornado já serve
+    de entrada para a etapa da BrasilAPI (api_data_lookup usa a coluna CNPJ dele).
+
+    Parâmetros:
+        input_file_path (str): Caminho do arquivo Excel a ser aberto.
+        chunk_size (int): Número de linhas lidas por vez.
+
+    Retorna:
+        pd.DataFrame: DataFrame de saída com as colunas predefinidas.
+
+    Raises:
+        FileNotFoundError: Se o arquivo não for encontrado no caminho especificado.
+        Exception: Para qualquer outro erro que ocorra durante o processo.
+    """
+    try:
+        logger.info("Iniciando leitura em blocos do arquivo Excel de entrada")
+
+        if not os.path.exists(input_file_path):
+            logger.debug(" arquivo não foi encontrado.")
+            raise FileNotFoundError(f"O arquivo {input_file_path} não foi encontrado.")
+        logger.debug(f"O arquivo foi encontrado na pasta indicada: {input_file_path}")
+
+        chunks = []
+        rows = 0
+        for chunk in iter_excel_chunks(input_file_path, INPUT_SHEET_NAME, chunk_size, na_values=DEFAULT_NA_VALUES):
+            chunk = chunk.reindex(columns=OUTPUT_COLUMNS)
+            chunk["CNPJ"] = normalize_cnpj_column(chunk["CNPJ"])
+            chunks.append(chunk)
+            rows += len(chunk)
+            logger.debug(f"{rows} linhas lidas do arquivo de entrada")
+
+        df_output = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=OUTPUT_COLUMNS, dtype=object)
+        df_output = df_output.astype(object)
+        logger.info(f"DataFrame de saída criado com {len(df_output)} linhas do arquivo de entrada")
+
+        return df_output
+
+    except Exception as erro:
+        logger.error('Execução read_output_dataframe')
+        # Para o processo para depuração manual
+        raise
+
+
 def save_df_output_to_excel(output_path, df_output, logger):
     """
     Salva o DataFrame em um arquivo Excel no caminho especificado.
@@ -103,15 +221,11 @@ def save_df_output_to_excel(output_path, df_output, logger):
     try:
         logger.info("Iniciando a criação da planilha Excel com os dados de saída")
 
-        # Gerando nome do arquivo baseado na data e hora atual
-        current_date = time.strftime("%Y-%m-%d_%Hh%Mm%Ss")
-        file_name = f"cnpj_{current_date}.xlsx"
-        logger.debug(f"Nome do arquivo criado: {file_name}")
+        output_file_path = build_output_file_path(output_path, logger)
 
         # Salvando DataFrame como arquivo Excel
-        output_file_path = f"{output_path}/{file_name}"
         df_output.to_excel(output_file_path, index=False)
-        logger.info(f"Sucesso, arquivo criado: {file_name}")
+        logger.info(f"Sucesso, arquivo criado: {os.path.basename(output_file_path)}")
         logger.debug(f"Arquivo Excel criado com sucesso em: {output_path}")
 
         return output_file_path
@@ -122,6 +236,166 @@ def save_df_output_to_excel(output_path, df_output, logger):
         raise
 
 
+def build_output_file_path(output_path, logger, input_name=None):
+    """
+    Gera o caminho do arquivo de saída, com nome baseado na data e hora atual.
+
+    Parâmetros:
+        output_path (str): Pasta onde o arquivo Excel será salvo.
+        input_name (str): Nome da planilha de entrada, incluído no nome do arquivo para que
+            planilhas processadas ao mesmo tempo (modo em lote) não gerem o mesmo nome.
+
+    Retorna:
+        str: Caminho do arquivo Excel a ser gerado.
+    """
+    current_date = time.strftime("%Y-%m-%d_%Hh%Mm%Ss")
+    file_name = f"cnpj_{input_name}_{current_date}.xlsx" if input_name else f"cnpj_{current_date}.xlsx"
+    logger.debug(f"Nome do arquivo criado: {file_name}")
+    return f"{output_path}/{file_name}"
+
+
+def parse_brl_values(values):
+    """
+    Converte uma coluna de valores em reais (ex.: "R$ 1.234,56") para float de forma vetorizada.
+
+    Parâmetros:
+        values (pd.Series): Coluna com os valores em texto.
+
+    Retorna:
+        pd.Series: Valores numéricos, NaN onde não foi possível converter.
+    """
+    text = values.astype(str).str.replace('R$', '', regex=False).str.strip()
+    # Com vírgula decimal o ponto é separador de milhar
+    has_comma = text.str.contains(',', regex=False)
+    text = text.where(~has_comma, text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    return pd.to_numeric(text, errors='coerce')
+
+
+def cheaper_quotation_masks(df_output):
+    """
+    Indica, para cada linha, qual cotação é a mais barata, com a mesma regra de compare_quotation.
+
+    Em caso de empate ou sem cotação Jadlog a cotação dos correios é escolhida.
+
+    Retorna:
+        tuple: Duas pd.Series booleanas - Correios mais barato e Jadlog mais barato.
+    """
+    correios = parse_brl_values(df_output["VALOR COTAÇÃO CORREIOS"])
+    jadlog = parse_brl_values(df_output["VALOR COTAÇÃO JADLOG"])
+    correios_cheaper = correios.notna() & (jadlog.isna() | (correios <= jadlog))
+    jadlog_cheaper = jadlog.notna() & ~correios_cheaper
+    return correios_cheaper, jadlog_cheaper
+
+
+def _excel_value(value):
+    """Converte um valor do DataFrame para um tipo aceito pelo openpyxl."""
+    if value is None or isinstance(value, str):
+        return value
+    if pd.api.types.is_scalar(value):
+        if pd.isna(value):
+            return None
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, (int, float, bool, datetime.date, datetime.time)):
+            return value
+    return str(value)
+
+
+def save_styled_output_to_excel(output_path, df_output, logger, input_name=None):
+    """
+    Salva o DataFrame em Excel já com a cotação mais barata destacada, em uma única passada.
+
+    Substitui save_df_output_to_excel seguido de compare_quotation: a comparação é vetorizada
+    e o arquivo é escrito uma só vez, em modo de escrita contínua (write-only) do openpyxl,
+    com uso de memória constante.
+
+    Parâmetros:
+        output_path (str): Pasta onde o arquivo Excel será salvo.
+        df_output (pd.DataFrame): DataFrame a ser salvo.
+        input_name (str): Nome da planilha de entrada, ver build_output_file_path.
+
+    Retorna:
+        str: Caminho do arquivo Excel gerado.
+
+    Raises:
+        Exception: Para qualquer erro que ocorra durante o processo.
+    """
+    try:
+        logger.info("Iniciando a criação da planilha Excel com os dados de saída e comparação das cotações")
+        output_file_path = build_output_file_path(output_path, logger, input_name)
+
+        correios_cheaper, jadlog_cheaper = cheaper_quotation_masks(df_output)
+        correios_column = df_output.columns.get_loc("VALOR COTAÇÃO CORREIOS")
+        jadlog_column = df_output.columns.get_loc("VALOR COTAÇÃO JADLOG")
+        logger.info(f"Comparação concluída: Correios mais barato em {int(correios_cheaper.sum())} linhas, Jadlog em {int(jadlog_cheaper.sum())}.")
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Sheet1')
+
+        # Cabeçalho no mesmo estilo usado pelo pandas
+        thin = Side(style='thin')
+        header = []
+        for column in df_output.columns:
+            cell = WriteOnlyCell(worksheet, value=str(column))
+            cell.font = Font(bold=True)
+            cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+            cell.alignment = Alignment(horizontal='center', vertical='top')
+            header.append(cell)
+        worksheet.append(header)
+
+        rows = zip(df_output.itertuples(index=False, name=None), correios_cheaper.to_numpy(), jadlog_cheaper.to_numpy())
+        for values, paint_correios, paint_jadlog in rows:
+            row = [_excel_value(value) for value in values]
+            column_index = correios_column if paint_correios else jadlog_column if paint_jadlog else None
+            if column_index is not None and row[column_index] is not None:
+                cell = WriteOnlyCell(worksheet, value=row[column_index])
+                cell.fill = GREEN_FILL
+                row[column_index] = cell
+            worksheet.append(row)
+
+        workbook.save(output_file_path)
+        logger.info(f"Sucesso, arquivo criado: {os.path.basename(output_file_path)}")
+        logger.debug(f"Arquivo Excel criado com sucesso em: {output_path}")
+
+        return output_file_path
+
+    except Exception as erro:
+        logger.error('Execução save_styled_output_to_excel')
+        # Para o processo para depuração manual
+        raise
+
+
+def null_fields_messages(df, cnpj_column="CNPJ"):
+    """
+    Monta, de forma vetorizada, a mensagem de campos vazios de cada linha que tenha alguma célula nula.
+
+    A máscara de nulos é calculada uma única vez para todas as colunas e a lista de colunas de cada
+    linha é montada com um produto da máscara pelos nomes das colunas, sem percorrer as linhas.
+
+    Args:
+        df (pd.DataFrame): DataFrame a ser validado, deve conter a coluna de CNPJ.
+        cnpj_column (str): Nome da coluna usada como índice das mensagens.
+
+    Returns:
+        pd.Series: Mensagens "Campos vazios: [...]" indexadas pelo CNPJ, apenas das linhas com células vazias.
+    """
+    null_mask = df.isna()
+    has_null = null_mask.to_numpy().any(axis=1)
+    if not has_null.any():
+        return pd.Series(dtype=object)
+
+    null_mask = null_mask[has_null]
+    # "'COLUNA', " para cada coluna nula; o produto concatena as colunas marcadas de cada linha
+    labels = np.array([f"{column!r}, " for column in df.columns], dtype=object)
+    joined = null_mask.astype(object).to_numpy().dot(labels)
+    joined = pd.Series(joined, dtype=object).str[:-2]
+    messages = ("Campos vazios: [" + joined + "]").to_numpy()
+
+    messages = pd.Series(messages, index=df.loc[has_null, cnpj_column].to_numpy(), dtype=object)
+    # Um CNPJ repetido fica com a última mensagem, como no registro por dicionário
+    return messages[~messages.index.duplicated(keep="last")]
+
+
 def clean_df_if_null(df_to_clean, na_not_allowed_columns, logger):
     """
     Remove linhas com células vazias de um DataFrame e registra os CNPJs e as colunas com células vazias.
@@ -132,43 +406,24 @@ def clean_df_if_null(df_to_clean, na_not_allowed_columns, logger):
     
     Returns:
         pd.DataFrame: DataFrame limpo.
-        list: Lista de dicionários com CNPJs e colunas com células vazias.
+        pd.Series: Mensagens de campos vazios indexadas pelo CNPJ.
     
     Raises:
         Exception: Para qualquer erro que ocorra durante o processo.
     """
     try:
         logger.info("Iniciando o processo de limpeza das células vazias do DataFrame")
-        # Cria uma lista para receber os CNPJs com alguma célula vazia
-        empty_cells = []
-
-        # Verifica se há células em branco em cada linha
-        rows_to_drop = []        
-        for _, row in df_to_clean.iterrows():
-            empty_rows = row[row.isnull()].index.tolist()
-            # Registra as linhas vazias na lista como um dicionário
-            if empty_rows:
-                empty_cells.append({
-                    "CNPJ": row["CNPJ"],
-                    "NA": empty_rows
-                    })
-            # Verifica se há colunas com células vazias que estão na lista de colunas onde valores nulos não são permitidos
-                if any(
-                    column in na_not_allowed_columns
-                    # Para cada coluna com célula vazia na linha atual, 
-                    # verifica se a coluna está na lista de colunas que não permitem valores nulos
-                    for column in empty_rows
-                    ):
-                    rows_to_drop.append(row.name)
+        empty_cells = null_fields_messages(df_to_clean)
 
         # Registra os CNPJs com células vazias
-        if empty_cells:
-            logger.info(f"CNPJs com células vazias: {empty_cells}")
+        if not empty_cells.empty:
+            logger.info(f"CNPJs com células vazias: {len(empty_cells)}")
+            logger.debug(f"CNPJs com células vazias: {empty_cells.to_dict()}")
         else:
             logger.info("Nenhuma célula vazia encontrada.")
 
-        # Remove as linhas que contêm células em branco
-        df_clean = df_to_clean.dropna()
+        # Remove as linhas que contêm células em branco nas colunas obrigatórias
+        df_clean = df_to_clean.dropna(subset=list(na_not_allowed_columns))
         logger.info("Células vazias/NA removidas do DataFrame")
         
         return df_clean, empty_cells
@@ -185,7 +440,7 @@ def write_if_null_output(df_output, empty_cells, logger):
 
     Parâmetros:
     df_output (pd.DataFrame): DataFrame que será atualizado.
-    empty_cells (list): Lista de dicionários contendo CNPJs e colunas vazias.
+    empty_cells (pd.Series): Mensagens de campos vazios indexadas pelo CNPJ, como retornado por clean_df_if_null.
 
     Retorna:
     pd.DataFrame: DataFrame atualizado com a coluna 'Status' preenchida.
@@ -193,16 +448,13 @@ def write_if_null_output(df_output, empty_cells, logger):
     try:
         logger.info("Iniciando o processo de registro de células vazias")
 
-        # Itera sobre a lista de células vazias para preencher a coluna 'Status'
-        for empty in empty_cells:
-            # Verifica se, na linha, o índice CNPJ é igual
-            value = empty['CNPJ']
-            index = df_output[df_output["CNPJ"] == value].index
-            # Verifica se a linha com o CNPJ existe no df_output e preenche
-            if not index.empty:
-                # Atualiza a coluna 'Status' na linha correspondente
-                df_output.at[index, "STATUS"] = f"Campos vazios: {empty['NA']}"
-                logger.info(f"Coluna 'Status' atualizada para o CNPJ {empty['CNPJ']}: {empty['NA']}")
+        if empty_cells is None or len(empty_cells) == 0:
+            return df_output
+
+        # Escreve todas as mensagens de uma vez, com uma junção pela coluna CNPJ
+        new_status = df_output["CNPJ"].map(empty_cells)
+        df_output["STATUS"] = new_status.where(new_status.notna(), df_output["STATUS"])
+        logger.info(f"Coluna 'Status' atualizada para {int(new_status.notna().sum())} linhas com células vazias")
 
         return df_output
 
@@ -309,6 +561,9 @@ def make_jadlog_correios_dataframes(df_output, api_data, logger):
     """
     Pega as informações do Dataframe original, junta com as informações dadas pela API 
     e divide em três dataframes que serão usados no fluxo principal.
+
+    Dimensões, peso e CEP são convertidos uma única vez (parse_package_columns) e as colunas
+    convertidas (PARSED_COLUMNS) são acrescentadas aos dataframes dos correios e do Jadlog.
     
     Args:
         df_output (pd.DataFrame): Dataframe onde ocorrem as edições.
@@ -336,14 +591,19 @@ def make_jadlog_correios_dataframes(df_output, api_data, logger):
         df_output.update(api_data)
         df_output = df_output.reset_index()
         
+        # Converte dimensões, peso e CEP uma única vez, para as duas transportadoras
+        parsed = parse_package_columns(df_output[['DIMENSÕES CAIXA (altura x largura x comprimento cm)', 'PESO DO PRODUTO', 'CEP']])[PARSED_COLUMNS]
+
         # Limpa e prepara DataFrame para Correios
         df_correios, empty_cells = clean_df_if_null(df_output[correios_columns], correios_columns, logger)
+        df_correios = df_correios.join(parsed)
         df_output = write_if_null_output(df_output, empty_cells, logger)
         
         # Limpa e prepara DataFrame para JadLog
         df_jadlog, empty_cells = clean_df_if_null(df_output[jadlog_columns], jadlog_columns, logger)
         df_jadlog = df_jadlog.astype(str)
         df_jadlog['VALOR DO PEDIDO'] = df_jadlog['VALOR DO PEDIDO'].apply(lambda x: x.replace('.', ','))
+        df_jadlog = df_jadlog.join(parsed)
         
         # Registra as células vazias no DataFrame de saída
         df_output = write_if_null_output(df_output, empty_cells, logger)
@@ -1,6 +1,7 @@
 import re
 from botcity.web import WebBot, By, element_as_select
 from config import vars_map
+from Utils.browser_pool import ensure_page
 
 URL_CORREIOS = vars_map["DEFAULT_CORREIOS_URL"]
 
@@ -53,6 +54,90 @@ def interact_correios(
     """
 
     bot.browse(url=URL_CORREIOS)
+    _fill_correios_form(
+        bot,
+        service_type,
+        cep_destiny,
+        weight,
+        dimensions,
+        cep_origin,
+        shipping_date,
+        package_format,
+        package_type,
+    )
+    deliver_time, total_price = _read_correios_result(bot)
+
+    bot.stop_browser()
+
+    return deliver_time, total_price
+
+
+def interact_correios_session(
+    bot: WebBot,
+    service_type: str,
+    cep_destiny: str,
+    weight: str,
+    dimensions: dict,
+    cep_origin: str = vars_map["ORIGIN_CEP"],
+    shipping_date: str = None,
+    package_format: str = "caixa",
+    package_type: str = "Outra Embalagem",
+) -> tuple[str, str]:
+    """Realiza a cotação dos correios reaproveitando o navegador já aberto.
+
+    Funciona como interact_correios, mas só abre o navegador caso ele ainda
+    não esteja aberto (ou não esteja no formulário dos correios). Nas chamadas
+    seguintes o formulário é limpo, e ao final
+    apenas a aba de resultado é fechada, mantendo o navegador pronto para a
+    próxima linha. Cabe a quem chama encerrar o navegador com
+    bot.stop_browser() ao final do processo ou após uma falha.
+
+    Os argumentos e o retorno são os mesmos de interact_correios.
+    """
+
+    ensure_page(bot, URL_CORREIOS, "//input[@name='cepOrigem']", By.XPATH)
+    _reset_correios_form(bot)
+    tab_correios_form = bot.get_tabs()[0]
+
+    _fill_correios_form(
+        bot,
+        service_type,
+        cep_destiny,
+        weight,
+        dimensions,
+        cep_origin,
+        shipping_date,
+        package_format,
+        package_type,
+    )
+    deliver_time, total_price = _read_correios_result(bot)
+
+    # fecha apenas a aba de resultado e volta para o formulário
+    bot.close_page()
+    bot.activate_tab(tab_correios_form)
+
+    return deliver_time, total_price
+
+
+def _reset_correios_form(bot: WebBot) -> None:
+    """Limpa os campos do formulário dos correios já carregado na aba atual."""
+    bot.execute_javascript(
+        "Array.from(document.forms).forEach(function (form) { form.reset(); });"
+    )
+
+
+def _fill_correios_form(
+    bot: WebBot,
+    service_type: str,
+    cep_destiny: str,
+    weight: str,
+    dimensions: dict,
+    cep_origin: str,
+    shipping_date: str,
+    package_format: str,
+    package_type: str,
+) -> None:
+    """Preenche o formulário dos correios e clica em Calcular."""
     # interage com campo "Data de postagem"
     if shipping_date:
         bot.find_element("input#data", By.CSS_SELECTOR).clear()
@@ -99,6 +184,9 @@ def interact_correios(
     # interage com Botão Calcular
     bot.find_element("input.btn2", By.CSS_SELECTOR).click()
 
+
+def _read_correios_result(bot: WebBot) -> tuple[str, str]:
+    """Lê prazo e valor total na aba de resultado aberta pelo site dos correios."""
     # Transfere controle para nova aba que site correios abre
     opened_tabs = bot.get_tabs()
     tab_correios_response = opened_tabs[1]
@@ -122,8 +210,6 @@ def interact_correios(
         By.XPATH,
     ).text
 
-    bot.stop_browser()
-
     # extrair apenas número nas informações do deliver_time
     deliver_time = re.search(r"\+ (\d+)", deliver_time).group(1)
 
@@ -1,8 +1,16 @@
+from contextlib import nullcontext
+
 from pandas import DataFrame
 from botcity.web import WebBot
-from Utils.check_correios_variables import check_variables
-from Utils.interact_correios import interact_correios
+from Utils.check_correios_variables import correios_inputs, validate_correios_inputs
+from Utils.interact_correios import interact_correios, interact_correios_session
 from Utils.IntegratedLogger import IntegratedLogger
+from Utils.browser_pool import BrowserWorkerPool, stop_browser_quietly
+from Utils.persistent_cache import PersistentCache
+from Utils.quote_cache import open_quote_cache, correios_cache_key, apply_cached_quotes
+from Utils.quote_journal import QuoteJournal, store_quote
+from Utils.result_store import ResultStore
+from config import vars_map
 
 
 def interaction_df_correios(
@@ -10,6 +18,10 @@ def interaction_df_correios(
     df_filtered: DataFrame,
     bot: WebBot,
     logger: IntegratedLogger,
+    pool: BrowserWorkerPool = None,
+    results: ResultStore = None,
+    journal: QuoteJournal = None,
+    quote_cache: PersistentCache = None,
 ) -> DataFrame:
     """
     Faz a interação entre a dataframe e o site dos correios.
@@ -17,51 +29,218 @@ def interaction_df_correios(
     Para cada linha da df realiza extração de dados que são utilizados pelo
     bot para extrair cotação e prazo do site dos correios.
 
+    Com CORREIOS_REUSE_SESSION ativo o mesmo navegador é usado para todas as
+    linhas, sendo reiniciado apenas após uma falha ou a cada
+    CORREIOS_RESTART_EVERY cotações.
+
+    Com BROWSER_WORKERS maior que 1 (ou um pool informado) as linhas são
+    distribuídas entre navegadores independentes, ver BrowserWorkerPool.
+
+    Com QUOTE_CACHE_ENABLED ativo as cotações já feitas para a mesma rota,
+    pacote e serviço são lidas do cache e apenas as demais vão ao site.
+
+    Antes de qualquer interação com o navegador todas as linhas são
+    validadas de uma vez (validate_correios_inputs); as reprovadas recebem o
+    motivo no STATUS e não vão ao site.
+
+    Com um journal informado as cotações já registradas nele para as
+    mesmas linhas são reaproveitadas e cada nova cotação é registrada nele.
+
     Args:
         df_output (DataFrame): dataframe pandas com os dados de entrada.
         df_filtered (Dataframe): dataframe pandas que receberá dados de saída.
         bot (WebBot): instância do WebBot Botcity.
         logger (IntegratedLogger): instância do gerenciador de logs.
+        pool (BrowserWorkerPool): pool de navegadores opcional.
+        results (ResultStore): resultados por CNPJ opcionais. Quando
+            informado os resultados são apenas registrados nele e cabe a quem
+            chama escrevê-los no df_output com results.merge_into; caso
+            contrário são escritos no df_output ao final da função.
+        journal (QuoteJournal): journal de cotações opcional, usado para
+            retomar uma execução interrompida.
+        quote_cache (PersistentCache): cache de cotações compartilhado
+            opcional (modo em lote), usado mesmo sem QUOTE_CACHE_ENABLED e
+            não fechado ao final.
 
     Return: dataframe pandas com os dados de saída.
     """
 
+    merge_results = results is None
+    if merge_results:
+        results = ResultStore()
+
+    df_filtered, rejected = validate_correios_inputs(df_filtered)
+    for cnpj, reason in rejected.items():
+        results.set(cnpj, "STATUS", reason)
+    logger.info(
+        f"Variáveis dos correios aprovadas em {len(df_filtered)} linhas, "
+        f"reprovadas em {len(rejected)}"
+    )
+
+    if journal is not None:
+        df_filtered = journal.replay(
+            results,
+            df_filtered,
+            "correios",
+            correios_cache_key,
+            _write_correios_quote,
+            "Correios",
+            logger,
+        )
+
+    if quote_cache is None and not vars_map["QUOTE_CACHE_ENABLED"]:
+        _quote_correios(results, df_filtered, bot, logger, pool, None, journal)
+    else:
+        shared_cache = nullcontext(quote_cache) if quote_cache is not None else None
+        with shared_cache or open_quote_cache() as cache:
+            df_filtered = apply_cached_quotes(
+                results,
+                df_filtered,
+                cache,
+                correios_cache_key,
+                _write_correios_quote,
+                "Correios",
+                logger,
+            )
+            _quote_correios(results, df_filtered, bot, logger, pool, cache, journal)
+            cache.log_stats(logger, "cotações Correios")
+
+    if merge_results:
+        df_output = results.merge_into(df_output)
+    return df_output
+
+
+def _write_correios_quote(results: ResultStore, cnpj: str, quote) -> None:
+    """Registra prazo e valor de uma cotação dos correios."""
+    deliver_time, total_price = quote
+    results.update(
+        cnpj,
+        {
+            "PRAZO DE ENTREGA CORREIOS": deliver_time,
+            "VALOR COTAÇÃO CORREIOS": total_price,
+        },
+    )
+
+
+def _quote_correios(
+    results: ResultStore,
+    df_filtered: DataFrame,
+    bot: WebBot,
+    logger: IntegratedLogger,
+    pool: BrowserWorkerPool,
+    cache: PersistentCache,
+    journal: QuoteJournal = None,
+) -> None:
+    """Escolhe entre o fluxo sequencial e o pool de navegadores."""
+    if pool is not None:
+        return _interaction_df_correios_pool(
+            results, df_filtered, pool, logger, cache, journal
+        )
+    if vars_map["BROWSER_WORKERS"] > 1:
+        with BrowserWorkerPool(vars_map["BROWSER_WORKERS"], logger) as pool:
+            return _interaction_df_correios_pool(
+                results, df_filtered, pool, logger, cache, journal
+            )
+
+    reuse_session = vars_map["CORREIOS_REUSE_SESSION"]
+    restart_every = vars_map["CORREIOS_RESTART_EVERY"]
+    quotes_in_session = 0
+
     for index, row in df_filtered.iterrows():
         cnpj = row["CNPJ"]
-        try:
-            logger.info(
-                f"Inicia teste {index} das variáveis usadas no site dos correios"
-            )
-            (
-                package_dimensions,
-                weight,
-                postal_service,
-                cep_destiny,
-            ) = check_variables(row)
-            logger.info(f"variáveis teste {index} aprovadas")
-        except Exception as err:
-            df_output.loc[df_output["CNPJ"] == cnpj, "STATUS"] = err
-            logger.info("Variáveis não aprovadas")
-            continue
+        package_dimensions, weight, postal_service, cep_destiny = correios_inputs(row)
         try:
             logger.info(f"Inicia iteração {index} no site dos correios")
-            deliver_time, total_price = interact_correios(
-                dimensions=package_dimensions,
-                bot=bot,
-                service_type=postal_service,
-                cep_destiny=cep_destiny,
-                weight=weight,
-            )
-            df_output.loc[df_output["CNPJ"] == cnpj, "PRAZO DE ENTREGA CORREIOS"] = (
-                deliver_time
-            )
-            df_output.loc[df_output["CNPJ"] == cnpj, "VALOR COTAÇÃO CORREIOS"] = (
-                total_price
+            if reuse_session:
+                if restart_every and quotes_in_session >= restart_every:
+                    logger.info("Reiniciando navegador usado no site dos correios")
+                    stop_browser_quietly(bot)
+                    quotes_in_session = 0
+                deliver_time, total_price = interact_correios_session(
+                    dimensions=package_dimensions,
+                    bot=bot,
+                    service_type=postal_service,
+                    cep_destiny=cep_destiny,
+                    weight=weight,
+                )
+                quotes_in_session += 1
+            else:
+                deliver_time, total_price = interact_correios(
+                    dimensions=package_dimensions,
+                    bot=bot,
+                    service_type=postal_service,
+                    cep_destiny=cep_destiny,
+                    weight=weight,
+                )
+            _write_correios_quote(results, cnpj, (deliver_time, total_price))
+            store_quote(
+                cache,
+                journal,
+                "correios",
+                correios_cache_key(row),
+                cnpj,
+                [deliver_time, total_price],
             )
 
             logger.info(f"dados extraídos na iteração {index} no site dos correios.")
         except Exception as err:
-            df_output.loc[df_output["CNPJ"] == cnpj, "STATUS"] = err
+            results.set(cnpj, "STATUS", err)
             logger.error(f"problema na iteração {index} no site dos correios")
+            # após uma falha o navegador é reiniciado na próxima linha
+            stop_browser_quietly(bot)
+            quotes_in_session = 0
             continue
-    return df_output
+
+    stop_browser_quietly(bot)
+
+
+def quote_correios_row(bot: WebBot, row) -> tuple[str, str]:
+    """
+    Faz a cotação de uma linha, já validada, no site dos correios.
+
+    Usada pelos workers do BrowserWorkerPool. Após uma falha no site o
+    navegador é fechado, para que a próxima linha comece em um formulário
+    limpo.
+
+    Args:
+        bot (WebBot): instância do WebBot do worker.
+        row (Series): linha da dataframe filtrada dos correios.
+
+    Return:
+        tuple[str, str]: prazo de entrega e valor total.
+    """
+    package_dimensions, weight, postal_service, cep_destiny = correios_inputs(row)
+    try:
+        return interact_correios_session(
+            dimensions=package_dimensions,
+            bot=bot,
+            service_type=postal_service,
+            cep_destiny=cep_destiny,
+            weight=weight,
+        )
+    except Exception:
+        stop_browser_quietly(bot)
+        raise
+
+
+def _interaction_df_correios_pool(
+    results: ResultStore,
+    df_filtered: DataFrame,
+    pool: BrowserWorkerPool,
+    logger: IntegratedLogger,
+    cache: PersistentCache = None,
+    journal: QuoteJournal = None,
+) -> None:
+    """Distribui as cotações dos correios entre os workers do pool."""
+    logger.info(f"Iniciando cotações dos correios com {pool.size} navegadores")
+    rows = [row for _, row in df_filtered.iterrows()]
+    quotes = pool.map(quote_correios_row, rows, key=lambda row: row["CNPJ"])
+    for row, (cnpj, value, err) in zip(rows, quotes):
+        if err is not None:
+            results.set(cnpj, "STATUS", err)
+            continue
+        _write_correios_quote(results, cnpj, value)
+        store_quote(
+            cache, journal, "correios", correios_cache_key(row), cnpj, list(value)
+        )
+    logger.info("Cotações dos correios finalizadas.")
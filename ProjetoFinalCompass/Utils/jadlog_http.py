@@ -0,0 +1,132 @@
+import threading
+from urllib.parse import urljoin
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+from config import vars_map
+from .check_correios_variables import package_dimensions
+from .helper_functions import get_jadlog_value
+
+
+JADLOG_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+# ids dos campos do formulário de simulação, os mesmos usados pelo fluxo com navegador
+JADLOG_FIELD_IDS = ['modalidade', 'valLargura', 'valAltura', 'valComprimento', 'peso',
+                    'destino', 'origem', 'valor_coleta', 'valor_mercadoria']
+
+
+def parse_jadlog_quotation(html:str) -> str:
+    '''Extrai o valor da cotação da página de resultado do simulador do Jadlog
+
+    # Retorno
+        Valor sem o prefixo "R$", com vírgula como separador decimal, igual ao fluxo com navegador
+    '''
+    soup = BeautifulSoup(html, 'html.parser')
+    span = soup.find('span', string=lambda text: text is not None and 'R$' in text)
+    if span is None:
+        raise ValueError('Valor de cotação não encontrado na resposta do Jadlog')
+    return span.get_text().strip().replace('R$ ','').replace('.',',')
+
+
+class JadlogHttpClient:
+    '''Cliente HTTP do simulador do Jadlog, envia o mesmo formulário preenchido pelo navegador
+
+    Na primeira cotação a página de simulação é carregada uma única vez para descobrir o endereço
+    do formulário, os campos ocultos (ex.: ViewState) e o nome de cada campo. As cotações seguintes
+    são apenas um POST cada, reaproveitando a mesma conexão.
+
+    # Atributos
+        url: `str`
+            Endereço da página de simulação, por padrão DEFAULT_URL_JADLOG
+
+        session: `requests.Session`
+            Sessão HTTP keep-alive usada nas requisições
+
+        timeout: `float`
+            Tempo máximo de cada requisição, em segundos
+
+    '''
+
+    def __init__(self, url:str=None, session:requests.Session=None, timeout:float=10):
+        self.url = url or vars_map['DEFAULT_URL_JADLOG']
+        self.session = session or requests.Session()
+        self.session.headers.update(JADLOG_HEADERS)
+        self.timeout = timeout
+        self._action = None
+        self._field_names = {}
+        self._hidden_fields = {}
+        self._submit = {}
+        self._lock = threading.Lock()
+
+    def _read_form(self, html:str):
+        '''Atualiza o endereço, os campos ocultos e os nomes dos campos a partir do HTML do formulário'''
+        soup = BeautifulSoup(html, 'html.parser')
+        origin = soup.find(id='origem')
+        form = origin.find_parent('form') if origin is not None else None
+        if form is None:
+            return False
+        self._action = urljoin(self.url, form.get('action') or self.url)
+        self._hidden_fields = {
+            element['name']: element.get('value', '')
+            for element in form.find_all('input', attrs={'type': 'hidden'})
+            if element.get('name')
+        }
+        for field_id in JADLOG_FIELD_IDS:
+            element = form.find(id=field_id)
+            self._field_names[field_id] = element.get('name', field_id) if element is not None else field_id
+        button = form.find('input', attrs={'value': 'Simular'})
+        self._submit = {button['name']: button.get('value')} if button is not None and button.get('name') else {}
+        return True
+
+    def _load_form(self):
+        response = self.session.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        if not self._read_form(response.text):
+            raise ValueError('Formulário de simulação do Jadlog não encontrado')
+
+    def build_payload(self, serie:pd.Series) -> dict:
+        '''Monta os dados do formulário a partir de uma linha do dataframe filtrado do Jadlog, com as colunas de `parse_package_columns`'''
+        dimensions = package_dimensions(serie)
+        values = {
+            'modalidade': get_jadlog_value(serie['TIPO DE SERVIÇO JADLOG']),
+            'valLargura': dimensions['width'],
+            'valAltura': dimensions['height'],
+            'valComprimento': dimensions['length'],
+            'peso': serie['PESO DO PRODUTO'],
+            'destino': serie['CEP'],
+            'origem': vars_map['ORIGIN_CEP'],
+            'valor_coleta': vars_map['PICKUP_VALUE'],
+            'valor_mercadoria': serie['VALOR DO PEDIDO'],
+        }
+        payload = dict(self._hidden_fields)
+        payload.update({self._field_names.get(field_id, field_id): value for field_id, value in values.items()})
+        payload.update(self._submit)
+        return payload
+
+    def quote(self, serie:pd.Series) -> str:
+        '''Realiza uma cotação e retorna o valor no mesmo formato de `fillJadlogForm`'''
+        with self._lock:
+            if self._action is None:
+                self._load_form()
+            payload = self.build_payload(serie)
+            action = self._action
+        response = self.session.post(action, data=payload, timeout=self.timeout)
+        response.raise_for_status()
+        quotation = parse_jadlog_quotation(response.text)
+        # Alguns formulários renovam os campos ocultos a cada resposta
+        with self._lock:
+            self._read_form(response.text)
+        return quotation
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
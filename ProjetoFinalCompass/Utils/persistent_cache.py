@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class PersistentCache:
+    '''Cache chave/valor persistido em SQLite, com validade (TTL), cache negativo e limite de tamanho.
+
+    Os valores são serializados em JSON. Quando o número de entradas passa de `max_entries`
+    as entradas acessadas há mais tempo são removidas (LRU). Pode ser usado por várias threads.
+
+    # Atributos
+
+        * filepath: `PathLike`
+            Caminho do arquivo SQLite, a pasta é criada caso não exista.
+
+        * table: `str`
+            Nome da tabela usada, permite que vários caches dividam o mesmo arquivo.
+
+        * ttl: `float`
+            Validade em segundos das entradas positivas.
+
+        * negative_ttl: `float`
+            Validade em segundos das entradas negativas (ex.: CNPJ não encontrado).
+
+        * max_entries: `int`
+            Número máximo de entradas mantidas no arquivo.
+
+        * clock: `Callable[[], float]`
+            Relógio em segundos usado nas datas de criação e de acesso, `time.time` por padrão.
+
+        * hits, negative_hits, misses, stale: `int`
+            Contadores de uso do cache desde a abertura.
+
+    '''
+
+    EVICTION_INTERVAL = 100
+
+    def __init__(self, filepath: os.PathLike, table: str, ttl: float, negative_ttl: float, max_entries: int,
+                 clock=time.time):
+        self.filepath = filepath
+        self.table = table
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+        self._connection = sqlite3.connect(filepath, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            f'CREATE TABLE IF NOT EXISTS "{table}" ('
+            'key TEXT PRIMARY KEY, value TEXT, negative INTEGER NOT NULL, '
+            'created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+        )
+        self._connection.execute(f'CREATE INDEX IF NOT EXISTS "{table}_accessed_at" ON "{table}" (accessed_at)')
+
+    def get(self, key: str) -> tuple:
+        '''Busca uma entrada válida no cache.
+
+        # Retorno
+
+            Tupla `(encontrado, valor)`. Para entradas negativas retorna `(True, None)`;
+            para entradas ausentes ou vencidas retorna `(False, None)`.
+        '''
+        now = self.clock()
+        with self._lock:
+            row = self._connection.execute(
+                f'SELECT value, negative, created_at FROM "{self.table}" WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+
+            value, negative, created_at = row
+            ttl = self.negative_ttl if negative else self.ttl
+            if now - created_at > ttl:
+                self.stale += 1
+                return False, None
+
+            self._connection.execute(f'UPDATE "{self.table}" SET accessed_at = ? WHERE key = ?', (now, key))
+            if negative:
+                self.negative_hits += 1
+                return True, None
+            self.hits += 1
+            return True, json.loads(value)
+
+    def set(self, key: str, value):
+        '''Grava (ou substitui) uma entrada positiva.'''
+        self._write(key, json.dumps(value, ensure_ascii=False), negative=False)
+
+    def set_negative(self, key: str):
+        '''Grava uma entrada negativa, válida por `negative_ttl` segundos.'''
+        self._write(key, None, negative=True)
+
+    def _write(self, key: str, value: str, negative: bool):
+        now = self.clock()
+        with self._lock:
+            self._connection.execute(
+                f'INSERT OR REPLACE INTO "{self.table}" (key, value, negative, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (key, value, int(negative), now, now)
+            )
+            self._writes += 1
+            if self._writes % self.EVICTION_INTERVAL == 0:
+                self._evict()
+
+    def _evict(self):
+        '''Remove as entradas menos usadas recentemente além de `max_entries`. Chamar com o lock adquirido.'''
+        self._connection.execute(
+            f'DELETE FROM "{self.table}" WHERE key IN '
+            f'(SELECT key FROM "{self.table}" ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def stats(self) -> dict:
+        '''Retorna os contadores de uso do cache.'''
+        return {
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'writes': self._writes,
+        }
+
+    def log_stats(self, logger, label: str):
+        '''Registra os contadores de uso do cache no log.'''
+        stats = self.stats()
+        logger.info(
+            f"Cache {label}: {stats['hits']} acertos, {stats['negative_hits']} acertos negativos, "
+            f"{stats['misses']} ausentes, {stats['stale']} vencidos, {stats['writes']} gravações."
+        )
+
+    def close(self):
+        '''Aplica o limite de tamanho e fecha a conexão com o arquivo.'''
+        with self._lock:
+            self._evict()
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,86 @@
+import os
+
+import pandas as pd
+
+from config import vars_map
+from Utils.persistent_cache import PersistentCache
+from Utils.result_store import ResultStore
+
+
+DIMENSIONS_COLUMN = 'DIMENSÕES CAIXA (altura x largura x comprimento cm)'
+
+
+def open_quote_cache() -> PersistentCache:
+    '''Abre o cache em disco das cotações dos correios e do Jadlog com as configurações do `vars_map`.'''
+    return PersistentCache(
+        filepath=os.path.join(vars_map['DEFAULT_CACHE_PATH'], 'quote_cache.sqlite'),
+        table='quotes',
+        ttl=vars_map['QUOTE_CACHE_TTL_HOURS'] * 3600,
+        negative_ttl=0,
+        max_entries=vars_map['QUOTE_CACHE_MAX_ENTRIES']
+    )
+
+
+def _normalize(value) -> str:
+    '''Normaliza um campo da chave: sem espaços, minúsculo e com ponto como separador decimal.'''
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    return str(value).strip().lower().replace(' ', '').replace(',', '.')
+
+
+def _normalize_cep(cep) -> str:
+    return ''.join(char for char in str(cep) if char.isdigit()).zfill(8)
+
+
+def quote_cache_key(carrier:str, origin_cep, destiny_cep, dimensions, weight, service, declared_value, *extra) -> str:
+    '''Monta a chave do cache de cotações.
+
+    A chave é formada por transportadora, CEP de origem, CEP de destino, dimensões, peso,
+    tipo de serviço e valor declarado. Campos adicionais que alteram o preço podem ser
+    passados em `extra`.
+    '''
+    parts = [carrier, _normalize_cep(origin_cep), _normalize_cep(destiny_cep),
+             _normalize(dimensions), _normalize(weight), _normalize(service), _normalize(declared_value)]
+    parts.extend(_normalize(value) for value in extra)
+    return '|'.join(parts)
+
+
+def correios_cache_key(row:pd.Series) -> str:
+    '''Chave de uma linha do dataframe dos correios. O site dos correios não usa valor declarado.'''
+    return quote_cache_key('correios', vars_map['ORIGIN_CEP'], row['CEP'], row[DIMENSIONS_COLUMN],
+                           row['PESO DO PRODUTO'], row['TIPO DE SERVIÇO CORREIOS'], None)
+
+
+def jadlog_cache_key(serie:pd.Series) -> str:
+    '''Chave de uma linha do dataframe do Jadlog. O valor de coleta também entra na chave pois altera o preço.'''
+    return quote_cache_key('jadlog', vars_map['ORIGIN_CEP'], serie['CEP'], serie[DIMENSIONS_COLUMN],
+                           serie['PESO DO PRODUTO'], serie['TIPO DE SERVIÇO JADLOG'], serie['VALOR DO PEDIDO'],
+                           vars_map['PICKUP_VALUE'])
+
+
+def apply_cached_quotes(results:ResultStore, df_filtered:pd.DataFrame, cache:PersistentCache,
+                        key_function, write_function, carrier_label:str, logger) -> pd.DataFrame:
+    '''Registra nos resultados as cotações encontradas no cache.
+
+    Args:
+        results (ResultStore): Resultados por CNPJ que serão escritos no dataframe de saída.
+        df_filtered (pd.DataFrame): Linhas a serem cotadas.
+        cache (PersistentCache): Cache de cotações.
+        key_function (Callable): Função que monta a chave de uma linha.
+        write_function (Callable): Função `(results, cnpj, valor)` que registra uma cotação.
+        carrier_label (str): Nome da transportadora usado no STATUS, ex.: "Correios".
+        logger (IntegratedLogger): Logger usado para gerar arquivos de log.
+
+    Returns:
+        pd.DataFrame: Linhas de `df_filtered` que não estavam no cache e precisam ir ao site.
+    '''
+    missing_index = []
+    for index, row in df_filtered.iterrows():
+        found, value = cache.get(key_function(row))
+        if found and value is not None:
+            write_function(results, row['CNPJ'], value)
+            results.append_status(row['CNPJ'], f'Cotação {carrier_label} obtida do cache')
+        else:
+            missing_index.append(index)
+    logger.info(f"Cotações {carrier_label} em cache: {len(df_filtered) - len(missing_index)} de {len(df_filtered)}")
+    return df_filtered.loc[missing_index]
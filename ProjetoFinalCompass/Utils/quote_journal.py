@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from Utils.IntegratedLogger import IntegratedLogger
+from Utils.result_store import ResultStore
+
+
+class QuoteJournal:
+    '''Journal (JSONL, somente acréscimo) das cotações feitas nos sites, uma linha por cotação.
+
+    Cada linha guarda a transportadora, o CNPJ, um hash dos dados da linha de entrada usados na
+    cotação e o resultado. Ao reiniciar sobre o mesmo arquivo de entrada o journal é lido de volta e
+    só as linhas que ainda não têm cotação vão ao site (ver `replay`).
+
+    Cada registro é escrito e enviado ao sistema operacional na hora; o `fsync` para o disco é feito
+    em lotes, a cada `fsync_every` registros ou `fsync_interval` segundos, o que for primeiro. Uma
+    queda do processo não perde nada do que já foi escrito; uma queda da máquina perde no máximo o
+    último lote. Uma última linha incompleta é ignorada na leitura.
+
+    # Atributos
+
+        * filepath: `PathLike`
+            Arquivo .jsonl do journal.
+
+        * fsync_every: `int`
+            Número de registros entre dois fsync.
+
+        * fsync_interval: `float`
+            Tempo máximo, em segundos, entre dois fsync.
+
+    '''
+
+    def __init__(self, filepath:os.PathLike, fsync_every:int=50, fsync_interval:float=1.0):
+        self.filepath = filepath
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+        self._entries = self._read()
+        self._file = open(filepath, 'a', encoding='utf-8')
+        if self._ends_mid_line():
+            # Termina a linha incompleta para que o próximo registro comece em uma linha nova
+            self._file.write('\n')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    @staticmethod
+    def row_hash(key:str) -> str:
+        '''Hash dos dados de entrada da cotação (a chave do cache de cotações).'''
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+    def _read(self) -> dict:
+        entries = {}
+        if not os.path.exists(self.filepath):
+            return entries
+        with open(self.filepath, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Linha incompleta de uma execução interrompida
+                    continue
+                entries[(entry['carrier'], entry['cnpj'], entry['row_hash'])] = entry['value']
+        return entries
+
+    def _ends_mid_line(self) -> bool:
+        if not os.path.getsize(self.filepath):
+            return False
+        with open(self.filepath, 'rb') as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) != b'\n'
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, carrier:str, cnpj:str, key:str) -> tuple:
+        '''Retorna `(encontrado, valor)` da cotação registrada para a linha.'''
+        entry_key = (carrier, cnpj, self.row_hash(key))
+        return entry_key in self._entries, self._entries.get(entry_key)
+
+    def record(self, carrier:str, cnpj:str, key:str, value):
+        '''Acrescenta uma cotação feita com sucesso ao journal.'''
+        row_hash = self.row_hash(key)
+        line = json.dumps({'carrier': carrier, 'cnpj': cnpj, 'row_hash': row_hash, 'value': value,
+                           'saved_at': datetime.now().isoformat(timespec='seconds')}, ensure_ascii=False)
+        with self._lock:
+            self._entries[(carrier, cnpj, row_hash)] = value
+            self._file.write(line + '\n')
+            self._file.flush()
+            self._pending += 1
+            if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            if self._pending:
+                self._sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def replay(self, results:ResultStore, df_filtered:pd.DataFrame, carrier:str, key_function,
+               write_function, carrier_label:str, logger:IntegratedLogger) -> pd.DataFrame:
+        '''Registra nos resultados as cotações já presentes no journal.
+
+        Args:
+            results (ResultStore): Resultados por CNPJ que serão escritos no dataframe de saída.
+            df_filtered (pd.DataFrame): Linhas a serem cotadas.
+            carrier (str): Transportadora gravada no journal, ex.: "correios".
+            key_function (Callable): Função que monta a chave de uma linha (a mesma do cache).
+            write_function (Callable): Função `(results, cnpj, valor)` que registra uma cotação.
+            carrier_label (str): Nome da transportadora usado nos logs, ex.: "Correios".
+            logger (IntegratedLogger): Logger usado para gerar arquivos de log.
+
+        Returns:
+            pd.DataFrame: Linhas de `df_filtered` sem cotação no journal.
+        '''
+        missing_index = []
+        for index, row in df_filtered.iterrows():
+            found, value = self.get(carrier, row['CNPJ'], key_function(row))
+            if found:
+                write_function(results, row['CNPJ'], value)
+            else:
+                missing_index.append(index)
+        logger.info(f"Cotações {carrier_label} recuperadas do journal: {len(df_filtered) - len(missing_index)} de {len(df_filtered)}")
+        return df_filtered.loc[missing_index]
+
+
+def store_quote(cache, journal:QuoteJournal, carrier:str, key:str, cnpj:str, value):
+    '''Grava uma cotação feita no site no cache de cotações e no journal, quando existirem.'''
+    if cache is not None:
+        cache.set(key, value)
+    if journal is not None:
+        journal.record(carrier, cnpj, key, value)
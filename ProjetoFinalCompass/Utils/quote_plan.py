@@ -0,0 +1,68 @@
+import pandas as pd
+
+from Utils.IntegratedLogger import IntegratedLogger
+from Utils.result_store import ResultStore
+
+
+class QuotePlan:
+    '''Agrupa as linhas de uma transportadora em pedidos de cotação únicos.
+
+    Linhas com a mesma chave de cotação (`correios_cache_key` / `jadlog_cache_key`: CEP de destino,
+    dimensões, peso, serviço e, no Jadlog, valor do pedido) têm a mesma resposta do site, comum em
+    empresas de um mesmo grupo no mesmo endereço. Só a primeira linha de cada grupo vai ao site e,
+    depois das cotações, `fan_out` copia o resultado dela para as demais linhas do grupo.
+
+    Os resultados são por CNPJ, então uma linha cujo CNPJ também é o de outro pedido único mantém o
+    resultado do próprio pedido.
+
+    # Atributos
+
+        * unique_rows: `pd.DataFrame`
+            Uma linha por pedido de cotação, a primeira de cada grupo.
+
+        * members: `dict`
+            CNPJ da linha enviada ao site -> CNPJs que recebem o mesmo resultado.
+
+    # Exemplo
+
+        plan = QuotePlan(df_correios, correios_cache_key, 'Correios', logger)
+        interaction_df_correios(df_filtered=plan.unique_rows, df_output=None, bot=bot, logger=logger, results=results)
+        plan.fan_out(results)
+
+    '''
+
+    def __init__(self, df_filtered:pd.DataFrame, key_function, carrier_label:str, logger:IntegratedLogger=None):
+        self.carrier_label = carrier_label
+        self.rows = len(df_filtered)
+        if key_function is None or df_filtered.empty:
+            self.unique_rows = df_filtered
+            self.members = {}
+            return
+
+        keys = pd.Series([key_function(row) for _, row in df_filtered.iterrows()], index=df_filtered.index, dtype=object)
+        first = ~keys.duplicated()
+        self.unique_rows = df_filtered[first]
+        representative = dict(zip(keys[first], self.unique_rows['CNPJ']))
+        representatives = set(representative.values())
+
+        self.members = {}
+        for key, cnpj in zip(keys[~first], df_filtered.loc[~first, 'CNPJ']):
+            if cnpj not in representatives:
+                self.members.setdefault(representative[key], []).append(cnpj)
+        if logger is not None:
+            self.log(logger)
+
+    @property
+    def saved(self) -> int:
+        '''Número de cotações que deixam de ir ao site.'''
+        return self.rows - len(self.unique_rows)
+
+    def log(self, logger:IntegratedLogger):
+        logger.info(f"Cotações {self.carrier_label}: {self.rows} linhas agrupadas em {len(self.unique_rows)} pedidos únicos, "
+                    f"{self.saved} interações com o site evitadas")
+
+    def fan_out(self, results:ResultStore) -> ResultStore:
+        '''Copia o resultado de cada pedido único para as demais linhas do grupo.'''
+        for cnpj, members in self.members.items():
+            results.copy_to(cnpj, members)
+        return results
@@ -0,0 +1,208 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+# Respostas que indicam sobrecarga ou falha temporária do servidor e podem ser repetidas
+THROTTLE_STATUS = (429, 503)
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value) -> float:
+    '''Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos de espera, ou None.'''
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveRateLimiter:
+    '''Limita as requisições a uma API com um token bucket e concorrência adaptativa (AIMD).
+
+    Cada requisição consome um token do balde, reposto a `rate` tokens por segundo até `burst`, e
+    ocupa uma das vagas de concorrência. `rate` é só a taxa inicial: até o primeiro 429/503 cada
+    sucesso soma 1 requisição/s (partida lenta, a taxa dobra a cada janela), até `max_rate`, que por
+    padrão não tem limite. Respostas 429/503 reduzem pela metade a taxa e o número de vagas (no máximo
+    uma redução por `cooldown` segundos, para que várias respostas da mesma rajada contem uma vez só);
+    depois disso cada sucesso devolve um pouco de cada (aumento aditivo). Um `Retry-After` recebido
+    pausa todas as requisições até o horário indicado.
+
+    As novas tentativas usam espera exponencial com jitter e são limitadas por requisição
+    (`max_retries`) e no total da etapa (`retry_budget`), para que uma API fora do ar não
+    prenda o processo.
+
+    # Exemplo
+
+        limiter = AdaptiveRateLimiter(rate=10, burst=10, max_concurrency=8, max_retries=4, retry_budget=100, max_rate=100)
+        for attempt in range(limiter.max_retries + 1):
+            with limiter.slot():
+                response = session.get(url)
+            limiter.record(response.status_code, response.headers.get('Retry-After'))
+            ...
+        limiter.log_stats(logger, 'BrasilAPI')
+
+    # Atributos
+
+        * rate: `float`
+            Taxa atual, em requisições por segundo; começa na taxa informada.
+
+        * max_rate: `float`
+            Teto da taxa, `inf` quando não informado.
+
+        * concurrency: `float`
+            Número atual de vagas para requisições simultâneas.
+
+        * max_retries: `int`
+            Máximo de novas tentativas por requisição.
+
+        * retry_budget: `int`
+            Máximo de novas tentativas somando todas as requisições.
+
+    '''
+
+    def __init__(self, rate:float, burst:int, max_concurrency:int, max_retries:int=4, retry_budget:int=100,
+                 backoff_base:float=0.5, backoff_max:float=30.0, min_rate:float=None, cooldown:float=1.0,
+                 max_rate:float=None):
+        self.max_rate = float('inf') if not max_rate else max(float(max_rate), float(rate))
+        self.min_rate = float(rate) / 10 if min_rate is None else min(float(min_rate), float(rate))
+        self.rate = float(rate)
+        self.slow_start = True
+        self.burst = max(1, int(burst))
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.concurrency = float(self.max_concurrency)
+        self.max_retries = max(0, int(max_retries))
+        self.retry_budget = max(0, int(retry_budget))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cooldown = cooldown
+
+        self._condition = threading.Condition()
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease = float('-inf')
+        self._in_flight = 0
+
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.retries = 0
+        self.exhausted = 0
+        self.waited = 0.0
+        self.min_concurrency_seen = self.max_concurrency
+
+    def _refill(self, now:float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self):
+        '''Espera por um token e por uma vaga de concorrência.'''
+        started = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                elif self._in_flight >= int(self.concurrency):
+                    delay = None
+                elif self._tokens < 1:
+                    delay = (1 - self._tokens) / self.rate
+                else:
+                    self._tokens -= 1
+                    self._in_flight += 1
+                    self.requests += 1
+                    break
+                self._condition.wait(delay)
+            self.waited += time.monotonic() - started
+
+    def release(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        '''Ocupa uma vaga durante uma requisição.'''
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record(self, status_code:int=None, retry_after=None):
+        '''Ajusta taxa e concorrência pelo resultado de uma requisição (`None` para erro de rede).'''
+        with self._condition:
+            now = time.monotonic()
+            if status_code in THROTTLE_STATUS:
+                self.throttled += 1
+                wait = parse_retry_after(retry_after)
+                if wait:
+                    self._blocked_until = max(self._blocked_until, now + wait)
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self._refill(now)
+                    self.slow_start = False
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self.concurrency = max(1.0, self.concurrency / 2)
+                    self.min_concurrency_seen = min(self.min_concurrency_seen, int(self.concurrency))
+            elif status_code is None or status_code in RETRYABLE_STATUS:
+                self.errors += 1
+            else:
+                self._refill(now)
+                if self.slow_start:
+                    # Partida lenta: +1 requisição/s e +1 vaga por sucesso, até o primeiro 429/503
+                    self.rate = min(self.max_rate, self.rate + 1)
+                    self.concurrency = min(float(self.max_concurrency), self.concurrency + 1)
+                else:
+                    # Aumento aditivo: cerca de +1 requisição/s e +1 vaga a cada "janela" de sucessos
+                    self.rate = min(self.max_rate, self.rate + 1 / self.rate)
+                    self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / self.concurrency)
+            self._condition.notify_all()
+
+    def retry_delay(self, attempt:int, retry_after=None) -> float:
+        '''Tempo de espera antes da nova tentativa `attempt` (1, 2, ...), ou None se não houver mais tentativas.'''
+        with self._condition:
+            if attempt > self.max_retries or self.retries >= self.retry_budget:
+                self.exhausted += 1
+                return None
+            self.retries += 1
+        # Jitter completo: espera aleatória entre 0 e o teto exponencial
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        wait = parse_retry_after(retry_after)
+        return max(delay, wait) if wait is not None else delay
+
+    def add_retry_budget(self, retries:int):
+        '''Aumenta o orçamento total de novas tentativas, usado quando o limitador é compartilhado entre etapas.'''
+        with self._condition:
+            self.retry_budget += max(0, int(retries))
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                'requests': self.requests, 'throttled': self.throttled, 'errors': self.errors,
+                'retries': self.retries, 'exhausted': self.exhausted, 'waited': self.waited,
+                'rate': self.rate, 'concurrency': int(self.concurrency),
+                'min_concurrency': self.min_concurrency_seen,
+            }
+
+    def log_stats(self, logger, label:str):
+        '''Registra as métricas do limitador no log.'''
+        stats = self.stats()
+        logger.info(
+            f"Limitador {label}: {stats['requests']} requisições, {stats['throttled']} limitadas (429/503), "
+            f"{stats['errors']} erros temporários, {stats['retries']} novas tentativas, "
+            f"{stats['exhausted']} sem tentativas restantes, {stats['waited']:.1f}s de espera somada, "
+            f"taxa final {stats['rate']:.1f}/s, concorrência final {stats['concurrency']} (mínima {stats['min_concurrency']})."
+        )
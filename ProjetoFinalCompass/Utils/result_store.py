@@ -0,0 +1,126 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class ResultStore:
+    '''Acumula os resultados das cotações por CNPJ para serem escritos no df_output de uma só vez.
+
+    Escrever com `df_output.loc[df_output['CNPJ'] == cnpj, coluna]` percorre o dataframe inteiro a
+    cada resultado. Aqui cada escrita é uma operação em dicionário, protegida por lock para que
+    várias threads (workers de navegador, etapas em paralelo) possam usar o mesmo objeto, e a
+    junção com o df_output é feita uma única vez em `merge_into`.
+
+    # Exemplo
+
+        results = ResultStore()
+        results.set(cnpj, 'VALOR COTAÇÃO JADLOG', 'R$ 10,00')
+        results.append_status(cnpj, 'Cotação Jadlog obtida do cache')
+        df_output = results.merge_into(df_output)
+
+    '''
+
+    STATUS_COLUMN = 'STATUS'
+    STATUS_SEPARATOR = ' | '
+
+    def __init__(self):
+        self._values = {}
+        self._status_appends = {}
+        self._lock = threading.Lock()
+
+    def set(self, cnpj, column:str, value):
+        '''Define o valor de uma coluna para o CNPJ. Valores da coluna STATUS são sempre gravados como texto.'''
+        if column == self.STATUS_COLUMN:
+            value = str(value)
+        with self._lock:
+            self._values.setdefault(cnpj, {})[column] = value
+            if column == self.STATUS_COLUMN:
+                self._status_appends.pop(cnpj, None)
+
+    def update(self, cnpj, values:dict):
+        '''Define o valor de várias colunas para o CNPJ.'''
+        for column, value in values.items():
+            self.set(cnpj, column, value)
+
+    def append_status(self, cnpj, message:str):
+        '''Acrescenta uma mensagem ao STATUS do CNPJ, sem apagar o que já estiver escrito.'''
+        with self._lock:
+            values = self._values.get(cnpj, {})
+            if self.STATUS_COLUMN in values:
+                values[self.STATUS_COLUMN] = f'{values[self.STATUS_COLUMN]}{self.STATUS_SEPARATOR}{message}'
+            else:
+                self._status_appends.setdefault(cnpj, []).append(str(message))
+
+    def copy_to(self, cnpj, targets):
+        '''Copia tudo o que foi registrado para o CNPJ (valores e mensagens acrescentadas) para outros CNPJs.'''
+        with self._lock:
+            values = self._values.get(cnpj)
+            appends = self._status_appends.get(cnpj)
+            for target in targets:
+                if target == cnpj:
+                    continue
+                if values is not None:
+                    self._values.setdefault(target, {}).update(values)
+                if appends is not None:
+                    self._status_appends[target] = list(appends)
+
+    def get(self, cnpj, column:str, default=None):
+        with self._lock:
+            return self._values.get(cnpj, {}).get(column, default)
+
+    def __len__(self):
+        with self._lock:
+            return len(set(self._values) | set(self._status_appends))
+
+    def to_frame(self) -> pd.DataFrame:
+        '''Retorna os valores acumulados como DataFrame indexado por CNPJ (sem as mensagens acrescentadas).'''
+        with self._lock:
+            return pd.DataFrame.from_dict(self._values, orient='index')
+
+    def to_records(self) -> pd.DataFrame:
+        '''Retorna tudo o que foi registrado, inclusive as mensagens acrescentadas, em formato longo
+        (CNPJ, COLUMN, VALUE, APPEND), usado para gravar checkpoints.'''
+        with self._lock:
+            records = [(cnpj, column, None if value is None else str(value), False)
+                       for cnpj, values in self._values.items() for column, value in values.items()]
+            records += [(cnpj, self.STATUS_COLUMN, message, True)
+                        for cnpj, messages in self._status_appends.items() for message in messages]
+        return pd.DataFrame(records, columns=['CNPJ', 'COLUMN', 'VALUE', 'APPEND'])
+
+    @classmethod
+    def from_records(cls, records:pd.DataFrame) -> 'ResultStore':
+        '''Reconstrói um ResultStore a partir de `to_records`.'''
+        store = cls()
+        for cnpj, column, value, append in records[['CNPJ', 'COLUMN', 'VALUE', 'APPEND']].itertuples(index=False):
+            if append:
+                store.append_status(cnpj, value)
+            else:
+                store.set(cnpj, column, value)
+        return store
+
+    def merge_into(self, df_output:pd.DataFrame) -> pd.DataFrame:
+        '''Escreve os resultados acumulados no df_output, uma coluna por vez, com junção vetorizada pelo CNPJ.
+
+        # Retorno
+
+            O próprio df_output atualizado.
+        '''
+        with self._lock:
+            updates = pd.DataFrame.from_dict(self._values, orient='index')
+            appends = pd.Series({cnpj: self.STATUS_SEPARATOR.join(messages) for cnpj, messages in self._status_appends.items()}, dtype=object)
+
+        cnpjs = df_output['CNPJ']
+        for column in updates.columns:
+            new_values = cnpjs.map(updates[column].dropna())
+            if column not in df_output.columns:
+                df_output[column] = None
+            df_output[column] = new_values.where(new_values.notna(), df_output[column])
+
+        if not appends.empty:
+            new_messages = cnpjs.map(appends)
+            current = df_output[self.STATUS_COLUMN]
+            has_current = current.notna() & (current.astype(str) != '')
+            combined = np.where(has_current, current.astype(str) + self.STATUS_SEPARATOR + new_messages.astype(str), new_messages)
+            df_output[self.STATUS_COLUMN] = current.where(new_messages.isna(), combined)
+        return df_output
@@ -4,11 +4,12 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import WebDriverException
 import time
 import logging
 import os
 from config import vars_map
+from Utils.result_store import ResultStore
 
 # Configuração de logging
 # log_file_path = r"C:\RPA\RPA_Valor_de_Cotacao\ProjetoFinalCompass\log\arquivo_de_log.txt"
@@ -65,6 +66,85 @@ def fill_form_data(driver, data,logger):
             logger.error(f"Erro ao inserir dados da linha {index + 1}: {e}")
             break #para a execução do for caso encontre um erro.
 
+# Campo do formulário (atributo ng-reflect-name) e coluna do dataframe que o preenche
+FORM_FIELDS = {
+    'labelFirstName': 'RAZÃO SOCIAL',
+    'labelLastName': 'SITUAÇÃO CADASTRAL',
+    'labelCompanyName': 'NOME FANTASIA',
+    'labelRole': 'DESCRIÇÃO MATRIZ FILIAL',
+    'labelAddress': 'ENDEREÇO',
+    'labelEmail': 'E-MAIL',
+    'labelPhone': 'TELEFONE + DDD',
+}
+
+# Preenche e envia várias linhas em uma única chamada ao navegador. O valor é gravado pelo setter nativo
+# do input e seguido dos eventos input/change, para que o Angular do site registre o valor. Retorna,
+# para cada linha, null em caso de sucesso ou a mensagem de erro.
+FILL_ROWS_JS = """
+var rows = arguments[0];
+var setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+return rows.map(function (row) {
+    try {
+        Object.keys(row).forEach(function (name) {
+            var input = document.querySelector('input[ng-reflect-name="' + name + '"]');
+            if (!input) { throw new Error('Campo ' + name + ' não encontrado'); }
+            setValue.call(input, row[name]);
+            input.dispatchEvent(new Event('input', {bubbles: true}));
+            input.dispatchEvent(new Event('change', {bubbles: true}));
+        });
+        var submit = document.querySelector('input[value="Submit"]');
+        if (!submit) { throw new Error('Botão Submit não encontrado'); }
+        submit.click();
+        return null;
+    } catch (error) {
+        return String(error.message || error);
+    }
+});
+"""
+
+
+def form_rows(data):
+    """Converte as linhas do dataframe em dicionários {campo do formulário: valor em texto}."""
+    columns = data.reindex(columns=list(FORM_FIELDS.values()))
+    columns = columns.astype(object).where(columns.notna(), '').astype(str)
+    columns.columns = list(FORM_FIELDS)
+    return columns.to_dict('records')
+
+def fill_form_data_batched(driver, data, logger, batch_size=10):
+    """Preenche o formulário com uma execução de script por lote de linhas.
+
+    Diferente de fill_form_data, uma linha com erro não interrompe as demais. Retorna uma Series,
+    com o mesmo índice de `data`, com o status de cada linha ("Sucesso" ou "Falha: <motivo>").
+    """
+    logger.info(f"Preenchendo formulário em lotes de {batch_size} linhas")
+    batch_size = max(1, int(batch_size))
+    rows = form_rows(data)
+    status = pd.Series('Sucesso', index=data.index, dtype=object)
+    for start in range(0, len(rows), batch_size):
+        index = data.index[start:start + batch_size]
+        try:
+            errors = driver.execute_script(FILL_ROWS_JS, rows[start:start + batch_size])
+        except WebDriverException as e:
+            errors = [getattr(e, 'msg', None) or type(e).__name__] * len(index)
+        for row_index, error in zip(index, errors):
+            if error:
+                status[row_index] = f"Falha: {error}"
+                cnpj = f" (CNPJ {data.at[row_index, 'CNPJ']})" if 'CNPJ' in data.columns else ''
+                logger.info(f"Erro ao inserir dados da linha {row_index + 1}{cnpj}: {error}")
+    logger.info(f"{(status == 'Sucesso').sum()} de {len(status)} linhas inseridas com sucesso")
+    return status
+
+def failed_rows_results(data, status):
+    """Registra no STATUS de cada CNPJ as linhas que não foram inseridas no formulário.
+
+    Retorna um ResultStore, para que as falhas sejam escritas no df_output junto com as cotações.
+    """
+    results = ResultStore()
+    failed = status[status != 'Sucesso']
+    for cnpj, message in zip(data.loc[failed.index, 'CNPJ'], failed):
+        results.append_status(cnpj, f"RPA Challenge: {message}")
+    return results
+
 def capture_execution_time(driver,logger):
     """Captura o tempo de execução exibido no site."""
     logger.info("Capturando tempo de execução")
@@ -83,7 +163,7 @@ def take_success_screenshot(driver, image_path):
 def initialize_browser(logger):
     """Inicializa o navegador Chrome."""
     logger.info("Inicializando navegador Chrome")
-    service = Service(ChromeDriverManager().install())
+    service = Service(vars_map['DEFAULT_DRIVER_PATH'])
     driver = webdriver.Chrome(service=service)
     driver.maximize_window()
     logger.info("Navegador Chrome inicializado com sucesso!")
@@ -96,7 +176,11 @@ def close_browser(driver,logger):
     logger.info("Navegador Chrome fechado com sucesso!")
 
 def rpa_challenge(logger,df):
-    """Função principal para orquestrar a execução do script."""
+    """Função principal para orquestrar a execução do script.
+
+    Retorna um ResultStore com as linhas que não foram inseridas no formulário, ou None se o site
+    não pôde ser usado.
+    """
     image_path = r"C:\RPA\RPA_Valor_de_Cotacao\ProjetoFinalCompass\img"
     try:
         data = df
@@ -109,11 +193,12 @@ def rpa_challenge(logger,df):
     try:
         access_website(driver, vars_map['DEFAUT_RPACHALLENGE_URL'],logger)
         #start_challenge(driver,logger)
-        fill_form_data(driver, data,logger)
+        status = fill_form_data_batched(driver, data, logger, vars_map['RPA_CHALLENGE_BATCH_SIZE'])
         #execution_time = capture_execution_time(driver,logger)
         #logger.info(f"Tempo de execução: {execution_time}")
         #take_success_screenshot(driver, image_path,logger)
         logger.info("Execução finalizada com sucesso!")
+        return failed_rows_results(data, status)
     except Exception as e:
         logger.error(f"Processo rpa_challenge")
     finally:
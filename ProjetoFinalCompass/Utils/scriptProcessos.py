@@ -1,16 +1,25 @@
 from dotenv import load_dotenv
 import os
+import time
 from botcity.web import WebBot, By, element_as_select
 from botcity.maestro import BotMaestroSDK
 import pandas as pd
+from selenium.common.exceptions import WebDriverException
 from .helper_functions import *
 from .IntegratedLogger import *
+from .browser_pool import BrowserWorkerPool, ensure_page
+from .check_correios_variables import PARSED_COLUMNS, package_dimensions, parse_package_columns
+from .jadlog_http import JadlogHttpClient
+from .persistent_cache import PersistentCache
+from .quote_cache import open_quote_cache, jadlog_cache_key, apply_cached_quotes
+from .quote_journal import QuoteJournal, store_quote
+from .result_store import ResultStore
 from config import vars_map
 
 
 load_dotenv(override=True)
 
-def catchJadlogPrice(bot:WebBot,maestro:BotMaestroSDK,df_filtered:pd.DataFrame,df_output:pd.DataFrame,logger:IntegratedLogger):
+def catchJadlogPrice(bot:WebBot,maestro:BotMaestroSDK,df_filtered:pd.DataFrame,df_output:pd.DataFrame,logger:IntegratedLogger,pool:BrowserWorkerPool=None,results:ResultStore=None,journal:QuoteJournal=None,quote_cache:PersistentCache=None):
     '''Acessa o site do jadlog e pega a cotação da entrega
     
     # Argumentos
@@ -29,20 +38,77 @@ def catchJadlogPrice(bot:WebBot,maestro:BotMaestroSDK,df_filtered:pd.DataFrame,d
         logger: `IntegratedLogger`
             Logger usado para gerar arquivos de log
         
+        pool: `BrowserWorkerPool`
+            Pool de navegadores opcional. Quando informado, ou com BROWSER_WORKERS maior que 1,
+            as linhas são distribuídas entre navegadores independentes
+        
+        results: `ResultStore`
+            Resultados por CNPJ opcionais. Quando informado os resultados são apenas registrados nele e
+            cabe a quem chama escrevê-los no df_output com `results.merge_into`
+        
+        journal: `QuoteJournal`
+            Journal de cotações opcional. As cotações já registradas nele para as mesmas linhas são
+            reaproveitadas e cada nova cotação é registrada nele
+        
+        quote_cache: `PersistentCache`
+            Cache de cotações compartilhado opcional (modo em lote). É usado mesmo sem QUOTE_CACHE_ENABLED
+            e não é fechado ao final
+        
+        Com JADLOG_BACKEND igual a "http" as cotações são feitas sem navegador, por `JadlogHttpClient`,
+        e só as linhas que falharem são refeitas pelo navegador.
+        
+        Com QUOTE_CACHE_ENABLED ativo as cotações já feitas para a mesma rota, pacote e serviço são lidas
+        do cache e apenas as demais vão ao site.
+        
         # Retorno
             Dataframe de saída editado
     
     '''
     
     
+    cache = quote_cache
+    merge_results = results is None
+    if merge_results:
+        results = ResultStore()
     try:
         # Definição de Constantes
         DEFAULT_URL_JADLOG = vars_map['DEFAULT_URL_JADLOG']
-        PICKUP_VALUE = vars_map['PICKUP_VALUE']
-        ORIGIN_CEP = vars_map['ORIGIN_CEP']
         
         # Main
         logger.info('-'*10 + " Início - catchJadlogPrice " + '-'*10)
+        logger.debug('Reduz o dataframe original para trabalhar somente com as informações necessárias')
+        # As dimensões já vêm convertidas de make_jadlog_correios_dataframes; converte aqui só se faltarem
+        if not set(PARSED_COLUMNS).issubset(df_filtered.columns):
+            df_filtered = parse_package_columns(df_filtered)
+        df_filtered = df_filtered[['CNPJ','TIPO DE SERVIÇO JADLOG','DIMENSÕES CAIXA (altura x largura x comprimento cm)','PESO DO PRODUTO','CEP','VALOR DO PEDIDO'] + PARSED_COLUMNS]
+        logger.debug(df_filtered.columns.__repr__())
+        
+        if journal is not None:
+            df_filtered = journal.replay(results,df_filtered,'jadlog',jadlog_cache_key,_writeJadlogQuote,'Jadlog',logger)
+            if df_filtered.empty:
+                return df_output
+        
+        if cache is None and vars_map['QUOTE_CACHE_ENABLED']:
+            cache = open_quote_cache()
+        if cache is not None:
+            df_filtered = apply_cached_quotes(results,df_filtered,cache,jadlog_cache_key,_writeJadlogQuote,'Jadlog',logger)
+            if df_filtered.empty:
+                return df_output
+        
+        if vars_map['JADLOG_BACKEND'] == 'http':
+            df_filtered = _catchJadlogPriceHttp(df_filtered,results,logger,cache,journal)
+            if df_filtered.empty:
+                return df_output
+            logger.info(f'{len(df_filtered)} cotações Jadlog serão refeitas pelo navegador')
+        
+        if pool is not None:
+            _catchJadlogPricePool(pool,df_filtered,results,logger,cache,journal)
+            return df_output
+        if vars_map['BROWSER_WORKERS'] > 1:
+            with BrowserWorkerPool(vars_map['BROWSER_WORKERS'],logger) as pool:
+                _catchJadlogPricePool(pool,df_filtered,results,logger,cache,journal)
+            return df_output
+        
         # Essa parte considera que nenhum navegador está aberto
         logger.info('Abre o site de simulação do Jadlog')
         bot.browse(DEFAULT_URL_JADLOG)
@@ -52,74 +118,183 @@ def catchJadlogPrice(bot:WebBot,maestro:BotMaestroSDK,df_filtered:pd.DataFrame,d
         if element is None:
             raise Exception('Página não carregada corretamente')
         
-        logger.debug('Reduz o dataframe original para trabalhar somente com as informações necessárias')
-        df_filtered = df_filtered[['CNPJ','TIPO DE SERVIÇO JADLOG','DIMENSÕES CAIXA (altura x largura x comprimento cm)','PESO DO PRODUTO','CEP','VALOR DO PEDIDO']]
-        logger.debug(df_filtered.columns.__repr__())
-        
         logger.info('Tenta preencher informações dos campos')
         for index, serie in df_filtered.iterrows():
             try:
-                logger.debug('Inserindo tipo de serviço jedlog')
-                jadlog_service_select = element_as_select(bot.find_element('#modalidade'))
-                jadlog_value = get_jadlog_value(serie['TIPO DE SERVIÇO JADLOG'])
-                jadlog_service_select.select_by_value(jadlog_value)
-                
-                height, width, lenght = serie['DIMENSÕES CAIXA (altura x largura x comprimento cm)'].split(' x ')
-                logger.debug('Inserindo dimensões do pacote')
-                logger.debug(f'height = {height} | width = {width} | length = {lenght}')
-                width_input = bot.find_element('#valLargura')
-                width_input.clear()
-                width_input.send_keys(width)
-                
-                height_input = bot.find_element('#valAltura')
-                height_input.clear()
-                height_input.send_keys(height)
-                
-                length_input = bot.find_element('#valComprimento')
-                length_input.clear()
-                length_input.send_keys(lenght)
-                
-                logger.debug('Inserindo peso do produto')
-                weight_input = bot.find_element('#peso')
-                weight_input.clear()
-                weight_input.send_keys(serie['PESO DO PRODUTO'])
-                
-                logger.debug('Inserindo CEP de destino')
-                destino_element = bot.find_element('#destino')
-                destino_element.clear()
-                destino_element.send_keys(serie['CEP'])
-                
-                logger.debug('Inserindo CEP de origem')
-                origin_element = bot.find_element('#origem')
-                origin_element.clear()
-                origin_element.send_keys(ORIGIN_CEP)
-                
-                logger.debug(f'Inserindo valor de coleta | {PICKUP_VALUE}')
-                pickup_input = bot.find_element('#valor_coleta')
-                pickup_input.clear()
-                pickup_input.send_keys(PICKUP_VALUE)
-                
-                logger.debug('Inserindo valor do pedido')
-                
-                package_value_input = bot.find_element('#valor_mercadoria')
-                package_value_input.clear()
-                package_value_input.send_keys(serie['VALOR DO PEDIDO'])
-                
-                logger.debug('Clica no botão calcular e pega o valor de cotação')
-                bot.find_element('//input[@value="Simular"]',By.XPATH).click()
-                
-                # Delay necessário senão o valor de cotação pego vai ser o anterior
-                bot.wait(1000)
-                
-                logger.debug('Inserindo valor de cotação')
-                quotation = bot.find_element('//span[contains(text(),"R$")]',By.XPATH).get_attribute('innerText').replace('R$ ','').replace('.',',')
-                df_output.loc[df_output['CNPJ'] == serie['CNPJ'],'VALOR COTAÇÃO JADLOG'] = f'R$ {quotation}'
+                quotation = fillJadlogForm(bot,serie,logger)
+                _writeJadlogQuote(results,serie['CNPJ'],quotation)
+                store_quote(cache,journal,'jadlog',jadlog_cache_key(serie),serie['CNPJ'],quotation)
             except:
-                df_output.loc[df_output['CNPJ'] == serie['CNPJ'],'STATUS'] = f'Falha cotação jadlog'
+                results.set(serie['CNPJ'],'STATUS',f'Falha cotação jadlog')
                 logger.error(process_name='Inserindo valores no site JadLog')
                 continue
         bot.stop_browser()
     except:
         logger.error("Execução de CatchJadlogPrice",bot)
     finally:
-        return df_output
\ No newline at end of file
+        if cache is not None and cache is not quote_cache:
+            cache.log_stats(logger,'cotações Jadlog')
+            cache.close()
+        if merge_results:
+            df_output = results.merge_into(df_output)
+        return df_output
+
+
+def _writeJadlogQuote(results:ResultStore,cnpj:str,quotation:str):
+    '''Registra a cotação do Jadlog nos resultados'''
+    results.set(cnpj,'VALOR COTAÇÃO JADLOG',f'R$ {quotation}')
+
+
+def fillJadlogForm(bot:WebBot,serie:pd.Series,logger:IntegratedLogger) -> str:
+    '''Preenche o formulário de simulação do Jadlog, já aberto no navegador, e retorna a cotação
+    
+    # Argumentos
+        bot: `WebBot`
+            Objeto WebBot com a página de simulação do Jadlog aberta
+        
+        serie: `pd.Series`
+            Linha do dataframe filtrado do Jadlog
+        
+        logger: `IntegratedLogger`
+            Logger usado para gerar arquivos de log
+        
+        # Retorno
+            Valor da cotação sem o prefixo "R$", com vírgula como separador decimal
+    
+    '''
+    PICKUP_VALUE = vars_map['PICKUP_VALUE']
+    ORIGIN_CEP = vars_map['ORIGIN_CEP']
+    
+    logger.debug('Inserindo tipo de serviço jedlog')
+    jadlog_service_select = element_as_select(bot.find_element('#modalidade'))
+    jadlog_value = get_jadlog_value(serie['TIPO DE SERVIÇO JADLOG'])
+    jadlog_service_select.select_by_value(jadlog_value)
+    
+    dimensions = package_dimensions(serie)
+    height, width, lenght = dimensions['height'], dimensions['width'], dimensions['length']
+    logger.debug('Inserindo dimensões do pacote')
+    logger.debug(f'height = {height} | width = {width} | length = {lenght}')
+    width_input = bot.find_element('#valLargura')
+    width_input.clear()
+    width_input.send_keys(width)
+    
+    height_input = bot.find_element('#valAltura')
+    height_input.clear()
+    height_input.send_keys(height)
+    
+    length_input = bot.find_element('#valComprimento')
+    length_input.clear()
+    length_input.send_keys(lenght)
+    
+    logger.debug('Inserindo peso do produto')
+    weight_input = bot.find_element('#peso')
+    weight_input.clear()
+    weight_input.send_keys(serie['PESO DO PRODUTO'])
+    
+    logger.debug('Inserindo CEP de destino')
+    destino_element = bot.find_element('#destino')
+    destino_element.clear()
+    destino_element.send_keys(serie['CEP'])
+    
+    logger.debug('Inserindo CEP de origem')
+    origin_element = bot.find_element('#origem')
+    origin_element.clear()
+    origin_element.send_keys(ORIGIN_CEP)
+    
+    logger.debug(f'Inserindo valor de coleta | {PICKUP_VALUE}')
+    pickup_input = bot.find_element('#valor_coleta')
+    pickup_input.clear()
+    pickup_input.send_keys(PICKUP_VALUE)
+    
+    logger.debug('Inserindo valor do pedido')
+    
+    package_value_input = bot.find_element('#valor_mercadoria')
+    package_value_input.clear()
+    package_value_input.send_keys(serie['VALOR DO PEDIDO'])
+    
+    logger.debug('Clica no botão calcular e pega o valor de cotação')
+    # Apaga a cotação anterior antes de simular, assim qualquer valor "R$" encontrado depois é o novo
+    bot.execute_javascript(JADLOG_CLEAR_RESULT_JS)
+    bot.find_element('//input[@value="Simular"]',By.XPATH).click()
+    
+    logger.debug('Inserindo valor de cotação')
+    quotation = _waitJadlogQuote(bot,vars_map['JADLOG_RESULT_TIMEOUT_MS']).replace('R$ ','').replace('.',',')
+    return quotation
+
+
+# Spans de resultado do simulador: os que contêm "R$"
+JADLOG_RESULT_XPATH = '//span[contains(text(),"R$")]'
+JADLOG_CLEAR_RESULT_JS = f"""
+var spans = document.evaluate('{JADLOG_RESULT_XPATH}', document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+for (var i = 0; i < spans.snapshotLength; i++) {{ spans.snapshotItem(i).textContent = ''; }}
+"""
+JADLOG_READ_RESULT_JS = f"""
+var span = document.evaluate('{JADLOG_RESULT_XPATH}', document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+return span ? span.innerText : null;
+"""
+
+
+def _waitJadlogQuote(bot:WebBot,timeout_ms:int,poll_ms:int=50) -> str:
+    '''Espera a cotação aparecer depois de clicar em "Simular" e retorna o texto do span, ex.: "R$ 45.90"
+    
+    Funciona tanto quando o resultado chega por recarga da página quanto por atualização parcial,
+    e retorna assim que o valor aparece em vez de esperar um tempo fixo.
+    
+    # Argumentos
+        timeout_ms: `int`
+            Tempo máximo de espera pelo resultado, em milissegundos
+    
+    '''
+    deadline = time.monotonic() + timeout_ms / 1000
+    while True:
+        try:
+            quotation = bot.execute_javascript(JADLOG_READ_RESULT_JS)
+        except WebDriverException:
+            # A página pode estar sendo recarregada com o resultado
+            quotation = None
+        if quotation:
+            return quotation
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f'Cotação do Jadlog não apareceu em {timeout_ms} ms')
+        bot.wait(poll_ms)
+
+
+def _catchJadlogPricePool(pool:BrowserWorkerPool,df_filtered:pd.DataFrame,results:ResultStore,logger:IntegratedLogger,cache:PersistentCache=None,journal:QuoteJournal=None):
+    '''Distribui as cotações do Jadlog entre os workers do pool e registra os resultados'''
+    logger.info(f'Iniciando cotações Jadlog com {pool.size} navegadores')
+    
+    def quote(bot:WebBot,serie:pd.Series):
+        ensure_page(bot,vars_map['DEFAULT_URL_JADLOG'],'#modalidade')
+        return fillJadlogForm(bot,serie,logger)
+    
+    rows = [serie for _, serie in df_filtered.iterrows()]
+    quotes = pool.map(quote,rows,key=lambda serie:serie['CNPJ'])
+    for serie, (cnpj, quotation, err) in zip(rows,quotes):
+        if err is not None:
+            results.set(cnpj,'STATUS',f'Falha cotação jadlog')
+        else:
+            _writeJadlogQuote(results,cnpj,quotation)
+            store_quote(cache,journal,'jadlog',jadlog_cache_key(serie),cnpj,quotation)
+    logger.info('Cotações Jadlog finalizadas')
+
+
+def _catchJadlogPriceHttp(df_filtered:pd.DataFrame,results:ResultStore,logger:IntegratedLogger,cache:PersistentCache=None,journal:QuoteJournal=None) -> pd.DataFrame:
+    '''Faz as cotações do Jadlog por HTTP, sem navegador
+    
+        # Retorno
+            Dataframe com as linhas que falharam, para serem refeitas pelo navegador
+    
+    '''
+    logger.info('Iniciando cotações Jadlog por HTTP')
+    failed_index = []
+    with JadlogHttpClient() as client:
+        for index, serie in df_filtered.iterrows():
+            try:
+                quotation = client.quote(serie)
+                _writeJadlogQuote(results,serie['CNPJ'],quotation)
+                store_quote(cache,journal,'jadlog',jadlog_cache_key(serie),serie['CNPJ'],quotation)
+            except Exception as err:
+                logger.info(f"Falha na cotação Jadlog por HTTP para o CNPJ {serie['CNPJ']}: {err}")
+                failed_index.append(index)
+    logger.info(f'Cotações Jadlog por HTTP finalizadas, {len(failed_index)} falhas')
+    return df_filtered.loc[failed_index]
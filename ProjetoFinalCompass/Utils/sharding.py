@@ -0,0 +1,160 @@
+import glob
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from Utils.IntegratedLogger import IntegratedLogger
+from Utils.functions_excel import INPUT_SHEET_NAME, _excel_value, iter_excel_chunks, normalize_cnpj_column
+
+
+SHARD_SHEET_NAME = 'Shard'
+
+
+def shard_of_cnpj(cnpj, shard_count:int) -> int:
+    '''Shard (0 a shard_count - 1) de um CNPJ já normalizado, pelo md5 dos dígitos.
+
+    O md5 não depende da máquina nem do PYTHONHASHSEED, então todos os runners chegam à mesma divisão.
+    Linhas sem CNPJ ficam no shard 0.
+    '''
+    if cnpj is None or pd.isna(cnpj) or cnpj == '':
+        return 0
+    return int(hashlib.md5(str(cnpj).encode('utf-8')).hexdigest(), 16) % shard_count
+
+
+def shard_assignments(cnpjs:pd.Series, shard_count:int) -> np.ndarray:
+    '''Shard de cada linha, na ordem de `cnpjs`. CNPJs repetidos são calculados uma única vez.'''
+    shards = {cnpj: shard_of_cnpj(cnpj, shard_count) for cnpj in cnpjs.dropna().unique()}
+    # Linhas sem CNPJ não estão no dicionário e ficam no shard 0
+    return cnpjs.map(shards).fillna(0).astype(int).to_numpy()
+
+
+def _check_shard(shard_index:int, shard_count:int):
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f'Shard inválido: SHARD_INDEX={shard_index} com SHARD_COUNT={shard_count} (o índice vai de 0 a SHARD_COUNT - 1)')
+
+
+def select_shard(df_output:pd.DataFrame, shard_index:int, shard_count:int, logger:IntegratedLogger) -> pd.DataFrame:
+    '''Linhas do df_output que pertencem ao shard, na ordem da planilha de entrada.
+
+    Todas as linhas de um mesmo CNPJ caem no mesmo shard, então o cache, o journal e a consulta à
+    BrasilAPI de cada CNPJ ficam em um único runner.
+    '''
+    _check_shard(shard_index, shard_count)
+    mask = shard_assignments(df_output['CNPJ'], shard_count) == shard_index
+    shard = df_output[mask].reset_index(drop=True)
+    logger.info(f"Shard {shard_index + 1} de {shard_count}: {len(shard)} de {len(df_output)} linhas da planilha de entrada")
+    return shard
+
+
+def _shard_prefix(shard_path:str, input_path:str) -> str:
+    name = os.path.splitext(os.path.basename(input_path))[0].replace(' ', '_')
+    return os.path.join(shard_path, name)
+
+
+def shard_file_path(shard_path:str, input_path:str, shard_index:int, shard_count:int) -> str:
+    '''Caminho fixo da saída de um shard, para que o merge encontre as saídas de todos os runners.'''
+    return f'{_shard_prefix(shard_path, input_path)}_shard_{shard_index + 1:02d}_de_{shard_count:02d}.xlsx'
+
+
+def save_shard_output(shard_path:str, input_path:str, df_output:pd.DataFrame, shard_index:int, shard_count:int,
+                      logger:IntegratedLogger) -> str:
+    '''Grava o df_output do shard em uma planilha simples, sem estilo, para o merge.
+
+    O arquivo é escrito com outro nome e renomeado no final, então o merge nunca lê um shard pela metade.
+
+    # Retorno
+
+        Caminho do arquivo do shard.
+    '''
+    _check_shard(shard_index, shard_count)
+    os.makedirs(shard_path, exist_ok=True)
+    file_path = shard_file_path(shard_path, input_path, shard_index, shard_count)
+    temporary_path = f'{file_path}.{os.getpid()}.tmp'
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(SHARD_SHEET_NAME)
+    worksheet.append([str(column) for column in df_output.columns])
+    for values in df_output.itertuples(index=False, name=None):
+        worksheet.append([_excel_value(value) for value in values])
+    workbook.save(temporary_path)
+    os.replace(temporary_path, file_path)
+    logger.info(f"Saída do shard {shard_index + 1} de {shard_count} gravada em {file_path}")
+    return file_path
+
+
+def missing_shards(shard_path:str, input_path:str, shard_count:int) -> list:
+    '''Índices dos shards que ainda não gravaram a saída.'''
+    return [index for index in range(shard_count) if not os.path.exists(shard_file_path(shard_path, input_path, index, shard_count))]
+
+
+def claim_shard_merge(shard_path:str, input_path:str, shard_count:int) -> bool:
+    '''Verdadeiro para um único runner, quando todos os shards já gravaram a saída: esse runner faz o merge.
+
+    A exclusividade vem da criação atômica de um arquivo de trava ao lado das saídas dos shards.
+    '''
+    if missing_shards(shard_path, input_path, shard_count):
+        return False
+    try:
+        lock = os.open(f'{_shard_prefix(shard_path, input_path)}_merge.lock', os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.write(lock, str(os.getpid()).encode('utf-8'))
+    os.close(lock)
+    return True
+
+
+def release_shard_merge(shard_path:str, input_path:str):
+    '''Remove a trava do merge, para que o merge possa ser feito de novo depois de uma falha.'''
+    lock_path = f'{_shard_prefix(shard_path, input_path)}_merge.lock'
+    if os.path.exists(lock_path):
+        os.remove(lock_path)
+
+
+def merge_shard_outputs(shard_path:str, input_path:str, shard_count:int, logger:IntegratedLogger, chunk_size:int=5000) -> pd.DataFrame:
+    '''Junta as saídas dos shards em um único df_output, na ordem das linhas da planilha de entrada.
+
+    Cada shard mantém a ordem relativa das suas linhas, então a ordem original é refeita recalculando o
+    shard de cada linha da entrada. Só a coluna CNPJ da entrada é mantida em memória.
+
+    # Raises
+
+        FileNotFoundError: Se a saída de algum shard não existir.
+        ValueError: Se as saídas não corresponderem à planilha de entrada (ex.: shards de outra versão dela).
+    '''
+    missing = missing_shards(shard_path, input_path, shard_count)
+    if missing:
+        raise FileNotFoundError(f"Saídas dos shards {[index + 1 for index in missing]} de {shard_count} não encontradas em {shard_path}")
+
+    cnpj_chunks = [normalize_cnpj_column(chunk['CNPJ']) for chunk in iter_excel_chunks(input_path, INPUT_SHEET_NAME, chunk_size)]
+    input_cnpjs = pd.concat(cnpj_chunks, ignore_index=True) if cnpj_chunks else pd.Series(dtype=object)
+    assignments = shard_assignments(input_cnpjs, shard_count)
+
+    frames = []
+    for shard_index in range(shard_count):
+        file_path = shard_file_path(shard_path, input_path, shard_index, shard_count)
+        chunks = list(iter_excel_chunks(file_path, SHARD_SHEET_NAME, chunk_size, na_values=()))
+        shard = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(dtype=object)
+        positions = np.flatnonzero(assignments == shard_index)
+        if len(shard) != len(positions):
+            raise ValueError(f"O shard {shard_index + 1} tem {len(shard)} linhas, a planilha de entrada tem {len(positions)} para ele")
+        shard.index = positions
+        frames.append(shard)
+        logger.info(f"Shard {shard_index + 1} de {shard_count} lido: {len(shard)} linhas")
+
+    df_output = pd.concat([frame for frame in frames if not frame.empty]).sort_index() if len(input_cnpjs) else frames[0]
+    if not df_output['CNPJ'].reset_index(drop=True).equals(input_cnpjs.astype(object).reset_index(drop=True)):
+        raise ValueError("Os CNPJs das saídas dos shards não correspondem aos da planilha de entrada")
+    df_output = df_output.reset_index(drop=True)
+    logger.info(f"Merge dos {shard_count} shards concluído: {len(df_output)} linhas")
+    return df_output
+
+
+def clear_shard_outputs(shard_path:str, input_path:str, shard_count:int):
+    '''Remove as saídas dos shards e a trava do merge, depois que a planilha final foi gerada.'''
+    prefix = _shard_prefix(shard_path, input_path)
+    for file_path in glob.glob(f'{glob.escape(prefix)}_shard_*_de_{shard_count:02d}.xlsx') + [f'{prefix}_merge.lock']:
+        if os.path.exists(file_path):
+            os.remove(file_path)
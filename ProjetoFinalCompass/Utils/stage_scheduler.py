@@ -0,0 +1,119 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+from Utils.IntegratedLogger import IntegratedLogger
+
+
+Stage = namedtuple('Stage', ['name', 'func', 'depends', 'optional'])
+StageTiming = namedtuple('StageTiming', ['start', 'end', 'seconds'])
+
+
+class StageScheduler:
+    '''Executa as etapas do processo como um grafo de dependências (DAG).
+
+    Cada etapa declara de quais etapas depende e recebe, como argumentos posicionais, o retorno
+    delas na ordem em que foram declaradas. Etapas cujas dependências já terminaram rodam ao
+    mesmo tempo em threads, de forma que o tempo total tende ao do caminho mais lento do grafo
+    e não à soma de todas as etapas. Com `max_workers` igual a 1 as etapas rodam uma por vez,
+    na ordem em que foram adicionadas.
+
+    Se uma etapa falhar nenhuma etapa nova é iniciada, as que já estão rodando são aguardadas e
+    a exceção da etapa é relançada por `run`. A falha de uma etapa opcional (ex.: envio de e-mail)
+    é apenas registrada no log: o retorno dela fica None e o processo continua.
+
+    # Exemplo
+
+        scheduler = StageScheduler(logger)
+        scheduler.add('leitura', read_input)
+        scheduler.add('correios', quote_correios, depends=('leitura',))
+        scheduler.add('jadlog', quote_jadlog, depends=('leitura',))
+        scheduler.add('saida', write_output, depends=('correios', 'jadlog'))
+        results = scheduler.run()
+
+    # Atributos
+
+        * logger: `IntegratedLogger`
+            Logger usado para registrar início e fim de cada etapa.
+
+        * max_workers: `int`
+            Número máximo de etapas rodando ao mesmo tempo.
+
+        * timings: `dict`
+            Início, fim e duração (`StageTiming`) de cada etapa executada.
+
+    '''
+
+    def __init__(self, logger:IntegratedLogger, max_workers:int=4):
+        self.logger = logger
+        self.max_workers = max(1, max_workers)
+        self.timings = {}
+        self._stages = {}
+
+    def add(self, name:str, func, depends:tuple=(), optional:bool=False):
+        '''Adiciona uma etapa. As dependências precisam ter sido adicionadas antes.
+
+        Com `optional` a falha da etapa não interrompe o processo.
+        '''
+        if name in self._stages:
+            raise ValueError(f'Etapa {name} já foi adicionada')
+        missing = [dependency for dependency in depends if dependency not in self._stages]
+        if missing:
+            raise ValueError(f'Etapa {name} depende de etapas não declaradas: {missing}')
+        self._stages[name] = Stage(name, func, tuple(depends), optional)
+        return self
+
+    def _run_stage(self, stage:Stage, arguments:list):
+        start = datetime.now()
+        started = time.perf_counter()
+        self.logger.info(f"Etapa {stage.name} iniciada às {start.strftime('%H:%M:%S')}")
+        try:
+            return stage.func(*arguments)
+        finally:
+            seconds = time.perf_counter() - started
+            end = datetime.now()
+            self.timings[stage.name] = StageTiming(start, end, seconds)
+            self.logger.info(f"Etapa {stage.name} finalizada às {end.strftime('%H:%M:%S')} ({seconds:.1f}s)")
+
+    def run(self) -> dict:
+        '''Executa todas as etapas e retorna um dicionário com o retorno de cada uma.'''
+        results = {}
+        pending = dict(self._stages)
+        running = {}
+        error = None
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='stage') as executor:
+            while pending or running:
+                if error is None:
+                    # Inicia, na ordem de declaração, as etapas cujas dependências já terminaram
+                    for name, stage in list(pending.items()):
+                        if len(running) >= self.max_workers:
+                            break
+                        if all(dependency in results for dependency in stage.depends):
+                            arguments = [results[dependency] for dependency in stage.depends]
+                            running[executor.submit(self._run_stage, stage, arguments)] = name
+                            del pending[name]
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as err:
+                        if self._stages[name].optional:
+                            self.logger.error(f'Etapa opcional {name}')
+                            results[name] = None
+                        elif error is None:
+                            error = err
+                            self.logger.info(f'Etapa {name} falhou, nenhuma nova etapa será iniciada')
+
+        elapsed = time.perf_counter() - started
+        total = sum(timing.seconds for timing in self.timings.values())
+        self.logger.info(f'Etapas finalizadas em {elapsed:.1f}s (soma das etapas: {total:.1f}s)')
+        if error is not None:
+            raise error
+        return results
@@ -1,7 +1,6 @@
 import os
 
 from dotenv import load_dotenv
-from webdriver_manager.chrome import ChromeDriverManager
 import pandas as pd
 
 from botcity.maestro import *
@@ -19,6 +18,162 @@ ACTIVITY_LABEL = vars_map['ACTIVITY_LABEL']
 BotMaestroSDK.RAISE_NOT_CONNECTED = not IS_MAESTRO_CONNECTED
 
 
+def process_workbook(input_path, logger, maestro, bot, shared=None, shard=None):
+    '''Processa uma planilha de entrada: consulta a API, faz as cotações, grava a planilha de saída e envia por e-mail.
+
+    # Parâmetros
+
+        * input_path: `str`
+            Caminho da planilha de entrada.
+
+        * shared: `SharedResources`
+            Recursos compartilhados do modo em lote (pools de navegadores, sessão HTTP e caches). Sem ele
+            cada etapa cria e fecha os seus próprios recursos.
+
+        * shard: `tuple`
+            `(SHARD_INDEX, SHARD_COUNT)` no modo com shards: só as linhas do shard são processadas e a saída
+            vai, sem estilo e sem e-mail, para SHARD_OUTPUT_PATH, onde o merge junta os shards.
+
+    # Retorno
+
+        Tupla `(df_output, output_file)`.
+    '''
+    # Checkpoints em Parquet por etapa; com RESUME_FROM_CHECKPOINT as etapas já concluídas são recarregadas.
+    # Cada shard tem os seus, para que vários shards da mesma planilha rodem na mesma máquina
+    checkpoint_path = vars_map['DEFAULT_CHECKPOINT_PATH']
+    if shard is not None:
+        checkpoint_path = os.path.join(checkpoint_path, f'shard_{shard[0] + 1:02d}_de_{shard[1]:02d}')
+    checkpoints = CheckpointStore(checkpoint_path, input_path, vars_map['RESUME_FROM_CHECKPOINT'], logger)
+    # Journal das cotações feitas; sempre relido, as linhas já cotadas não vão de novo ao site mesmo sem RESUME_FROM_CHECKPOINT
+    journal = QuoteJournal(checkpoints.journal_path,
+                           fsync_every=vars_map['JOURNAL_FSYNC_EVERY'], fsync_interval=vars_map['JOURNAL_FSYNC_INTERVAL_SECONDS'])
+    # No modo em lote o nome da planilha de entrada entra no nome da saída, para não colidir com as outras
+    input_name = os.path.splitext(os.path.basename(input_path))[0] if shared is not None else None
+
+    def read_input():
+        df_output = read_output_dataframe(input_path, logger, vars_map['INPUT_CHUNK_SIZE'])
+        if shard is not None:
+            df_output = select_shard(df_output, shard[0], shard[1], logger)
+        return df_output
+
+    def lookup_api(df_output):
+        if shared is None:
+            return api_data_lookup(df_output, logger)
+        return api_data_lookup(df_output, logger, shared.brasilapi_session, shared.cnpj_cache, shared.brasilapi_limiter)
+
+    def plan_quotes(split):
+        # Linhas com o mesmo envio (CEP, dimensões, peso, serviço e valor) são cotadas uma única vez
+        _, df_correios, df_jadlog = split
+        deduplicate = vars_map['QUOTE_DEDUP_ENABLED']
+        return (QuotePlan(df_correios, correios_cache_key if deduplicate else None, 'Correios', logger),
+                QuotePlan(df_jadlog, jadlog_cache_key if deduplicate else None, 'Jadlog', logger))
+
+    def quote_correios(plans):
+        df_correios = plans[0].unique_rows
+        results = ResultStore()
+        if shared is None:
+            interaction_df_correios(df_filtered=df_correios, df_output=None, bot=bot, logger=logger, results=results, journal=journal)
+        else:
+            interaction_df_correios(df_filtered=df_correios, df_output=None, bot=bot, logger=logger, pool=shared.correios_pool,
+                                    results=results, journal=journal, quote_cache=shared.quote_cache)
+        return plans[0].fan_out(results)
+
+    def quote_jadlog(plans):
+        df_jadlog = plans[1].unique_rows
+        results = ResultStore()
+        if shared is not None:
+            catchJadlogPrice(bot=None, maestro=maestro, df_filtered=df_jadlog, df_output=None, logger=logger, pool=shared.jadlog_pool,
+                             results=results, journal=journal, quote_cache=shared.quote_cache)
+            return plans[1].fan_out(results)
+        # O Jadlog usa um navegador próprio para rodar ao mesmo tempo que os correios
+        jadlog_bot = create_web_bot()
+        try:
+            catchJadlogPrice(bot=jadlog_bot, maestro=maestro, df_filtered=df_jadlog, df_output=None, logger=logger, results=results, journal=journal)
+        finally:
+            stop_browser_quietly(jadlog_bot)
+        return plans[1].fan_out(results)
+
+    def run_rpa_challenge(api_data):
+        # Sem o site, nenhuma linha tem falha registrada
+        return rpa_challenge(df=api_data, logger=logger) or ResultStore()
+
+    def write_output(split, correios, jadlog, rpa):
+        df_output = correios.merge_into(split[0])
+        df_output = jadlog.merge_into(df_output)
+        # Linhas que não foram inseridas no RPA Challenge ficam marcadas no STATUS
+        df_output = rpa.merge_into(df_output)
+        if shard is not None:
+            output_file = save_shard_output(vars_map['SHARD_OUTPUT_PATH'], input_path, df_output, shard[0], shard[1], logger)
+        else:
+            output_file = save_styled_output_to_excel(vars_map['DEFAULT_PROCESSADOS_PATH'], df_output, logger, input_name)
+        return df_output, output_file
+
+    results_to_frames = lambda results: {'results': results.to_records()}
+    results_from_frames = lambda frames: ResultStore.from_records(frames['results'])
+
+    # Etapas do processo e suas dependências; etapas independentes rodam ao mesmo tempo
+    scheduler = StageScheduler(logger, max_workers=vars_map['PIPELINE_MAX_WORKERS'])
+    scheduler.add('leitura', read_input)
+    scheduler.add('api', checkpoints.wrap('api', lookup_api,
+                                          to_frames=lambda api: {'api_data': api[0], 'df_output': api[1]},
+                                          from_frames=lambda frames: (frames['api_data'], frames['df_output'])),
+                  depends=('leitura',))
+    scheduler.add('endereco', lambda api: make_endereco(api[0], logger), depends=('api',))
+    scheduler.add('divisao', checkpoints.wrap('divisao', lambda api, api_data: make_jadlog_correios_dataframes(api[1], api_data, logger),
+                                              to_frames=lambda split: dict(zip(('df_output', 'df_correios', 'df_jadlog'), split)),
+                                              from_frames=lambda frames: (frames['df_output'], frames['df_correios'], frames['df_jadlog'])),
+                  depends=('api', 'endereco'))
+    scheduler.add('rpa_challenge', checkpoints.wrap('rpa_challenge', run_rpa_challenge, results_to_frames, results_from_frames),
+                  depends=('endereco',))
+    scheduler.add('planejamento', plan_quotes, depends=('divisao',))
+    scheduler.add('correios', checkpoints.wrap('correios', quote_correios, results_to_frames, results_from_frames), depends=('planejamento',))
+    scheduler.add('jadlog', checkpoints.wrap('jadlog', quote_jadlog, results_to_frames, results_from_frames), depends=('planejamento',))
+    scheduler.add('escrita', write_output, depends=('divisao', 'correios', 'jadlog', 'rpa_challenge'))
+    # Envia o resultado por e-mail; com shards quem envia é o merge. A planilha já foi gravada, então uma falha no envio não falha a execução
+    if shard is None:
+        scheduler.add('email', lambda written: send_emails(written[1], logger), depends=('escrita',), optional=True)
+    try:
+        stage_results = scheduler.run()
+    finally:
+        journal.close()
+
+    # Execução concluída, os checkpoints não são mais necessários
+    checkpoints.clear()
+    return stage_results['escrita']
+
+
+def merge_shards(input_path, logger):
+    '''Junta as saídas dos SHARD_COUNT shards na planilha de saída estilizada, envia por e-mail e remove as saídas dos shards.
+
+    # Retorno
+
+        Tupla `(df_output, output_file)`, com o df_output da planilha inteira.
+    '''
+    shard_path, shard_count = vars_map['SHARD_OUTPUT_PATH'], vars_map['SHARD_COUNT']
+    df_output = merge_shard_outputs(shard_path, input_path, shard_count, logger, vars_map['INPUT_CHUNK_SIZE'])
+    output_file = save_styled_output_to_excel(vars_map['DEFAULT_PROCESSADOS_PATH'], df_output, logger)
+    send_emails(output_file, logger)
+    clear_shard_outputs(shard_path, input_path, shard_count)
+    return df_output, output_file
+
+
+def run_batch(logger, maestro, bot):
+    '''Modo em lote: processa todas as planilhas que chegarem em Processar, até BATCH_MAX_FILES ao mesmo tempo,
+    com navegadores, sessão HTTP e caches compartilhados.
+
+    # Retorno
+
+        Lista de `FileStatus` das planilhas processadas.
+    '''
+    with SharedResources(logger) as shared:
+        runner = WatchFolderRunner(lambda input_path: process_workbook(input_path, logger, maestro, bot, shared),
+                                   vars_map['DEFAULT_PROCESSAR_PATH'], vars_map['DEFAULT_PROCESSADOS_PATH'], logger,
+                                   max_files=vars_map['BATCH_MAX_FILES'], poll_interval=vars_map['BATCH_POLL_SECONDS'],
+                                   stop_when_idle=vars_map['BATCH_STOP_WHEN_IDLE'])
+        statuses = runner.run()
+    return statuses, runner.summary_path
+
+
 def main():
     # Verifica se o maestro está conectado e seleciona de acordo
     maestro = vars_map['DEFAULT_MAESTRO']
@@ -26,32 +181,40 @@ def main():
     bot = vars_map['DEFAULT_BOT']
     
     # Iniciando logger 
-    logger = IntegratedLogger(maestro=maestro,filepath=vars_map['BASE_LOG_PATH'],activity_label=vars_map['ACTIVITY_LABEL'])
+    logger = IntegratedLogger(maestro=maestro,filepath=vars_map['BASE_LOG_PATH'],activity_label=vars_map['ACTIVITY_LABEL'],
+                              log_batch_size=vars_map['LOG_BATCH_SIZE'],log_batch_interval=vars_map['LOG_BATCH_INTERVAL_SECONDS'],
+                              log_queue_size=vars_map['LOG_QUEUE_SIZE'],
+                              error_digest_interval=vars_map['ERROR_DIGEST_INTERVAL_SECONDS'],
+                              error_digest_max_attachments=vars_map['ERROR_DIGEST_MAX_ATTACHMENTS'])
 
     try:
         logger.info(f"{'='*10} Início do Processo: RPA VALOR COTAÇÃO {'='*10}")
         
-        # Leitura dos dados de entrada
-        input_path = os.path.join(vars_map['DEFAULT_PROCESSAR_PATH'], 'Planilha de Entrada Grupos.xlsx')
-        df = open_excel_file_to_dataframe(input_path, logger)
-        df_output = create_output_dataframe(df, logger)
-
-        # Processamento de cotações
-        api_data, df_output = api_data_lookup(df_output, logger)
-        api_data = make_endereco(api_data, logger)
-        df_output, df_correios, df_jadlog = make_jadlog_correios_dataframes(df_output, api_data, logger)
-
-        # Interações com sites externos
-        rpa_challenge(df=api_data, logger=logger)
-        df_output = interaction_df_correios(df_filtered=df_correios, df_output=df_output, bot=bot, logger=logger)
-        df_output = catchJadlogPrice(bot=bot, maestro=maestro, df_filtered=df_jadlog, df_output=df_output, logger=logger)gger=logger)
-
-         # Salva resultados e realiza comparações
-        output_file = save_df_output_to_excel(vars_map['DEFAULT_PROCESSADOS_PATH'], df_output, logger)
-        compare_quotation(df_output, output_file, logger)
-
-        # Envia o resultado por e-mail
-        send_emails(output_file)
+        if vars_map['BATCH_MODE']:
+            statuses, output_file = run_batch(logger, maestro, bot)
+            total_tasks = sum(status.total for status in statuses)
+            total_finished = sum(status.finished for status in statuses)
+            total_errors = sum(status.errors for status in statuses)
+        else:
+            input_path = os.path.join(vars_map['DEFAULT_PROCESSAR_PATH'], 'Planilha de Entrada Grupos.xlsx')
+            if vars_map['SHARD_MERGE']:
+                df_output, output_file = merge_shards(input_path, logger)
+            elif vars_map['SHARD_COUNT'] > 1:
+                shard = (vars_map['SHARD_INDEX'], vars_map['SHARD_COUNT'])
+                df_output, output_file = process_workbook(input_path, logger, maestro, bot, shard=shard)
+                # O último shard a terminar faz o merge; a tarefa dele reporta os totais da planilha inteira
+                if claim_shard_merge(vars_map['SHARD_OUTPUT_PATH'], input_path, vars_map['SHARD_COUNT']):
+                    logger.info("Todos os shards concluídos, iniciando o merge das saídas.")
+                    try:
+                        df_output, output_file = merge_shards(input_path, logger)
+                    except Exception:
+                        # Sem a trava o próximo shard a terminar, ou uma execução com SHARD_MERGE, refaz o merge
+                        release_shard_merge(vars_map['SHARD_OUTPUT_PATH'], input_path)
+                        logger.info("Merge dos shards falhou, trava removida; execute com SHARD_MERGE=True para refazer o merge.")
+                        raise
+            else:
+                df_output, output_file = process_workbook(input_path, logger, maestro, bot)
+            total_tasks, total_finished, total_errors = calc_finish_task(df_output)
         
     except:
         logger.error('Execução RPA_Valor_Cotação')
@@ -65,13 +228,13 @@ def main():
                 failed_items=0
             )
     else:
-        total_tasks, total_finished, total_errors = calc_finish_task(df_output)
         if IS_MAESTRO_CONNECTED:
-            maestro.post_artifact(
-                task_id=execution.task_id,
-                artifact_name=os.path.basename(output_file),
-                filepath=output_file
-            )
+            if os.path.exists(output_file):
+                maestro.post_artifact(
+                    task_id=execution.task_id,
+                    artifact_name=os.path.basename(output_file),
+                    filepath=output_file
+                )
             maestro.finish_task(
                 task_id=execution.task_id,
                 status=AutomationTaskFinishStatus.SUCCESS,
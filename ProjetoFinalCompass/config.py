@@ -1,64 +1,230 @@
+import functools
+import json
 import os
-from botcity.web import WebBot, Browser, By
-from botcity.maestro import *
+import threading
+import time
+from collections.abc import MutableMapping
+
 from dotenv import load_dotenv
-from webdriver_manager.chrome import ChromeDriverManager
 
 load_dotenv(override=True)
 
-bot = WebBot()
-bot.headless = False
-bot.browser = Browser.CHROME
-bot.driver_path = ChromeDriverManager().install()
 
-IS_MAESTRO_CONNECTED = eval(os.getenv('IS_MAESTRO_CONNECTED'))
-if IS_MAESTRO_CONNECTED:
+class LazyValue:
+    '''Valor do `vars_map` construído apenas no primeiro acesso (ex.: WebBot, Maestro, caminho do driver).'''
+
+    def __init__(self, factory):
+        self.factory = factory
+
+
+class LazyVarsMap(MutableMapping):
+    '''Mapeamento de configurações carregado por `loader` no primeiro acesso, que também resolve os
+    `LazyValue` no primeiro acesso a cada chave e guarda o resultado.
+
+    Assim importar `config` não conecta ao Maestro, não abre conexões, não baixa o chromedriver e não
+    importa o botcity; esses recursos só são criados por quem realmente usa as configurações. Todos os
+    métodos de leitura (`items`, `values`, `get`, `==`, `copy`) passam por `__getitem__`, então nunca
+    devolvem um `LazyValue`.
+    '''
+
+    _lock = threading.RLock()
+
+    def __init__(self, loader):
+        self._data = {}
+        self._loader = loader
+
+    def _load(self) -> dict:
+        if self._loader is not None:
+            with self._lock:
+                if self._loader is not None:
+                    self._data.update(self._loader())
+                    self._loader = None
+        return self._data
+
+    def __getitem__(self, key):
+        value = self._load()[key]
+        if isinstance(value, LazyValue):
+            with self._lock:
+                value = self._data[key]
+                if isinstance(value, LazyValue):
+                    value = value.factory()
+                    self._data[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+
+    def __delitem__(self, key):
+        del self._load()[key]
+
+    def __contains__(self, key):
+        # Sem passar por __getitem__, para não construir o LazyValue
+        return key in self._load()
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def copy(self) -> dict:
+        '''Cópia em um `dict` comum, com os valores já resolvidos.'''
+        return dict(self.items())
+
+    def __repr__(self):
+        # Só as chaves: mostrar os valores resolveria credenciais e abriria o navegador
+        return f'{type(self).__name__}({list(self)!r})'
+
+
+IS_MAESTRO_CONNECTED = str(os.getenv('IS_MAESTRO_CONNECTED', 'False')).strip().lower() in ('true', '1', 'sim', 'yes')
+
+
+@functools.lru_cache(maxsize=None)
+def get_maestro_session() -> tuple:
+    '''Conecta ao Maestro (uma única vez) e retorna `(maestro, execution)`; `(None, None)` sem Maestro.'''
+    if not IS_MAESTRO_CONNECTED:
+        return None, None
+    from botcity.maestro import BotMaestroSDK
     maestro = BotMaestroSDK.from_sys_args()
-    execution = maestro.get_execution()
-    BASE_LOG_PATH = execution.parameters.get('BASE_LOG_PATH')
-    DEFAULT_PROCESSAR_PATH = execution.parameters.get('DEFAULT_PROCESSAR_PATH')
-    DEFAULT_PROCESSADOS_PATH = execution.parameters.get('DEFAULT_PROCESSADOS_PATH')
-    DEFAULT_CORREIOS_URL = execution.parameters.get('DEFAULT_CORREIOS_URL')
-    DEFAULT_BRASILAPI_URL = execution.parameters.get('DEFAULT_BRASILAPI_URL')
-    DEFAUT_RPACHALLENGE_URL = execution.parameters.get('DEFAUT_RPACHALLENGE_URL')
-    ORIGIN_CEP = execution.parameters.get('ORIGIN_CEP')
-    DEFAULT_URL_JADLOG = execution.parameters.get('DEFAULT_URL_JADLOG')
-    PICKUP_VALUE = execution.parameters.get('PICKUP_VALUE')
-    DEFAULT_EMAILS_FILE = execution.parameters.get('DEFAULT_EMAILS_FILE')
-    EMAIL_PASSWORD = maestro.get_credential(label='VALOR_COTACAO_CREDENTIALS',key='EMAIL_PASSWORD')
-    EMAIL_USERNAME = maestro.get_credential(label='VALOR_COTACAO_CREDENTIALS',key='EMAIL_USERNAME')
-else:
-    maestro = None
-    execution = None
-    BASE_LOG_PATH = os.getenv('BASE_LOG_PATH')
-    DEFAULT_PROCESSAR_PATH = os.getenv('DEFAULT_PROCESSAR_PATH')
-    DEFAULT_PROCESSADOS_PATH = os.getenv('DEFAULT_PROCESSADOS_PATH')
-    DEFAULT_CORREIOS_URL = os.getenv('DEFAULT_CORREIOS_URL')
-    DEFAULT_BRASILAPI_URL = os.getenv('DEFAULT_BRASILAPI_URL')
-    DEFAUT_RPACHALLENGE_URL = os.getenv('DEFAUT_RPACHALLENGE_URL')
-    ORIGIN_CEP = os.getenv('ORIGIN_CEP')
-    DEFAULT_URL_JADLOG = os.getenv('DEFAULT_URL_JADLOG')
-    PICKUP_VALUE = os.getenv('PICKUP_VALUE')
-    DEFAULT_EMAILS_FILE = os.getenv('DEFAULT_EMAILS_FILE')
-    EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD')
-    EMAIL_USERNAME = os.getenv('EMAIL_USERNAME')
-
-vars_map = {
-    'IS_MAESTRO_CONNECTED':IS_MAESTRO_CONNECTED,
-    'ACTIVITY_LABEL':os.getenv('ACTIVITY_LABEL'),
-    'BASE_LOG_PATH':BASE_LOG_PATH,
-    'DEFAULT_PROCESSAR_PATH':DEFAULT_PROCESSAR_PATH,
-    'DEFAULT_PROCESSADOS_PATH':DEFAULT_PROCESSADOS_PATH,
-    'DEFAULT_CORREIOS_URL':DEFAULT_CORREIOS_URL,
-    'DEFAULT_BRASILAPI_URL':DEFAULT_BRASILAPI_URL,
-    'DEFAUT_RPACHALLENGE_URL':DEFAUT_RPACHALLENGE_URL,
-    'DEFAULT_MAESTRO':maestro,
-    'DEFAULT_BOT':bot,
-    'DEFAULT_EMAILS_FILE':DEFAULT_EMAILS_FILE,
-    'DEFAULT_EXECUTION':execution,
-    'ORIGIN_CEP':ORIGIN_CEP,
-    'PICKUP_VALUE':PICKUP_VALUE,
-    'DEFAULT_URL_JADLOG':DEFAULT_URL_JADLOG,
-    'EMAIL_PASSWORD':EMAIL_PASSWORD,
-    'EMAIL_USERNAME':EMAIL_USERNAME
-}
\ No newline at end of file
+    return maestro, maestro.get_execution()
+
+
+def get_maestro_credential(key:str):
+    maestro, _ = get_maestro_session()
+    return maestro.get_credential(label='VALOR_COTACAO_CREDENTIALS',key=key)
+
+
+def get_driver_path() -> str:
+    '''Caminho do chromedriver: CHROMEDRIVER_PATH, o caminho guardado em cache ou, por último, o webdriver_manager.
+
+    O caminho instalado pelo webdriver_manager fica guardado em `DEFAULT_CACHE_PATH/chromedriver.json` e é
+    reaproveitado, sem acesso à rede, enquanto o arquivo existir e o cache tiver menos de
+    CHROMEDRIVER_CACHE_DAYS dias.
+    '''
+    if vars_map['CHROMEDRIVER_PATH']:
+        return vars_map['CHROMEDRIVER_PATH']
+    cache_file = os.path.join(vars_map['DEFAULT_CACHE_PATH'], 'chromedriver.json')
+    try:
+        with open(cache_file, encoding='utf-8') as file:
+            cached = json.load(file)
+        fresh = time.time() - cached['saved_at'] < vars_map['CHROMEDRIVER_CACHE_DAYS'] * 86400
+        if fresh and os.path.exists(cached['driver_path']):
+            return cached['driver_path']
+    except (OSError, ValueError, KeyError):
+        pass
+    from webdriver_manager.chrome import ChromeDriverManager
+    driver_path = ChromeDriverManager().install()
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(cache_file, 'w', encoding='utf-8') as file:
+        json.dump({'driver_path': driver_path, 'saved_at': time.time()}, file)
+    return driver_path
+
+
+def create_default_bot():
+    from botcity.web import WebBot, Browser
+    bot = WebBot()
+    bot.headless = False
+    bot.browser = Browser.CHROME
+    bot.driver_path = vars_map['DEFAULT_DRIVER_PATH']
+    return bot
+
+
+def get_parameter(name:str, default=None):
+    '''Lê um parâmetro opcional dos parâmetros de execução do Maestro ou do arquivo .env.'''
+    value = get_maestro_session()[1].parameters.get(name) if IS_MAESTRO_CONNECTED else os.getenv(name)
+    if value is None or str(value).strip() == '':
+        return default
+    return value
+
+
+def get_bool_parameter(name:str, default:bool=False) -> bool:
+    '''Lê um parâmetro opcional booleano ("True"/"False") do Maestro ou do arquivo .env.'''
+    value = get_parameter(name)
+    if value is None:
+        return default
+    return str(value).strip().lower() in ('true', '1', 'sim', 'yes')
+
+
+def get_credential(key:str):
+    '''Credencial de e-mail: do Maestro (buscada só quando usada) ou do arquivo .env.'''
+    if IS_MAESTRO_CONNECTED:
+        return LazyValue(lambda: get_maestro_credential(key))
+    return os.getenv(key)
+
+
+def load_vars_map() -> dict:
+    '''Lê as configurações; no Maestro os parâmetros vêm da execução, então a conexão é aberta aqui.'''
+    return {
+        'IS_MAESTRO_CONNECTED':IS_MAESTRO_CONNECTED,
+        'ACTIVITY_LABEL':os.getenv('ACTIVITY_LABEL'),
+        'BASE_LOG_PATH':get_parameter('BASE_LOG_PATH'),
+        'DEFAULT_PROCESSAR_PATH':get_parameter('DEFAULT_PROCESSAR_PATH'),
+        'DEFAULT_PROCESSADOS_PATH':get_parameter('DEFAULT_PROCESSADOS_PATH'),
+        'DEFAULT_CORREIOS_URL':get_parameter('DEFAULT_CORREIOS_URL'),
+        'DEFAULT_BRASILAPI_URL':get_parameter('DEFAULT_BRASILAPI_URL'),
+        'DEFAUT_RPACHALLENGE_URL':get_parameter('DEFAUT_RPACHALLENGE_URL'),
+        'DEFAULT_MAESTRO':LazyValue(lambda: get_maestro_session()[0]),
+        'DEFAULT_BOT':LazyValue(create_default_bot),
+        'DEFAULT_EMAILS_FILE':get_parameter('DEFAULT_EMAILS_FILE'),
+        'DEFAULT_EXECUTION':LazyValue(lambda: get_maestro_session()[1]),
+        'ORIGIN_CEP':get_parameter('ORIGIN_CEP'),
+        'PICKUP_VALUE':get_parameter('PICKUP_VALUE'),
+        'DEFAULT_URL_JADLOG':get_parameter('DEFAULT_URL_JADLOG'),
+        'EMAIL_PASSWORD':get_credential('EMAIL_PASSWORD'),
+        'EMAIL_USERNAME':get_credential('EMAIL_USERNAME'),
+        'BRASILAPI_MAX_WORKERS':int(get_parameter('BRASILAPI_MAX_WORKERS', 8)),
+        'DEFAULT_CACHE_PATH':get_parameter('DEFAULT_CACHE_PATH', os.path.join('ProjetoFinalCompass', 'Cache')),
+        'CNPJ_CACHE_TTL_HOURS':float(get_parameter('CNPJ_CACHE_TTL_HOURS', 168)),
+        'CNPJ_CACHE_NEGATIVE_TTL_HOURS':float(get_parameter('CNPJ_CACHE_NEGATIVE_TTL_HOURS', 6)),
+        'CNPJ_CACHE_MAX_ENTRIES':int(get_parameter('CNPJ_CACHE_MAX_ENTRIES', 50000)),
+        'CORREIOS_REUSE_SESSION':get_bool_parameter('CORREIOS_REUSE_SESSION', True),
+        'CORREIOS_RESTART_EVERY':int(get_parameter('CORREIOS_RESTART_EVERY', 50)),
+        'BROWSER_WORKERS':int(get_parameter('BROWSER_WORKERS', 1)),
+        'BROWSER_HEADLESS':get_bool_parameter('BROWSER_HEADLESS', True),
+        'BROWSER_POOL_TIMEOUT_SECONDS':float(get_parameter('BROWSER_POOL_TIMEOUT_SECONDS', 3600)),
+        'JADLOG_BACKEND':str(get_parameter('JADLOG_BACKEND', 'browser')).strip().lower(),
+        'QUOTE_CACHE_ENABLED':get_bool_parameter('QUOTE_CACHE_ENABLED', True),
+        'QUOTE_CACHE_TTL_HOURS':float(get_parameter('QUOTE_CACHE_TTL_HOURS', 24)),
+        'QUOTE_CACHE_MAX_ENTRIES':int(get_parameter('QUOTE_CACHE_MAX_ENTRIES', 100000)),
+        'LOG_BATCH_SIZE':int(get_parameter('LOG_BATCH_SIZE', 50)),
+        'LOG_BATCH_INTERVAL_SECONDS':float(get_parameter('LOG_BATCH_INTERVAL_SECONDS', 2)),
+        'LOG_QUEUE_SIZE':int(get_parameter('LOG_QUEUE_SIZE', 10000)),
+        'ERROR_DIGEST_INTERVAL_SECONDS':float(get_parameter('ERROR_DIGEST_INTERVAL_SECONDS', 300)),
+        'ERROR_DIGEST_MAX_ATTACHMENTS':int(get_parameter('ERROR_DIGEST_MAX_ATTACHMENTS', 5)),
+        'PIPELINE_MAX_WORKERS':int(get_parameter('PIPELINE_MAX_WORKERS', 4)),
+        'INPUT_CHUNK_SIZE':int(get_parameter('INPUT_CHUNK_SIZE', 5000)),
+        'DEFAULT_CHECKPOINT_PATH':get_parameter('DEFAULT_CHECKPOINT_PATH', os.path.join('ProjetoFinalCompass', 'Checkpoints')),
+        'RESUME_FROM_CHECKPOINT':get_bool_parameter('RESUME_FROM_CHECKPOINT', False),
+        'JOURNAL_FSYNC_EVERY':int(get_parameter('JOURNAL_FSYNC_EVERY', 50)),
+        'JOURNAL_FSYNC_INTERVAL_SECONDS':float(get_parameter('JOURNAL_FSYNC_INTERVAL_SECONDS', 1)),
+        'BRASILAPI_RATE_PER_SECOND':float(get_parameter('BRASILAPI_RATE_PER_SECOND', 10)),
+        'BRASILAPI_BURST':int(get_parameter('BRASILAPI_BURST', 10)),
+        'BRASILAPI_MAX_RATE_PER_SECOND':float(get_parameter('BRASILAPI_MAX_RATE_PER_SECOND', 0)),
+        'BRASILAPI_MAX_RETRIES':int(get_parameter('BRASILAPI_MAX_RETRIES', 4)),
+        'BRASILAPI_RETRY_BUDGET_RATIO':float(get_parameter('BRASILAPI_RETRY_BUDGET_RATIO', 0.5)),
+        'BRASILAPI_BACKOFF_BASE_SECONDS':float(get_parameter('BRASILAPI_BACKOFF_BASE_SECONDS', 0.5)),
+        'BRASILAPI_BACKOFF_MAX_SECONDS':float(get_parameter('BRASILAPI_BACKOFF_MAX_SECONDS', 30)),
+        'JADLOG_RESULT_TIMEOUT_MS':int(get_parameter('JADLOG_RESULT_TIMEOUT_MS', 15000)),
+        'RPA_CHALLENGE_BATCH_SIZE':int(get_parameter('RPA_CHALLENGE_BATCH_SIZE', 10)),
+        'SMTP_HOST':get_parameter('SMTP_HOST', 'smtp.gmail.com'),
+        'SMTP_PORT':int(get_parameter('SMTP_PORT', 465)),
+        'SMTP_USE_SSL':get_bool_parameter('SMTP_USE_SSL', True),
+        'EMAIL_SINGLE_MESSAGE':get_bool_parameter('EMAIL_SINGLE_MESSAGE', True),
+        'EMAIL_COMPRESS_ATTACHMENTS':get_bool_parameter('EMAIL_COMPRESS_ATTACHMENTS', False),
+        'EMAIL_COMPRESS_MIN_MB':float(get_parameter('EMAIL_COMPRESS_MIN_MB', 5)),
+        'CHROMEDRIVER_PATH':get_parameter('CHROMEDRIVER_PATH'),
+        'CHROMEDRIVER_CACHE_DAYS':float(get_parameter('CHROMEDRIVER_CACHE_DAYS', 7)),
+        'DEFAULT_DRIVER_PATH':LazyValue(get_driver_path),
+        'BATCH_MODE':get_bool_parameter('BATCH_MODE', False),
+        'BATCH_MAX_FILES':int(get_parameter('BATCH_MAX_FILES', 2)),
+        'BATCH_POLL_SECONDS':float(get_parameter('BATCH_POLL_SECONDS', 10)),
+        'BATCH_STOP_WHEN_IDLE':get_bool_parameter('BATCH_STOP_WHEN_IDLE', False),
+        'SHARD_COUNT':int(get_parameter('SHARD_COUNT', 1)),
+        'SHARD_INDEX':int(get_parameter('SHARD_INDEX', 0)),
+        'SHARD_MERGE':get_bool_parameter('SHARD_MERGE', False),
+        'SHARD_OUTPUT_PATH':get_parameter('SHARD_OUTPUT_PATH', os.path.join('ProjetoFinalCompass', 'Shards')),
+        'QUOTE_DEDUP_ENABLED':get_bool_parameter('QUOTE_DEDUP_ENABLED', True)
+    }
+
+
+vars_map = LazyVarsMap(load_vars_map)
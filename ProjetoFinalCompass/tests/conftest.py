@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class NullLogger:
+    '''Logger mudo com a mesma interface do IntegratedLogger.'''
+
+    def info(self, msg): pass
+    def debug(self, msg): pass
+    def warning(self, process_name): pass
+    def error(self, process_name): pass
+
+
+@pytest.fixture
+def logger():
+    return NullLogger()
+
+
+INPUT_COLUMNS = [
+    'CNPJ', 'VALOR DO PEDIDO', 'DIMENSÕES CAIXA (altura x largura x comprimento cm)', 'PESO DO PRODUTO',
+    'TIPO DE SERVIÇO JADLOG', 'TIPO DE SERVIÇO CORREIOS',
+]
+
+
+@pytest.fixture
+def input_workbook(tmp_path):
+    '''Cria uma "Planilha de Entrada Grupos.xlsx" com `rows` linhas e retorna o caminho; toda 7ª linha fica sem peso.'''
+    from openpyxl import Workbook
+
+    def make(rows:int, name:str='Planilha de Entrada Grupos.xlsx') -> str:
+        from Utils.functions_excel import INPUT_SHEET_NAME
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(INPUT_SHEET_NAME)
+        sheet.append(INPUT_COLUMNS)
+        for n in range(rows):
+            weight = None if n % 7 == 0 else str(1 + n % 19)
+            sheet.append([1000000000000 + n, 50 + n, f'{2 + n % 30} x {10 + n % 40} x {15 + n % 45}', weight,
+                          'JADLOG Package', 'PAC' if n % 2 else 'SEDEX'])
+        path = str(tmp_path / name)
+        workbook.save(path)
+        return path
+
+    return make
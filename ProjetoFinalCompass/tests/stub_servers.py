@@ -0,0 +1,360 @@
+'''Servidores locais (HTTP e SMTP) que substituem os sites e serviços externos nos testes e nos benchmarks.'''
+import json
+import os
+import random
+import socketserver
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_PATH, name), encoding='utf-8') as fixture:
+        return fixture.read()
+
+
+def _send_html(handler: BaseHTTPRequestHandler, page: str, status: int = 200):
+    body = page.encode('utf-8')
+    handler.send_response(status)
+    handler.send_header('Content-Type', 'text/html; charset=utf-8')
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def fake_company(cnpj: str) -> dict:
+    '''Gera um registro no mesmo formato retornado pela BrasilAPI.'''
+    return {
+        "cnpj": cnpj,
+        "razao_social": f"EMPRESA {cnpj} LTDA",
+        "nome_fantasia": f"EMPRESA {cnpj[-4:]}",
+        "situacao_cadastral": 2,
+        "logradouro": "RUA DE TESTE",
+        "numero": "100",
+        "municipio": "ARAGUARI",
+        "cep": "38440000",
+        "descricao_identificador_matriz_filial": "MATRIZ",
+        "ddd_telefone_1": "3433334444",
+        "email": "contato@empresa.com.br",
+    }
+
+
+class BrasilApiStubHandler(BaseHTTPRequestHandler):
+    '''Responde `GET /api/cnpj/v1/<cnpj>` com keep-alive e latência configurável.
+
+    Com `max_rate` as requisições acima dessa taxa (janela de 1 segundo) recebem 429 com Retry-After,
+    e com `error_ratio` essa fração das requisições recebe 503, como a BrasilAPI sob carga.
+    '''
+
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalhos e corpo saem em writes separados; com o Nagle ativo o corpo espera o ACK atrasado do
+    # cliente (~40 ms) em cada resposta de uma conexão keep-alive, o que distorce a comparação com e sem pool
+    disable_nagle_algorithm = True
+    latency = 0.05
+    not_found = set()
+    max_rate = None
+    error_ratio = 0.0
+    retry_after = 1
+    _arrivals = deque()
+    _lock = threading.Lock()
+
+    @classmethod
+    def _over_rate(cls) -> bool:
+        if cls.max_rate is None:
+            return False
+        now = time.monotonic()
+        with cls._lock:
+            while cls._arrivals and now - cls._arrivals[0] > 1:
+                cls._arrivals.popleft()
+            if len(cls._arrivals) >= cls.max_rate:
+                return True
+            cls._arrivals.append(now)
+            return False
+
+    def do_GET(self):
+        if self._over_rate():
+            self._send_json(429, {"message": "Too many requests"}, {'Retry-After': str(self.retry_after)})
+            return
+        time.sleep(self.latency)
+        if random.random() < self.error_ratio:
+            self._send_json(503, {"message": "Service unavailable"})
+            return
+        cnpj = self.path.rstrip('/').split('/')[-1]
+        if cnpj in self.not_found:
+            self._send_json(404, {"message": "CNPJ não encontrado"})
+        else:
+            self._send_json(200, fake_company(cnpj))
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def fake_jadlog_price(fields: dict) -> str:
+    '''Calcula um preço determinístico para os campos do simulador, no formato "1234,56".'''
+    weight = float(str(fields.get('peso', '0')).replace(',', '.'))
+    declared = float(str(fields.get('valor_mercadoria', '0')).replace(',', '.'))
+    price = 20 + 3.5 * weight + 0.01 * declared + int(fields.get('modalidade', 0))
+    return f"{price:.2f}".replace('.', ',')
+
+
+class JadlogStubHandler(BaseHTTPRequestHandler):
+    '''Reproduz a página de simulação do Jadlog a partir do HTML gravado em `fixtures/`.
+
+    `GET` devolve o formulário vazio e `POST` devolve o formulário com o resultado,
+    renovando o ViewState a cada resposta como o site real.
+    '''
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.05
+    required_fields = ('modalidade', 'origem', 'destino', 'peso', 'valAltura', 'valLargura',
+                       'valComprimento', 'valor_coleta', 'valor_mercadoria', 'javax.faces.ViewState')
+
+    def do_GET(self):
+        self._send_page(result='')
+
+    def do_POST(self):
+        time.sleep(self.latency)
+        length = int(self.headers.get('Content-Length', 0))
+        fields = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+        if any(not fields.get(name) for name in self.required_fields):
+            self._send_page(result='<p class="erro">Preencha todos os campos</p>')
+            return
+        result = read_fixture('jadlog_resultado.html').format(
+            modalidade=fields['modalidade'],
+            price=fake_jadlog_price(fields)
+        )
+        self._send_page(result=result)
+
+    def _send_page(self, result: str):
+        page = read_fixture('jadlog_simulacao.html').replace('{view_state}', uuid.uuid4().hex).replace('{result}', result)
+        _send_html(self, page)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def fake_correios_quote(fields: dict) -> tuple:
+    '''Calcula prazo (dias úteis) e preço determinísticos para os campos do calculador dos correios.'''
+    weight = float(str(fields.get('peso', '0') or 0).replace(',', '.'))
+    dimensions = sum(float(str(fields.get(name, '0') or 0).replace(',', '.')) for name in ('Altura', 'Largura', 'Comprimento'))
+    express = fields.get('servico') != '04510'
+    days = 2 if express else 6
+    price = 18 + 4.2 * weight + 0.05 * dimensions + (12 if express else 0)
+    return days, f"{price:.2f}".replace('.', ',')
+
+
+class CorreiosStubHandler(BaseHTTPRequestHandler):
+    '''Reproduz o calculador de preços e prazos dos correios.
+
+    `GET /` devolve o formulário (cepOrigem, cepDestino, servico, formatos em `img.caixa`, embalagem1,
+    Altura/Largura/Comprimento, peso e o botão `input.btn2`), que é enviado para uma nova aba.
+    `GET /correios/resultado` devolve a tabela com as linhas `tr.destaque` de prazo e valor total.
+    '''
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.05
+    required_fields = ('cepOrigem', 'cepDestino', 'servico', 'formato', 'embalagem1', 'Altura', 'Largura', 'Comprimento', 'peso')
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip('/').endswith('/correios/resultado'):
+            self._send_result({key: values[0] for key, values in parse_qs(url.query).items()})
+            return
+        weight_options = '\n      '.join(f'<option value="{weight}">{weight}</option>' for weight in ['0.3'] + [str(n) for n in range(1, 31)])
+        page = read_fixture('correios_precos_prazos.html').replace('{today}', date.today().strftime('%d/%m/%Y'))
+        _send_html(self, page.replace('{weight_options}', weight_options))
+
+    def _send_result(self, fields: dict):
+        time.sleep(self.latency)
+        if any(not fields.get(name) for name in self.required_fields):
+            _send_html(self, '<p class="erro">Preencha todos os campos</p>')
+            return
+        days, price = fake_correios_quote(fields)
+        page = read_fixture('correios_resultado.html').format(
+            cep_origin=fields['cepOrigem'], cep_destiny=fields['cepDestino'], service=fields['servico'],
+            shipping_date=fields.get('data', ''), days=days, price=price
+        )
+        _send_html(self, page)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RpaChallengeStubHandler(BaseHTTPRequestHandler):
+    '''Reproduz o RPA Challenge: botão `btn-large`, campos com `ng-reflect-name` que mudam de posição a cada
+    envio e o botão `input[value="Submit"]`.
+
+    Cada envio do formulário chega em `POST /rpa/submitted`; o horário de chegada fica em `submissions`,
+    o que permite medir a latência por linha do lado do servidor.
+    '''
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    submissions = []
+
+    def do_GET(self):
+        _send_html(self, read_fixture('rpa_challenge.html'))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self.submissions.append(time.time())
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    '''Executa um `ThreadingHTTPServer` em uma thread de fundo.
+
+    # Exemplo
+
+        with StubServer(BrasilApiStubHandler) as server:
+            url = f"{server.url}/api/cnpj/v1/"
+    '''
+
+    def __init__(self, handler_class, host: str = '127.0.0.1', port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), handler_class)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class SmtpStubHandler(socketserver.StreamRequestHandler):
+    '''Servidor SMTP mínimo (EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT), sem TLS.
+
+    Cada mensagem recebida fica em `messages` com remetente, destinatários e o conteúdo bruto;
+    `connections` e `logins` contam conexões e autenticações, para conferir o reaproveitamento da sessão.
+    '''
+
+    messages = []
+    connections = 0
+    logins = 0
+    _lock = threading.Lock()
+
+    def _reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+    def _read_line(self) -> str:
+        return self.rfile.readline().decode('utf-8', errors='replace').rstrip('\r\n')
+
+    def handle(self):
+        with self._lock:
+            SmtpStubHandler.connections += 1
+        self._reply('220 localhost SMTP stand-in')
+        mail_from, rcpt_to = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+            command, _, argument = line.partition(' ')
+            command = command.upper()
+            if command in ('EHLO', 'HELO'):
+                self.wfile.write(b'250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n250 SIZE 52428800\r\n')
+            elif command == 'AUTH':
+                mechanism, _, initial = argument.partition(' ')
+                if mechanism.upper() == 'PLAIN' and not initial:
+                    self._reply('334 ')
+                    self._read_line()
+                elif mechanism.upper() == 'LOGIN':
+                    self._reply('334 VXNlcm5hbWU6')
+                    self._read_line()
+                    self._reply('334 UGFzc3dvcmQ6')
+                    self._read_line()
+                with self._lock:
+                    SmtpStubHandler.logins += 1
+                self._reply('235 2.7.0 Authentication successful')
+            elif command == 'MAIL':
+                mail_from, rcpt_to = argument.split(':', 1)[1].strip().split(' ')[0].strip('<>'), []
+                self._reply('250 OK')
+            elif command == 'RCPT':
+                rcpt_to.append(argument.split(':', 1)[1].strip().strip('<>'))
+                self._reply('250 OK')
+            elif command == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b'.\r\n', b'.\n', b''):
+                        break
+                    lines.append(data_line[1:] if data_line.startswith(b'..') else data_line)
+                with self._lock:
+                    SmtpStubHandler.messages.append({'from': mail_from, 'to': rcpt_to, 'data': b''.join(lines)})
+                mail_from, rcpt_to = None, []
+                self._reply('250 OK queued')
+            elif command == 'RSET':
+                mail_from, rcpt_to = None, []
+                self._reply('250 OK')
+            elif command == 'NOOP':
+                self._reply('250 OK')
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class SmtpStubServer:
+    '''Executa o `SmtpStubHandler` em uma thread de fundo.
+
+    # Exemplo
+
+        with SmtpStubServer() as server:
+            vars_map['SMTP_HOST'], vars_map['SMTP_PORT'] = server.host, server.port
+    '''
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        SmtpStubHandler.messages, SmtpStubHandler.connections, SmtpStubHandler.logins = [], 0, 0
+        self.server = socketserver.ThreadingTCPServer((host, port), SmtpStubHandler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def host(self) -> str:
+        return self.server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,86 @@
+import threading
+from collections import Counter
+
+import pytest
+
+from config import vars_map
+from Utils.api_brasil import create_brasilapi_limiter, query_brasilapi_concurrent
+from Utils.persistent_cache import PersistentCache
+from stub_servers import BrasilApiStubHandler, StubServer
+
+
+class CnpjApiHandler(BrasilApiStubHandler):
+    '''BrasilAPI em que os primeiros CNPJs da lista respondem por último e alguns falham com 503.
+
+    `flaky` responde 503 na primeira consulta de cada CNPJ e `unavailable` em todas.
+    '''
+
+    not_found = {'00000000000404'}
+    flaky = set()
+    unavailable = set()
+    requests = Counter()
+    _requests_lock = threading.Lock()
+
+    @property
+    def latency(self):
+        return 0.002 * (10 - int(self.path[-1]))
+
+    def do_GET(self):
+        cnpj = self.path.rstrip('/').split('/')[-1]
+        with self._requests_lock:
+            self.requests[cnpj] += 1
+            attempt = self.requests[cnpj]
+        if cnpj in self.unavailable or (cnpj in self.flaky and attempt == 1):
+            self._send_json(503, {"message": "Service unavailable"})
+        else:
+            super().do_GET()
+
+
+@pytest.fixture
+def brasilapi(monkeypatch):
+    monkeypatch.setattr(CnpjApiHandler, 'requests', Counter())
+    monkeypatch.setattr(CnpjApiHandler, 'flaky', set())
+    monkeypatch.setattr(CnpjApiHandler, 'unavailable', set())
+    monkeypatch.setitem(vars_map, 'BRASILAPI_RATE_PER_SECOND', 1000.0)
+    monkeypatch.setitem(vars_map, 'BRASILAPI_BURST', 1000)
+    monkeypatch.setitem(vars_map, 'BRASILAPI_BACKOFF_BASE_SECONDS', 0.01)
+    monkeypatch.setitem(vars_map, 'BRASILAPI_BACKOFF_MAX_SECONDS', 0.05)
+    with StubServer(CnpjApiHandler) as server:
+        monkeypatch.setitem(vars_map, 'DEFAULT_BRASILAPI_URL', f"{server.url}/api/cnpj/v1/")
+        yield CnpjApiHandler
+
+
+CNPJS = [f'1122233300{n:04d}' for n in range(10)]
+
+
+def test_results_follow_the_input_order(brasilapi, logger):
+    results = query_brasilapi_concurrent(CNPJS, logger, max_workers=5)
+
+    assert [item['data']['cnpj'] for item in results] == CNPJS
+    assert {item['status'] for item in results} == {'Sucesso'}
+
+
+def test_not_found_is_a_failure_kept_in_place_and_cached(brasilapi, logger, tmp_path):
+    cnpjs = [CNPJS[0], '00000000000404', CNPJS[1]]
+    with PersistentCache(tmp_path / 'cnpj.sqlite', 'cnpj', ttl=60, negative_ttl=60, max_entries=100) as cache:
+        results = query_brasilapi_concurrent(cnpjs, logger, max_workers=3, cache=cache)
+        assert [item['status'] for item in results] == ['Sucesso', 'falha', 'Sucesso']
+        assert results[1]['data'] is None
+
+        again = query_brasilapi_concurrent(cnpjs, logger, max_workers=3, cache=cache)
+
+    assert again == results
+    # o 404 não é repetido e a segunda consulta sai toda do cache
+    assert brasilapi.requests == Counter({cnpj: 1 for cnpj in cnpjs})
+
+
+def test_transient_errors_are_retried_until_the_limiter_gives_up(brasilapi, logger, monkeypatch):
+    brasilapi.flaky.update(CNPJS[:3])
+    brasilapi.unavailable.add(CNPJS[3])
+    monkeypatch.setitem(vars_map, 'BRASILAPI_MAX_RETRIES', 2)
+
+    results = query_brasilapi_concurrent(CNPJS[:5], logger, max_workers=5,
+                                         limiter=create_brasilapi_limiter(5, 5))
+
+    assert [item['status'] for item in results] == ['Sucesso', 'Sucesso', 'Sucesso', 'falha', 'Sucesso']
+    assert [brasilapi.requests[cnpj] for cnpj in CNPJS[:5]] == [2, 2, 2, 3, 1]
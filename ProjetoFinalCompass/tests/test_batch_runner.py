@@ -0,0 +1,81 @@
+import csv
+import os
+
+import pandas as pd
+
+from Utils.batch_runner import FAILED_FOLDER_NAME, SUMMARY_COLUMNS, WatchFolderRunner
+
+
+def write_input(folder, name, age:float=60):
+    '''Cria uma planilha vazia com data de modificação `age` segundos no passado.'''
+    path = folder / name
+    path.write_bytes(b'planilha')
+    mtime = path.stat().st_mtime - age
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def fake_process(input_path):
+    if 'falha' in os.path.basename(input_path):
+        raise RuntimeError('planilha inválida')
+    df_output = pd.DataFrame({'VALOR COTAÇÃO JADLOG': ['R$ 10,00', None],
+                              'VALOR COTAÇÃO CORREIOS': [None, None]})
+    return df_output, f'{input_path}.saida.xlsx'
+
+
+def read_summary(processed):
+    with open(processed / 'resumo_lote.csv', encoding='utf-8-sig', newline='') as summary_file:
+        return list(csv.reader(summary_file, delimiter=';'))
+
+
+def test_moves_finished_and_failed_workbooks_and_writes_summary(tmp_path, logger):
+    inbox, processed = tmp_path / 'Processar', tmp_path / 'Processados'
+    inbox.mkdir()
+    write_input(inbox, 'grupo_a.xlsx')
+    write_input(inbox, 'grupo_falha.xlsx')
+    write_input(inbox, '~$grupo_a.xlsx')
+
+    runner = WatchFolderRunner(fake_process, str(inbox), str(processed), logger, max_files=2,
+                               poll_interval=0.05, stop_when_idle=True)
+    statuses = {status.file: status for status in runner.run()}
+
+    assert statuses['grupo_a.xlsx'][1:5] == ('Sucesso', 2, 1, 1)
+    assert statuses['grupo_falha.xlsx'].status == 'Falha'
+    assert statuses['grupo_falha.xlsx'].message == 'planilha inválida'
+    assert '~$grupo_a.xlsx' not in statuses
+    assert sorted(os.listdir(inbox)) == ['~$grupo_a.xlsx']
+    assert (processed / 'grupo_a.xlsx').exists()
+    assert (processed / FAILED_FOLDER_NAME / 'grupo_falha.xlsx').exists()
+
+    summary = read_summary(processed)
+    assert summary[0] == SUMMARY_COLUMNS
+    assert sorted(row[:2] for row in summary[1:]) == [['grupo_a.xlsx', 'Sucesso'], ['grupo_falha.xlsx', 'Falha']]
+
+
+def test_existing_processed_workbook_is_not_overwritten(tmp_path, logger):
+    inbox, processed = tmp_path / 'Processar', tmp_path / 'Processados'
+    inbox.mkdir()
+    processed.mkdir()
+    (processed / 'grupo_a.xlsx').write_bytes(b'anterior')
+    write_input(inbox, 'grupo_a.xlsx')
+
+    WatchFolderRunner(fake_process, str(inbox), str(processed), logger, poll_interval=0.05, stop_when_idle=True).run()
+
+    assert (processed / 'grupo_a.xlsx').read_bytes() == b'anterior'
+    moved = [name for name in os.listdir(processed) if name.startswith('grupo_a_')]
+    assert len(moved) == 1 and (processed / moved[0]).read_bytes() == b'planilha'
+    assert len(read_summary(processed)) == 2
+
+
+def test_workbook_still_being_copied_waits_for_a_stable_signature(tmp_path, logger):
+    inbox = tmp_path / 'Processar'
+    inbox.mkdir()
+    path = write_input(inbox, 'grupo_a.xlsx', age=0)
+    runner = WatchFolderRunner(fake_process, str(inbox), str(tmp_path / 'Processados'), logger, poll_interval=60)
+
+    assert runner.pending_files() == []
+    assert runner.pending_files() == [path]
+
+    with open(path, 'ab') as workbook:
+        workbook.write(b'mais dados')
+    assert runner.pending_files() == []
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from Utils.browser_pool import BrowserWorkerPool
+
+
+class FakeBot:
+    driver = None
+
+
+def test_factory_failure_fails_the_items_instead_of_hanging(logger):
+    attempts = []
+
+    def broken_factory():
+        attempts.append(1)
+        raise OSError('chromedriver não iniciou')
+
+    with BrowserWorkerPool(2, logger, bot_factory=broken_factory, timeout=5) as pool:
+        results = pool.map(lambda bot, item: item * 2, [1, 2, 3], key=lambda item: item)
+
+    assert [result.key for result in results] == [1, 2, 3]
+    assert all(result.value is None and isinstance(result.error, OSError) for result in results)
+    # Cada item tenta abrir um navegador novo
+    assert len(attempts) == 3
+
+
+def test_worker_recovers_when_factory_starts_working(logger):
+    bots = iter([OSError('falhou'), FakeBot()])
+
+    def flaky_factory():
+        bot = next(bots)
+        if isinstance(bot, Exception):
+            raise bot
+        return bot
+
+    with BrowserWorkerPool(1, logger, bot_factory=flaky_factory, timeout=5) as pool:
+        results = pool.map(lambda bot, item: item * 2, [1, 2, 3], key=lambda item: item)
+
+    assert [result.value for result in results] == [None, 4, 6]
+    assert isinstance(results[0].error, OSError)
+
+
+def test_map_wait_is_bounded(logger):
+    pool = BrowserWorkerPool(1, logger, bot_factory=FakeBot, timeout=0.2)
+    # Sem start() nenhum worker consome a fila
+    with pytest.raises(RuntimeError):
+        pool.map(lambda bot, item: item, [1], key=lambda item: item)
+
+    with BrowserWorkerPool(1, logger, bot_factory=FakeBot, timeout=0.2) as pool:
+        with pytest.raises(TimeoutError):
+            pool.map(lambda bot, item: time.sleep(1), [1], key=lambda item: item)
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from Utils.check_correios_variables import (
+    HEIGHT_COLUMN, LENGTH_COLUMN, PARSED_COLUMNS, WIDTH_COLUMN, are_package_dimensions_valid, check_variables,
+    package_dimensions, parse_package_columns,
+    validate_correios_inputs,
+)
+from Utils.functions_excel import OUTPUT_COLUMNS, make_jadlog_correios_dataframes
+from Utils.jadlog_http import JadlogHttpClient
+
+DIMENSIONS = 'DIMENSÕES CAIXA (altura x largura x comprimento cm)'
+
+
+def correios_rows(weights):
+    return pd.DataFrame({
+        'CNPJ': [f'{n:014d}' for n in range(len(weights))],
+        DIMENSIONS: ['10 x 20 x 30'] * len(weights),
+        'PESO DO PRODUTO': weights,
+        'TIPO DE SERVIÇO CORREIOS': ['SEDEX'] * len(weights),
+        'CEP': ['01001000'] * len(weights),
+    }, dtype=object)
+
+
+def test_weight_rule_rejects_invalid_weights():
+    valid, rejected = validate_correios_inputs(correios_rows(['2', '0,5', 'dois', '0', '31']))
+
+    assert valid['CNPJ'].tolist() == ['00000000000000', '00000000000001']
+    assert rejected['00000000000002'].endswith('peso fora do formato numérico')
+    assert rejected['00000000000003'].endswith('peso fora do limite (até 30 kg)')
+    assert rejected['00000000000004'].endswith('peso fora do limite (até 30 kg)')
+
+
+def test_package_dimensions_reads_parsed_columns():
+    row = parse_package_columns(correios_rows(['2'])).iloc[0]
+    assert package_dimensions(row) == {'height': '10', 'width': '20', 'length': '30'}
+
+    row[HEIGHT_COLUMN] = float('nan')
+    with pytest.raises(ValueError):
+        package_dimensions(row)
+
+
+def test_split_adds_parsed_columns_to_both_carriers(logger):
+    df_output = pd.DataFrame([[None] * len(OUTPUT_COLUMNS)] * 2, columns=OUTPUT_COLUMNS, dtype=object)
+    df_output['CNPJ'] = ['11222333000181', '11222333000262']
+    df_output[DIMENSIONS] = ['10 x 20 x 30', '5,5 x 12 x 18']
+    df_output['PESO DO PRODUTO'] = ['2', '1']
+    df_output['CEP'] = ['01001000', '20040002']
+    df_output['TIPO DE SERVIÇO CORREIOS'] = ['SEDEX', 'PAC']
+    df_output['TIPO DE SERVIÇO JADLOG'] = ['JADLOG Package', 'JADLOG .Com']
+    df_output['VALOR DO PEDIDO'] = ['100.5', '80']
+    api_data = pd.DataFrame({'CNPJ': df_output['CNPJ']}, dtype=object)
+
+    df_output, df_correios, df_jadlog = make_jadlog_correios_dataframes(df_output, api_data, logger)
+
+    assert set(PARSED_COLUMNS) <= set(df_correios.columns)
+    assert set(PARSED_COLUMNS) <= set(df_jadlog.columns)
+    assert df_jadlog[[HEIGHT_COLUMN, WIDTH_COLUMN, LENGTH_COLUMN]].values.tolist() == [[10, 20, 30], [5.5, 12, 18]]
+    assert list(df_output.columns) == OUTPUT_COLUMNS
+
+
+def test_jadlog_payload_uses_parsed_dimensions():
+    client = JadlogHttpClient(url='http://localhost/jadlog')
+    row = parse_package_columns(pd.DataFrame({
+        'TIPO DE SERVIÇO JADLOG': ['JADLOG Package'], DIMENSIONS: ['5,5 x 12 x 18'],
+        'PESO DO PRODUTO': ['1'], 'CEP': ['01001000'], 'VALOR DO PEDIDO': ['80'],
+    }, dtype=object)).iloc[0]
+
+    payload = client.build_payload(row)
+
+    assert (payload['valAltura'], payload['valLargura'], payload['valComprimento']) == ('5.5', '12', '18')
+
+
+def test_compatibility_wrappers_use_the_vectorized_rules():
+    rows = correios_rows(['2', '31'])
+
+    assert check_variables(rows.iloc[0]) == ({'height': '10', 'width': '20', 'length': '30'}, '2', 'SEDEX', '01001000')
+    with pytest.raises(ValueError, match='peso fora do limite'):
+        check_variables(rows.iloc[1])
+    assert are_package_dimensions_valid('10', '20', '30')
+    assert not are_package_dimensions_valid('10', '5', '30')
@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pytest
+
+from Utils.checkpoint import CheckpointStore
+from Utils.quote_journal import QuoteJournal
+
+
+def test_journal_survives_restart_without_resume(tmp_path, logger):
+    input_path = tmp_path / 'entrada.xlsx'
+    input_path.write_bytes(b'planilha')
+    base_path = tmp_path / 'Checkpoints'
+
+    checkpoints = CheckpointStore(base_path, input_path, False, logger)
+    with QuoteJournal(checkpoints.journal_path) as journal:
+        journal.record('jadlog', '11222333000181', 'chave', '10,00')
+
+    # Execução interrompida e iniciada de novo sem RESUME_FROM_CHECKPOINT
+    checkpoints = CheckpointStore(base_path, input_path, False, logger)
+    assert not checkpoints.journal_path.startswith(checkpoints.run_dir)
+    with QuoteJournal(checkpoints.journal_path) as journal:
+        assert journal.get('jadlog', '11222333000181', 'chave') == (True, '10,00')
+
+    checkpoints.clear()
+    assert not os.path.exists(checkpoints.journal_path)
+    assert not os.path.exists(checkpoints.run_dir)
+
+
+def test_stage_with_none_frame_is_saved_and_reloaded(tmp_path, logger):
+    input_path = tmp_path / 'entrada.xlsx'
+    input_path.write_bytes(b'planilha')
+    df_output = pd.DataFrame({'CNPJ': ['11222333000181'], 'STATUS': ['Sem retorno da API']})
+    lookup = lambda df: (None, df)
+    to_frames = lambda api: {'api_data': api[0], 'df_output': api[1]}
+    from_frames = lambda frames: (frames['api_data'], frames['df_output'])
+
+    checkpoints = CheckpointStore(tmp_path, input_path, False, logger)
+    api_data, _ = checkpoints.wrap('api', lookup, to_frames, from_frames)(df_output)
+    assert api_data is None
+
+    resumed = CheckpointStore(tmp_path, input_path, True, logger)
+    api_data, reloaded = resumed.wrap('api', lambda df: pytest.fail('etapa não deveria rodar de novo'), to_frames, from_frames)(df_output)
+    assert api_data is None
+    assert reloaded['CNPJ'].tolist() == ['11222333000181']
@@ -0,0 +1,42 @@
+from config import LazyValue, LazyVarsMap
+
+
+def make_map(calls):
+    def loader():
+        calls.append('loader')
+        return {'SMTP_PORT': 465, 'DEFAULT_BOT': LazyValue(lambda: calls.append('bot') or 'bot')}
+    return LazyVarsMap(loader)
+
+
+def test_loader_runs_on_first_access_only():
+    calls = []
+    vars_map = make_map(calls)
+    assert calls == []
+
+    assert vars_map['SMTP_PORT'] == 465
+    assert 'DEFAULT_BOT' in vars_map
+    assert calls == ['loader']
+
+
+def test_read_methods_resolve_lazy_values():
+    calls = []
+    vars_map = make_map(calls)
+
+    assert dict(vars_map.items()) == {'SMTP_PORT': 465, 'DEFAULT_BOT': 'bot'}
+    assert list(vars_map.values()) == [465, 'bot']
+    assert vars_map == {'SMTP_PORT': 465, 'DEFAULT_BOT': 'bot'}
+    assert vars_map.copy() == {'SMTP_PORT': 465, 'DEFAULT_BOT': 'bot'}
+    assert vars_map.get('MISSING', 'padrão') == 'padrão'
+    # O LazyValue é construído uma única vez
+    assert calls == ['loader', 'bot']
+
+
+def test_writes_override_loaded_values_and_repr_hides_values():
+    calls = []
+    vars_map = make_map(calls)
+    vars_map.update({'SMTP_PORT': 25})
+    del vars_map['DEFAULT_BOT']
+
+    assert vars_map == {'SMTP_PORT': 25}
+    assert repr(vars_map) == "LazyVarsMap(['SMTP_PORT'])"
+    assert calls == ['loader']
@@ -0,0 +1,118 @@
+import base64
+import socket
+import sys
+
+import pytest
+
+from stub_servers import SmtpStubHandler, SmtpStubServer
+from config import vars_map
+from Utils import email_functions
+from Utils.email_functions import MailDispatcher, SMTPConnection, close_error_smtp, send_error_digest
+
+RECIPIENTS = ['a@empresa.com.br', 'b@empresa.com.br', 'c@empresa.com.br']
+ATTACHMENT = b'CNPJ;VALOR COTACAO;STATUS\n' * 200
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with SmtpStubServer() as server:
+        monkeypatch.setitem(vars_map, 'SMTP_HOST', server.host)
+        monkeypatch.setitem(vars_map, 'SMTP_PORT', server.port)
+        monkeypatch.setitem(vars_map, 'SMTP_USE_SSL', False)
+        monkeypatch.setitem(vars_map, 'EMAIL_USERNAME', 'rpa@empresa.com.br')
+        monkeypatch.setitem(vars_map, 'EMAIL_PASSWORD', 'senha')
+        yield server
+
+
+def count_add_attachment(monkeypatch) -> list:
+    calls = []
+    add_attachment = email_functions.EmailMessage.add_attachment
+
+    def counted(msg, *args, **kwargs):
+        calls.append(kwargs.get('filename'))
+        return add_attachment(msg, *args, **kwargs)
+
+    monkeypatch.setattr(email_functions.EmailMessage, 'add_attachment', counted)
+    return calls
+
+
+def test_dispatcher_reuses_one_connection_and_encodes_attachment_once(server, monkeypatch):
+    calls = count_add_attachment(monkeypatch)
+
+    with MailDispatcher(single_message=False) as dispatcher:
+        dispatcher.send('Resultado', 'corpo', RECIPIENTS, [(ATTACHMENT, 'application', 'xlsx', 'resultado.xlsx')])
+        dispatcher.send('Resultado', 'corpo', RECIPIENTS[:1])
+
+    assert (SmtpStubHandler.connections, SmtpStubHandler.logins) == (1, 1)
+    assert [message['to'] for message in SmtpStubHandler.messages] == [[email] for email in RECIPIENTS + RECIPIENTS[:1]]
+    assert calls == ['resultado.xlsx']
+    encoded = base64.encodebytes(ATTACHMENT)[:76]
+    assert all(encoded in message['data'] for message in SmtpStubHandler.messages[:3])
+
+
+def test_connection_reconnects_after_server_drops_it(server):
+    msg = email_functions.EmailMessage()
+    msg['Subject'], msg['From'], msg['To'] = 'Teste', 'rpa@empresa.com.br', RECIPIENTS[0]
+    msg.set_content('corpo')
+
+    with SMTPConnection() as connection:
+        connection.send_message(msg)
+        # O servidor encerra a sessão sem que o cliente saiba, como em um timeout de inatividade
+        connection._smtp.docmd('QUIT')
+        connection.send_message(msg)
+
+    assert len(SmtpStubHandler.messages) == 2
+    assert (SmtpStubHandler.connections, SmtpStubHandler.logins) == (2, 2)
+
+
+def test_error_digests_share_the_global_connection(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(email_functions, 'read_emails_from_excel', lambda: list(RECIPIENTS))
+    monkeypatch.setitem(vars_map, 'EMAIL_SINGLE_MESSAGE', True)
+    screenshot = tmp_path / 'erro.jpeg'
+    screenshot.write_bytes(ATTACHMENT)
+    entry = {'process_name': 'Cotação Jadlog', 'message': 'Timeout', 'count': 2,
+             'first': email_functions.datetime.now(), 'last': email_functions.datetime.now()}
+
+    try:
+        send_error_digest([entry], [str(screenshot)])
+        send_error_digest([entry], [str(screenshot)])
+        assert email_functions._error_smtp is not None
+    finally:
+        close_error_smtp()
+
+    assert email_functions._error_smtp is None
+    assert (SmtpStubHandler.connections, SmtpStubHandler.logins) == (1, 1)
+    assert [message['to'] for message in SmtpStubHandler.messages] == [RECIPIENTS, RECIPIENTS]
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.errors = []
+
+    def info(self, msg): pass
+    def debug(self, msg): pass
+
+    def error(self, process_name):
+        self.errors.append((process_name, sys.exc_info()[1]))
+
+
+def test_send_emails_reports_connection_failure_instead_of_raising(monkeypatch, tmp_path):
+    # Porta sem servidor: a conexão é recusada com OSError, não SMTPException
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        closed_port = probe.getsockname()[1]
+    monkeypatch.setitem(vars_map, 'SMTP_HOST', '127.0.0.1')
+    monkeypatch.setitem(vars_map, 'SMTP_PORT', closed_port)
+    monkeypatch.setitem(vars_map, 'SMTP_USE_SSL', False)
+    monkeypatch.setitem(vars_map, 'EMAIL_USERNAME', 'rpa@empresa.com.br')
+    monkeypatch.setitem(vars_map, 'EMAIL_PASSWORD', 'senha')
+    monkeypatch.setitem(vars_map, 'EMAIL_COMPRESS_ATTACHMENTS', False)
+    monkeypatch.setattr(email_functions, 'read_emails_from_excel', lambda: list(RECIPIENTS))
+    output_file = tmp_path / 'resultado.xlsx'
+    output_file.write_bytes(ATTACHMENT)
+    logger = RecordingLogger()
+
+    email_functions.send_emails(str(output_file), logger)
+
+    assert len(logger.errors) == 1
+    assert isinstance(logger.errors[0][1], OSError)
@@ -0,0 +1,37 @@
+from openpyxl import Workbook
+
+from Utils.functions_excel import INPUT_SHEET_NAME, iter_excel_chunks, read_output_dataframe
+
+
+def make_workbook(path, rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = INPUT_SHEET_NAME
+    sheet.append(['CNPJ', 'CEP', 'PESO DO PRODUTO'])
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def test_default_na_strings_become_empty(tmp_path, logger):
+    path = tmp_path / 'entrada.xlsx'
+    make_workbook(path, [
+        ['11222333000181', 'N/A', '#N/A'],
+        ['11222333000262', 'null', 'NA'],
+        ['11222333000343', '01001000', '2'],
+    ])
+
+    df_output = read_output_dataframe(path, logger)
+
+    assert df_output['CEP'].tolist() == [None, None, '01001000']
+    assert df_output['PESO DO PRODUTO'].tolist() == [None, None, '2']
+
+
+def test_empty_na_values_keep_text(tmp_path):
+    path = tmp_path / 'entrada.xlsx'
+    make_workbook(path, [['11222333000181', 'N/A', 'null']])
+
+    chunk = next(iter_excel_chunks(path, INPUT_SHEET_NAME, na_values=()))
+
+    assert chunk.loc[0, 'CEP'] == 'N/A'
+    assert chunk.loc[0, 'PESO DO PRODUTO'] == 'null'
@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['botcity', 'selenium', 'webdriver_manager', 'pandas', 'openpyxl', 'PIL']
+# Mesmo orçamento padrão de Benchmarks/benchmark_import_time.py
+IMPORT_BUDGET_MS = 300
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import Utils, config
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "loaded": [name for name in %r if name in sys.modules]}))
+''' % HEAVY_MODULES
+
+
+def probe(maestro_connected:str) -> dict:
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=PROJECT_PATH, capture_output=True, text=True,
+                            env={**os.environ, 'IS_MAESTRO_CONNECTED': maestro_connected})
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('maestro_connected', ['False', 'True'])
+def test_import_loads_no_heavy_modules(maestro_connected):
+    # Com IS_MAESTRO_CONNECTED=True o import também não pode conectar ao Maestro
+    assert probe(maestro_connected)['loaded'] == []
+
+
+def test_import_time_within_budget():
+    # Mediana de três interpretadores novos, para não depender de uma execução lenta isolada
+    timings = sorted(probe('False')['ms'] for _ in range(3))
+    assert timings[1] < IMPORT_BUDGET_MS, f'import config, Utils levou {timings[1]:.0f} ms (orçamento {IMPORT_BUDGET_MS} ms)'
+
+
+def test_submodule_import_keeps_exported_class():
+    import Utils
+    from Utils.IntegratedLogger import IntegratedLogger
+    from Utils.result_store import ResultStore
+
+    assert Utils.IntegratedLogger is IntegratedLogger
+    assert Utils.ResultStore is ResultStore
+    assert 'rpa_challenge' in Utils.__all__
@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+import requests
+
+from config import vars_map
+from stub_servers import JadlogStubHandler, StubServer, fake_jadlog_price
+from Utils.check_correios_variables import parse_package_columns
+from Utils.jadlog_http import JadlogHttpClient
+
+
+class FailingJadlogHandler(JadlogStubHandler):
+    '''Simulador que carrega o formulário mas responde 503 às cotações.'''
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(503)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+@pytest.fixture(autouse=True)
+def jadlog_settings(monkeypatch):
+    monkeypatch.setattr(JadlogStubHandler, 'latency', 0)
+    monkeypatch.setitem(vars_map, 'ORIGIN_CEP', '38182428')
+    monkeypatch.setitem(vars_map, 'PICKUP_VALUE', '50')
+
+
+def jadlog_rows(weights) -> pd.DataFrame:
+    return parse_package_columns(pd.DataFrame({
+        'CNPJ': [f'{n:014d}' for n in range(len(weights))],
+        'TIPO DE SERVIÇO JADLOG': ['JADLOG Package'] * len(weights),
+        'DIMENSÕES CAIXA (altura x largura x comprimento cm)': ['10 x 20 x 30'] * len(weights),
+        'PESO DO PRODUTO': weights,
+        'CEP': ['01310100'] * len(weights),
+        'VALOR DO PEDIDO': ['150,00'] * len(weights),
+    }, dtype=object))
+
+
+def test_quote_parses_price_from_result_page():
+    rows = jadlog_rows(['2', '7'])
+    with StubServer(JadlogStubHandler) as server, JadlogHttpClient(url=f'{server.url}/jadlog/simulacao') as client:
+        quotations = [client.quote(serie) for _, serie in rows.iterrows()]
+
+    assert quotations == [fake_jadlog_price({'peso': weight, 'valor_mercadoria': '150,00', 'modalidade': '3'}) for weight in ('2', '7')]
+
+
+def test_page_without_price_raises_value_error():
+    # Sem peso o simulador devolve o formulário com a mensagem de erro e sem valor
+    rows = jadlog_rows([''])
+    with StubServer(JadlogStubHandler) as server, JadlogHttpClient(url=f'{server.url}/jadlog/simulacao') as client:
+        with pytest.raises(ValueError):
+            client.quote(rows.iloc[0])
+
+
+def test_http_error_is_raised():
+    with StubServer(FailingJadlogHandler) as server, JadlogHttpClient(url=f'{server.url}/jadlog/simulacao') as client:
+        with pytest.raises(requests.HTTPError):
+            client.quote(jadlog_rows(['2']).iloc[0])
+
+
+def test_failed_http_quotes_fall_back_to_the_browser(monkeypatch, logger):
+    pytest.importorskip('botcity')
+    from Utils.result_store import ResultStore
+    from Utils.scriptProcessos import _catchJadlogPriceHttp
+
+    rows = jadlog_rows(['2', '', '5'])
+    results = ResultStore()
+    with StubServer(JadlogStubHandler) as server:
+        monkeypatch.setitem(vars_map, 'DEFAULT_URL_JADLOG', f'{server.url}/jadlog/simulacao')
+        fallback = _catchJadlogPriceHttp(rows, results, logger)
+
+    assert fallback['CNPJ'].tolist() == ['00000000000001']
+    assert results.get('00000000000000', 'VALOR COTAÇÃO JADLOG').startswith('R$ ')
+    assert results.get('00000000000001', 'VALOR COTAÇÃO JADLOG') is None
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from Utils.IntegratedLogger import MaestroLogShipper
+
+
+class FakeMaestro:
+    '''Registra as entradas recebidas; com `hold`, o primeiro envio espera até `release()`.'''
+
+    def __init__(self, hold:bool=False, fail:bool=False):
+        self.entries = []
+        self.fail = fail
+        self.sending = threading.Event()
+        self._released = threading.Event()
+        if not hold:
+            self._released.set()
+
+    def new_log_entry(self, activity_label, values):
+        self.sending.set()
+        self._released.wait(5)
+        if self.fail:
+            raise ConnectionError('maestro indisponível')
+        self.entries.append((activity_label, values))
+
+    def release(self):
+        self._released.set()
+
+
+def entries(count, level='INFO'):
+    return [{'Level': level, 'Message': f'mensagem {n}'} for n in range(count)]
+
+
+def test_entries_are_sent_in_batches_of_batch_size():
+    maestro = FakeMaestro()
+    shipper = MaestroLogShipper(maestro, 'cotacoes', batch_size=3, batch_interval=60)
+    batches = []
+    send = shipper._send
+    shipper._send = lambda batch: (batches.append(len(batch)), send(batch))
+
+    for values in entries(7):
+        shipper.submit(values)
+    shipper.close(timeout=5)
+
+    assert batches == [3, 3, 1]
+    assert [values for _, values in maestro.entries] == entries(7)
+    assert {label for label, _ in maestro.entries} == {'cotacoes'}
+
+
+def test_close_flushes_a_partial_batch_without_waiting_for_the_interval():
+    maestro = FakeMaestro()
+    shipper = MaestroLogShipper(maestro, 'cotacoes', batch_size=50, batch_interval=60)
+    for values in entries(2):
+        shipper.submit(values)
+
+    start = time.monotonic()
+    shipper.close(timeout=5)
+
+    assert time.monotonic() - start < 5
+    assert [values for _, values in maestro.entries] == entries(2)
+    # close é idempotente
+    shipper.close(timeout=5)
+
+
+def test_full_queue_drops_the_oldest_info_entry():
+    maestro = FakeMaestro(hold=True)
+    shipper = MaestroLogShipper(maestro, 'cotacoes', batch_size=1, batch_interval=0, max_queue_size=2)
+    first, second, third, fourth = entries(4)
+    shipper.submit(first)
+    assert maestro.sending.wait(5)
+
+    for values in (second, third, fourth):
+        shipper.submit(values)
+    maestro.release()
+    shipper.close(timeout=5)
+
+    assert shipper.dropped == 1
+    assert [values for _, values in maestro.entries] == [first, third, fourth]
+
+
+def test_send_errors_are_counted_and_do_not_stop_the_thread():
+    shipper = MaestroLogShipper(FakeMaestro(fail=True), 'cotacoes', batch_size=2, batch_interval=0)
+    for values in entries(3, level='ERROR'):
+        shipper.submit(values)
+    shipper.close(timeout=5)
+
+    assert shipper.send_errors == 3
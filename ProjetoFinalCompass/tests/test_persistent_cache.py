@@ -0,0 +1,56 @@
+import pytest
+
+from Utils.persistent_cache import PersistentCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def open_cache(tmp_path, clock, max_entries=1000):
+    return PersistentCache(tmp_path / 'cache.sqlite', 'cnpj', ttl=60, negative_ttl=10, max_entries=max_entries, clock=clock)
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    with open_cache(tmp_path, clock) as cache:
+        cache.set('11222333000181', {'razao_social': 'Empresa'})
+        clock.advance(60)
+        assert cache.get('11222333000181') == (True, {'razao_social': 'Empresa'})
+        clock.advance(1)
+        assert cache.get('11222333000181') == (False, None)
+        assert cache.stats()['stale'] == 1
+
+
+def test_negative_entries_use_their_own_ttl(tmp_path, clock):
+    with open_cache(tmp_path, clock) as cache:
+        cache.set_negative('00000000000000')
+        clock.advance(10)
+        assert cache.get('00000000000000') == (True, None)
+        clock.advance(1)
+        assert cache.get('00000000000000') == (False, None)
+        assert cache.stats()['negative_hits'] == 1
+
+
+def test_eviction_keeps_the_most_recently_accessed(tmp_path, clock):
+    cache = open_cache(tmp_path, clock, max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key)
+        clock.advance(1)
+    # 'a' é lida por último e passa a ser a mais recente; 'b' é a menos usada
+    cache.get('a')
+    cache.close()
+
+    with open_cache(tmp_path, clock, max_entries=2) as cache:
+        assert [cache.get(key)[0] for key in ('a', 'b', 'c')] == [True, False, True]
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from config import vars_map
+from Utils.quote_cache import DIMENSIONS_COLUMN, apply_cached_quotes, correios_cache_key, jadlog_cache_key, open_quote_cache
+from Utils.result_store import ResultStore
+
+
+@pytest.fixture(autouse=True)
+def quote_vars(monkeypatch, tmp_path):
+    monkeypatch.setitem(vars_map, 'ORIGIN_CEP', '38182428')
+    monkeypatch.setitem(vars_map, 'PICKUP_VALUE', '50')
+    monkeypatch.setitem(vars_map, 'DEFAULT_CACHE_PATH', str(tmp_path))
+    monkeypatch.setitem(vars_map, 'QUOTE_CACHE_TTL_HOURS', 1)
+    monkeypatch.setitem(vars_map, 'QUOTE_CACHE_MAX_ENTRIES', 100)
+
+
+def row(**values):
+    base = {'CNPJ': '11222333000181', 'CEP': '01001-000', DIMENSIONS_COLUMN: '10 x 20 x 30', 'PESO DO PRODUTO': '1,5',
+            'TIPO DE SERVIÇO CORREIOS': 'PAC', 'TIPO DE SERVIÇO JADLOG': 'Package', 'VALOR DO PEDIDO': '100,00'}
+    base.update(values)
+    return pd.Series(base)
+
+
+def test_keys_ignore_formatting_differences():
+    reformatted = row(CEP=1001000, **{DIMENSIONS_COLUMN: ' 10X20X30 ', 'PESO DO PRODUTO': '1.5',
+                                       'TIPO DE SERVIÇO CORREIOS': ' pac', 'TIPO DE SERVIÇO JADLOG': 'PACKAGE',
+                                       'VALOR DO PEDIDO': '100.00'})
+
+    assert correios_cache_key(row()) == correios_cache_key(reformatted)
+    assert jadlog_cache_key(row()) == jadlog_cache_key(reformatted)
+    assert correios_cache_key(row()) != jadlog_cache_key(row())
+
+
+def test_keys_change_with_fields_that_change_the_price(monkeypatch):
+    assert correios_cache_key(row()) != correios_cache_key(row(CEP='20040002'))
+    assert correios_cache_key(row()) != correios_cache_key(row(**{'TIPO DE SERVIÇO CORREIOS': 'SEDEX'}))
+    # o site dos correios não usa o valor do pedido
+    assert correios_cache_key(row()) == correios_cache_key(row(**{'VALOR DO PEDIDO': '999'}))
+    assert jadlog_cache_key(row()) != jadlog_cache_key(row(**{'VALOR DO PEDIDO': '999'}))
+
+    key = jadlog_cache_key(row())
+    monkeypatch.setitem(vars_map, 'PICKUP_VALUE', '80')
+    assert jadlog_cache_key(row()) != key
+
+
+def test_cached_quotes_expire_after_the_configured_ttl(logger):
+    clock = [1_000_000.0]
+    df_filtered = pd.DataFrame([row(), row(CNPJ='11222333000262', CEP='20040002')], index=[3, 7])
+
+    with open_quote_cache() as cache:
+        cache.clock = lambda: clock[0]
+        cache.set(correios_cache_key(df_filtered.loc[3]), 'R$ 25,00')
+        results = ResultStore()
+        write = lambda store, cnpj, value: store.set(cnpj, 'VALOR COTAÇÃO CORREIOS', value)
+
+        clock[0] += 3600
+        missing = apply_cached_quotes(results, df_filtered, cache, correios_cache_key, write, 'Correios', logger)
+        assert missing.index.tolist() == [7]
+        assert results.get('11222333000181', 'VALOR COTAÇÃO CORREIOS') == 'R$ 25,00'
+        assert results.get('11222333000181', 'STATUS') is None
+
+        clock[0] += 1
+        missing = apply_cached_quotes(ResultStore(), df_filtered, cache, correios_cache_key, write, 'Correios', logger)
+        assert missing.index.tolist() == [3, 7]
+
+    merged = results.merge_into(df_filtered.assign(STATUS=None))
+    assert merged['STATUS'].tolist() == ['Cotação Correios obtida do cache', None]
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from config import vars_map
+from Utils.quote_cache import correios_cache_key
+from Utils.quote_plan import QuotePlan
+from Utils.result_store import ResultStore
+
+
+@pytest.fixture
+def df_correios(monkeypatch):
+    monkeypatch.setitem(vars_map, 'ORIGIN_CEP', '38182428')
+    return pd.DataFrame({
+        'CNPJ': ['A', 'B', 'C', 'D', 'A'],
+        'CEP': ['01001-000', '01001000', '20040002', '01001000', '01001000'],
+        'DIMENSÕES CAIXA (altura x largura x comprimento cm)': ['10 x 20 x 30', '10x20x30', '10 x 20 x 30',
+                                                               '10 X 20 X 30', '10 x 20 x 30'],
+        'PESO DO PRODUTO': ['1,5', '1.5', '1.5', '1.5', '1.5'],
+        'TIPO DE SERVIÇO CORREIOS': ['PAC', 'PAC', 'PAC', 'pac', 'PAC'],
+    }, index=[10, 11, 12, 13, 14])
+
+
+def test_rows_with_the_same_key_are_quoted_once(df_correios, logger):
+    plan = QuotePlan(df_correios, correios_cache_key, 'Correios', logger)
+
+    assert plan.unique_rows['CNPJ'].tolist() == ['A', 'C']
+    assert plan.unique_rows.index.tolist() == [10, 12]
+    # a segunda linha do CNPJ "A" já recebe o resultado do próprio pedido
+    assert plan.members == {'A': ['B', 'D']}
+    assert plan.saved == 3
+
+
+def test_fan_out_copies_results_to_every_row_of_the_group(df_correios, logger):
+    plan = QuotePlan(df_correios, correios_cache_key, 'Correios', logger)
+    results = ResultStore()
+    results.set('A', 'VALOR COTAÇÃO CORREIOS', 'R$ 25,00')
+    results.append_status('A', 'Cotação Correios obtida do cache')
+    results.set('C', 'VALOR COTAÇÃO CORREIOS', 'R$ 40,00')
+
+    df_output = plan.fan_out(results).merge_into(df_correios.assign(STATUS=None))
+
+    assert df_output['VALOR COTAÇÃO CORREIOS'].tolist() == ['R$ 25,00', 'R$ 25,00', 'R$ 40,00', 'R$ 25,00', 'R$ 25,00']
+    assert df_output['STATUS'].tolist() == ['Cotação Correios obtida do cache'] * 2 + [None] + \
+                                           ['Cotação Correios obtida do cache'] * 2
+
+
+def test_without_key_function_every_row_is_quoted(df_correios):
+    plan = QuotePlan(df_correios, None, 'Correios')
+
+    assert plan.unique_rows is df_correios
+    assert plan.members == {}
+    assert plan.saved == 0
+    assert len(plan.fan_out(ResultStore())) == 0
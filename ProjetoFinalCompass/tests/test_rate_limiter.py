@@ -0,0 +1,23 @@
+from Utils.rate_limiter import AdaptiveRateLimiter
+
+
+def test_rate_grows_past_initial_rate_until_first_throttle():
+    limiter = AdaptiveRateLimiter(rate=10, burst=10, max_concurrency=8)
+    for _ in range(50):
+        limiter.record(200)
+    assert limiter.rate == 60
+
+    limiter.record(429)
+    assert limiter.rate == 30
+    assert not limiter.slow_start
+
+    # Depois do primeiro 429 o aumento é aditivo
+    limiter.record(200)
+    assert 30 < limiter.rate < 31
+
+
+def test_max_rate_caps_growth():
+    limiter = AdaptiveRateLimiter(rate=10, burst=10, max_concurrency=8, max_rate=25)
+    for _ in range(50):
+        limiter.record(200)
+    assert limiter.rate == 25
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from Utils.result_store import ResultStore
+
+
+def output_frame():
+    return pd.DataFrame({
+        'CNPJ': ['11222333000181', '11222333000262', '11222333000181', None],
+        'VALOR COTAÇÃO JADLOG': [None, 'R$ 9,00', None, None],
+        'STATUS': [None, 'Sem retorno da API', None, None],
+    }, dtype=object)
+
+
+def test_merge_writes_every_row_of_a_cnpj_and_leaves_others_untouched():
+    results = ResultStore()
+    results.set('11222333000181', 'VALOR COTAÇÃO JADLOG', 'R$ 10,00')
+    results.set('11222333000181', 'PRAZO DE ENTREGA CORREIOS', '3 dias úteis')
+    # CNPJ que não está no df_output é ignorado
+    results.set('99999999000199', 'VALOR COTAÇÃO JADLOG', 'R$ 1,00')
+
+    df_output = results.merge_into(output_frame())
+
+    assert df_output['VALOR COTAÇÃO JADLOG'].tolist() == ['R$ 10,00', 'R$ 9,00', 'R$ 10,00', None]
+    assert df_output['PRAZO DE ENTREGA CORREIOS'].tolist() == ['3 dias úteis', None, '3 dias úteis', None]
+    assert len(df_output) == 4
+
+
+def test_status_appends_keep_existing_messages():
+    results = ResultStore()
+    results.append_status('11222333000262', 'Falha cotação jadlog')
+    results.append_status('11222333000181', 'Cotação Jadlog obtida do cache')
+    results.append_status('11222333000181', 'Cotação Correios obtida do cache')
+
+    df_output = results.merge_into(output_frame())
+
+    assert df_output['STATUS'].tolist() == [
+        'Cotação Jadlog obtida do cache | Cotação Correios obtida do cache',
+        'Sem retorno da API | Falha cotação jadlog',
+        'Cotação Jadlog obtida do cache | Cotação Correios obtida do cache',
+        None,
+    ]
+
+
+def test_set_status_replaces_pending_appends_and_records_round_trip():
+    results = ResultStore()
+    results.append_status('11222333000181', 'mensagem descartada')
+    results.set('11222333000181', 'STATUS', 'Falha cotação jadlog')
+    results.append_status('11222333000181', 'Sem retorno dos correios')
+    results.append_status('11222333000262', 'Falha cotação jadlog')
+    results.copy_to('11222333000262', ['11222333000343'])
+
+    reloaded = ResultStore.from_records(results.to_records())
+
+    assert reloaded.get('11222333000181', 'STATUS') == 'Falha cotação jadlog | Sem retorno dos correios'
+    assert len(reloaded) == 3
+    assert reloaded.merge_into(output_frame()).equals(results.merge_into(output_frame()))
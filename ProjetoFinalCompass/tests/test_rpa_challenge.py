@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('selenium')
+
+from Utils.rpa_challenge_form import failed_rows_results, fill_form_data_batched
+from Utils.result_store import ResultStore
+
+
+class FakeDriver:
+    '''Driver que falha a segunda linha de cada lote, como o FILL_ROWS_JS faria.'''
+
+    def execute_script(self, script, rows):
+        return [None if position != 1 else 'Campo labelEmail não encontrado' for position in range(len(rows))]
+
+
+def test_failed_rows_go_to_status_and_survive_checkpoint(logger):
+    data = pd.DataFrame({'CNPJ': ['11222333000181', '11222333000262', '11222333000343'], 'RAZÃO SOCIAL': ['A', 'B', 'C']})
+
+    status = fill_form_data_batched(FakeDriver(), data, logger, batch_size=10)
+    results = ResultStore.from_records(failed_rows_results(data, status).to_records())
+    df_output = results.merge_into(data.assign(STATUS=[None, 'Falha cotação jadlog', None]))
+
+    assert df_output['STATUS'].tolist() == [
+        None, 'Falha cotação jadlog | RPA Challenge: Falha: Campo labelEmail não encontrado', None,
+    ]
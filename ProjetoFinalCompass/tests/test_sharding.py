@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from Utils.functions_excel import read_output_dataframe
+from Utils.sharding import (
+    claim_shard_merge, merge_shard_outputs, release_shard_merge, save_shard_output, select_shard,
+)
+
+SHARD_COUNT = 3
+
+
+@pytest.fixture
+def input_path(input_workbook):
+    return input_workbook(60)
+
+
+def quoted(df_output):
+    '''Cotação determinística por CNPJ, no lugar das etapas de navegador.'''
+    df_output['VALOR COTAÇÃO JADLOG'] = [f'R$ {int(cnpj) % 97},00' for cnpj in df_output['CNPJ']]
+    return df_output
+
+
+def save_shards(shard_path, input_path, logger, drop_row_of=None):
+    df_input = read_output_dataframe(input_path, logger)
+    for shard_index in range(SHARD_COUNT):
+        df_shard = quoted(select_shard(df_input, shard_index, SHARD_COUNT, logger))
+        if shard_index == drop_row_of:
+            df_shard = df_shard.iloc[1:]
+        save_shard_output(shard_path, input_path, df_shard, shard_index, SHARD_COUNT, logger)
+    return df_input
+
+
+def test_merge_restores_input_order(tmp_path, input_path, logger):
+    shard_path = str(tmp_path / 'Shards')
+    df_input = save_shards(shard_path, input_path, logger)
+
+    assert claim_shard_merge(shard_path, input_path, SHARD_COUNT)
+    assert not claim_shard_merge(shard_path, input_path, SHARD_COUNT)
+    df_merged = merge_shard_outputs(shard_path, input_path, SHARD_COUNT, logger, chunk_size=7)
+
+    df_expected = quoted(df_input)
+    assert df_merged['CNPJ'].tolist() == df_expected['CNPJ'].tolist()
+    assert df_merged['VALOR COTAÇÃO JADLOG'].tolist() == df_expected['VALOR COTAÇÃO JADLOG'].tolist()
+
+
+def test_mismatched_shard_raises_and_lock_can_be_released(tmp_path, input_path, logger):
+    shard_path = str(tmp_path / 'Shards')
+    save_shards(shard_path, input_path, logger, drop_row_of=1)
+
+    assert claim_shard_merge(shard_path, input_path, SHARD_COUNT)
+    with pytest.raises(ValueError):
+        merge_shard_outputs(shard_path, input_path, SHARD_COUNT, logger)
+
+    release_shard_merge(shard_path, input_path)
+    assert claim_shard_merge(shard_path, input_path, SHARD_COUNT)
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from Utils.stage_scheduler import StageScheduler
+
+
+def test_stages_receive_dependency_results_in_order(logger):
+    calls = []
+    scheduler = StageScheduler(logger, max_workers=1)
+    scheduler.add('leitura', lambda: calls.append('leitura') or 2)
+    scheduler.add('dobro', lambda value: calls.append('dobro') or value * 2, depends=('leitura',))
+    scheduler.add('soma', lambda first, second: calls.append('soma') or first + second, depends=('leitura', 'dobro'))
+
+    results = scheduler.run()
+
+    assert calls == ['leitura', 'dobro', 'soma']
+    assert results == {'leitura': 2, 'dobro': 4, 'soma': 6}
+    assert set(scheduler.timings) == {'leitura', 'dobro', 'soma'}
+
+
+def test_independent_stages_run_at_the_same_time(logger):
+    # As duas etapas só passam da barreira se estiverem rodando juntas
+    barrier = threading.Barrier(2, timeout=5)
+    scheduler = StageScheduler(logger, max_workers=2)
+    scheduler.add('leitura', lambda: 'df')
+    scheduler.add('correios', lambda df: barrier.wait() is not None, depends=('leitura',))
+    scheduler.add('jadlog', lambda df: barrier.wait() is not None, depends=('leitura',))
+
+    assert scheduler.run() == {'leitura': 'df', 'correios': True, 'jadlog': True}
+
+
+def test_failure_stops_dependents_and_is_raised(logger):
+    ran = []
+
+    def fail(df):
+        raise ValueError('site fora do ar')
+
+    scheduler = StageScheduler(logger, max_workers=1)
+    scheduler.add('leitura', lambda: 'df')
+    scheduler.add('correios', fail, depends=('leitura',))
+    scheduler.add('escrita', lambda quotes: ran.append('escrita'), depends=('correios',))
+
+    with pytest.raises(ValueError, match='site fora do ar'):
+        scheduler.run()
+    assert ran == []
+
+
+def test_optional_stage_failure_does_not_fail_the_run(logger):
+    def send(written):
+        raise OSError('conexão recusada')
+
+    scheduler = StageScheduler(logger)
+    scheduler.add('escrita', lambda: 'saida.xlsx')
+    scheduler.add('email', send, depends=('escrita',), optional=True)
+
+    assert scheduler.run() == {'escrita': 'saida.xlsx', 'email': None}